@@ -0,0 +1,200 @@
+import logging
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Literal
+
+from fastapi import Query
+from sqlalchemy import case, delete, distinct, exists, func, insert, select, update
+from sqlmodel import Session
+
+from backend.database import engine, run_write
+from backend.models import Schedule, Defense, PanelAssignment, LecturerWorkload
+from rl_impelementation.availability import date_key
+
+logger = logging.getLogger(__name__)
+
+EXAMINER_ROLES = ("penguji1", "penguji2")
+# Characters of a YYYY-MM-DD date that make up each period
+PERIOD_LENGTHS = {"day": 10, "month": 7, "year": 4}
+DATE_LENGTH = PERIOD_LENGTHS["day"]
+# Schedules backfilled per transaction
+BACKFILL_BATCH = 50
+
+
+@dataclass
+class WorkloadFilters:
+    """Filters shared by the analytics endpoints (read from the query string).
+
+    Dates are compared as text, which orders YYYY-MM-DD dates correctly;
+    date_to is inclusive. Both are cut to the date like the stored rows
+    ("2024-01-08 00:00:00" -> "2024-01-08").
+    """
+    date_from: str | None = Query(default=None)
+    date_to: str | None = Query(default=None)
+    field: list[str] | None = Query(default=None)
+    lecturer_id: list[int] | None = Query(default=None)
+    schedule_id: list[int] | None = Query(default=None)
+
+    def apply(self, query):
+        if self.date_from is not None:
+            query = query.where(LecturerWorkload.date >= day_key(self.date_from))
+        if self.date_to is not None:
+            query = query.where(LecturerWorkload.date <= day_key(self.date_to))
+        if self.field:
+            query = query.where(LecturerWorkload.field.in_(self.field))
+        if self.lecturer_id:
+            query = query.where(LecturerWorkload.lecturer_id.in_(self.lecturer_id))
+        if self.schedule_id:
+            query = query.where(LecturerWorkload.schedule_id.in_(self.schedule_id))
+        return query
+
+
+def day_key(date) -> str:
+    """The YYYY-MM-DD part of a date, however it was uploaded (Excel dates come with a midnight time)"""
+    return date_key(date)[:DATE_LENGTH]
+
+
+def refresh_workload(session: Session, schedule_id: int):
+    """Rebuild the lecturer_workload rows of a schedule from its defense and panel_assignment rows.
+
+    Runs inside the caller's transaction, so the summary always matches the
+    stored assignments: call it in the same write that stores or edits them.
+    Dates are stored as day_key does, in SQL.
+    """
+    examiner = case((PanelAssignment.role.in_(EXAMINER_ROLES), 1), else_=0)
+    day = func.substr(func.trim(Defense.date), 1, DATE_LENGTH)
+    totals = (
+        select(PanelAssignment.schedule_id, PanelAssignment.lecturer_id, day, Defense.field,
+               func.count(), func.sum(examiner), func.sum(1 - examiner))
+        .join(Defense, Defense.id == PanelAssignment.defense_id)
+        .where(PanelAssignment.schedule_id == schedule_id)
+        .group_by(PanelAssignment.schedule_id, PanelAssignment.lecturer_id, day, Defense.field)
+    )
+    session.execute(delete(LecturerWorkload).where(LecturerWorkload.schedule_id == schedule_id))
+    session.execute(insert(LecturerWorkload).from_select(
+        ["schedule_id", "lecturer_id", "date", "field", "panels", "examiner", "supervisor"], totals,
+    ))
+
+
+def legacy_workload(schedule: Schedule) -> list[dict]:
+    """lecturer_workload rows of a schedule stored before the defense table existed, from its JSON"""
+    counts = Counter()
+    for row in schedule.schedule.get("schedule", []):
+        for key, lecturer_id in row.get("panelAssignment", {}).items():
+            if lecturer_id is not None:
+                counts[(lecturer_id, day_key(row["date"]), str(row["field"]), key.startswith("penguji"))] += 1
+
+    totals = {}
+    for (lecturer_id, date, field, is_examiner), count in counts.items():
+        row = totals.setdefault((lecturer_id, date, field), {
+            "schedule_id": schedule.id, "lecturer_id": lecturer_id, "date": date, "field": field,
+            "panels": 0, "examiner": 0, "supervisor": 0,
+        })
+        row["panels"] += count
+        row["examiner" if is_examiner else "supervisor"] += count
+    return list(totals.values())
+
+
+def backfill_workload():
+    """Summarize the schedules stored before lecturer_workload existed.
+
+    Runs once at startup; afterwards every schedule gets its rows when it is
+    stored. Schedules without panel_assignment rows are summarized from
+    their JSON. Schedules with no assignment at all have no rows, so they
+    are looked at again on every start. Rows stored with the time of an
+    Excel date are cut to the date first.
+    """
+    run_write(lambda write_session: write_session.execute(
+        update(LecturerWorkload).where(func.length(LecturerWorkload.date) > DATE_LENGTH)
+        .values(date=func.substr(func.trim(LecturerWorkload.date), 1, DATE_LENGTH))
+    ))
+
+    with Session(engine) as session:
+        schedule_ids = session.execute(
+            select(Schedule.id)
+            .where(~exists().where(LecturerWorkload.schedule_id == Schedule.id))
+            .order_by(Schedule.id)
+        ).scalars().all()
+    if not schedule_ids:
+        return
+
+    def write(write_session: Session, batch):
+        normalized = set(write_session.execute(
+            select(PanelAssignment.schedule_id).distinct().where(PanelAssignment.schedule_id.in_(batch))
+        ).scalars())
+        for schedule_id in batch:
+            if schedule_id in normalized:
+                refresh_workload(write_session, schedule_id)
+            else:
+                rows = legacy_workload(write_session.get(Schedule, schedule_id))
+                if rows:
+                    write_session.execute(insert(LecturerWorkload), rows)
+
+    for start in range(0, len(schedule_ids), BACKFILL_BATCH):
+        batch = schedule_ids[start:start + BACKFILL_BATCH]
+        run_write(lambda write_session: write(write_session, batch))
+    logger.info("Summarized the workload of %d stored schedules", len(schedule_ids))
+
+
+def lecturer_totals(session: Session, filters: WorkloadFilters, limit: int, offset: int = 0) -> list[dict]:
+    """Panels per lecturer over the filtered rows, most panels first"""
+    panels = func.sum(LecturerWorkload.panels)
+    query = filters.apply(
+        select(LecturerWorkload.lecturer_id, panels, func.sum(LecturerWorkload.examiner),
+               func.sum(LecturerWorkload.supervisor), func.count(distinct(LecturerWorkload.schedule_id)),
+               func.min(LecturerWorkload.date), func.max(LecturerWorkload.date))
+    ).group_by(LecturerWorkload.lecturer_id).order_by(panels.desc(), LecturerWorkload.lecturer_id)
+
+    return [
+        {"lecturerId": lecturer_id, "panels": total, "examiner": examiner, "supervisor": supervisor,
+         "schedules": schedules, "firstDate": first_date, "lastDate": last_date}
+        for lecturer_id, total, examiner, supervisor, schedules, first_date, last_date
+        in session.execute(query.limit(limit).offset(offset))
+    ]
+
+
+def period_totals(session: Session, filters: WorkloadFilters, period: Literal["day", "month", "year"],
+                  limit: int, offset: int = 0) -> list[dict]:
+    """Panels per day, month or year over the filtered rows, in date order"""
+    key = func.substr(LecturerWorkload.date, 1, PERIOD_LENGTHS[period])
+    query = filters.apply(
+        select(key, func.sum(LecturerWorkload.panels), func.sum(LecturerWorkload.examiner),
+               func.sum(LecturerWorkload.supervisor), func.count(distinct(LecturerWorkload.lecturer_id)),
+               func.count(distinct(LecturerWorkload.schedule_id)))
+    ).group_by(key).order_by(key)
+
+    return [
+        {"period": period_key, "panels": panels, "examiner": examiner, "supervisor": supervisor,
+         "lecturers": lecturers, "schedules": schedules}
+        for period_key, panels, examiner, supervisor, lecturers, schedules
+        in session.execute(query.limit(limit).offset(offset))
+    ]
+
+
+def schedule_balance(session: Session, filters: WorkloadFilters, limit: int,
+                     after_id: int | None = None) -> list[dict]:
+    """Workload spread per schedule over the filtered rows, in schedule id order.
+
+    Statistics are over the lecturers with at least one panel in the
+    filtered rows (as the workload of a schedule response); balanceScore is
+    1 / (1 + standard deviation).
+    """
+    per_lecturer = filters.apply(
+        select(LecturerWorkload.schedule_id, func.sum(LecturerWorkload.panels).label("panels"))
+    ).group_by(LecturerWorkload.schedule_id, LecturerWorkload.lecturer_id).subquery()
+
+    query = select(per_lecturer.c.schedule_id, func.count(), func.sum(per_lecturer.c.panels),
+                   func.sum(per_lecturer.c.panels * per_lecturer.c.panels),
+                   func.min(per_lecturer.c.panels), func.max(per_lecturer.c.panels))
+    if after_id is not None:
+        query = query.where(per_lecturer.c.schedule_id > after_id)
+    query = query.group_by(per_lecturer.c.schedule_id).order_by(per_lecturer.c.schedule_id)
+
+    balance = []
+    for schedule_id, lecturers, panels, squares, fewest, most in session.execute(query.limit(limit)):
+        mean = panels / lecturers
+        std = math.sqrt(max(squares / lecturers - mean * mean, 0.0))
+        balance.append({"scheduleId": schedule_id, "lecturers": lecturers, "panels": panels, "mean": mean,
+                        "std": std, "min": fewest, "max": most, "balanceScore": 1.0 / (1.0 + std)})
+    return balance
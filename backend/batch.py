@@ -0,0 +1,208 @@
+import io
+import logging
+import os
+import posixpath
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from backend.database import engine, run_write
+from backend.schemas import BatchManifestEntry
+from backend.scheduling import ScheduleParams, solve_schedule
+from rl_impelementation.ingestion import IngestionError
+from rl_impelementation.thesis_defense_scheduler import get_rollout_pool
+from rl_impelementation.timing import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+# Datasets per batch, and their total uncompressed size
+BATCH_MAX_DATASETS = int(os.environ.get("BATCH_MAX_DATASETS", 100))
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", 512 * 1024 * 1024))
+
+MANIFEST_NAME = "manifest.json"
+KINDS = ("dosen", "jadwal")
+OPTIONAL_KINDS = ("availability",)
+
+
+class BatchError(ValueError):
+    """An archive or manifest that does not describe dosen/jadwal pairs"""
+
+
+@dataclass
+class BatchDataset:
+    name: str
+    dosen: bytes
+    jadwal: bytes
+    faculty: str | None = None
+    availability: bytes | None = None
+
+
+def parse_manifest(text) -> list[BatchManifestEntry]:
+    """A JSON list of {name, dosen, jadwal, availability, faculty} entries, or {"datasets": [...]}"""
+    try:
+        adapter = TypeAdapter(list[BatchManifestEntry] | dict[str, list[BatchManifestEntry]])
+        manifest = adapter.validate_json(text)
+    except ValidationError as e:
+        raise BatchError(f"Invalid manifest: {e.errors()[0]['msg']}")
+    if isinstance(manifest, dict):
+        if "datasets" not in manifest:
+            raise BatchError('Invalid manifest: expected a list or {"datasets": [...]}')
+        manifest = manifest["datasets"]
+    return manifest
+
+
+def infer_manifest(paths) -> list[BatchManifestEntry]:
+    """Pair files by name: <dir>/dosen.xlsx with <dir>/jadwal.xlsx, or <name>_dosen.csv with <name>_jadwal.csv,
+    plus an optional <dir>/availability.xlsx or <name>_availability.csv"""
+    pairs = {}
+    for path in paths:
+        directory, filename = posixpath.split(path)
+        if filename.startswith(".") or path.startswith("__MACOSX/"):
+            continue
+        stem = posixpath.splitext(filename)[0].lower()
+        for kind in KINDS + OPTIONAL_KINDS:
+            if stem == kind:
+                name = directory
+            elif stem.endswith((f"_{kind}", f"-{kind}")):
+                name = posixpath.join(directory, stem[:-len(kind) - 1])
+            else:
+                continue
+            pair = pairs.setdefault(name, {})
+            if kind in pair:
+                raise BatchError(f"More than one {kind} file for dataset {name or 'dataset'}: {pair[kind]}, {path}")
+            pair[kind] = path
+
+    incomplete = sorted(name or "dataset" for name, pair in pairs.items() if any(kind not in pair for kind in KINDS))
+    if incomplete:
+        raise BatchError(f"Datasets without both a dosen and a jadwal file: {', '.join(incomplete)}")
+    return [BatchManifestEntry(name=name or "dataset", **pair) for name, pair in pairs.items()]
+
+
+def collect_datasets(files: dict, manifest: list[BatchManifestEntry] | None) -> list[BatchDataset]:
+    """Datasets from files ({path or filename: read function}), paired by the manifest or by name"""
+    entries = manifest if manifest is not None else infer_manifest(files)
+    if not entries:
+        raise BatchError("No dosen/jadwal pairs found")
+    if len(entries) > BATCH_MAX_DATASETS:
+        raise BatchError(f"At most {BATCH_MAX_DATASETS} datasets per batch, got {len(entries)}")
+
+    datasets, names = [], set()
+    for entry in entries:
+        missing = [path for path in (entry.dosen, entry.jadwal, entry.availability)
+                   if path is not None and path not in files]
+        if missing:
+            raise BatchError(f"Files listed in the manifest are missing: {', '.join(missing)}")
+        name = entry.name or posixpath.dirname(entry.dosen) or entry.dosen
+        if name in names:
+            raise BatchError(f"Duplicate dataset name: {name}")
+        names.add(name)
+        availability = files[entry.availability]() if entry.availability is not None else None
+        datasets.append(BatchDataset(name, files[entry.dosen](), files[entry.jadwal](), entry.faculty, availability))
+    return datasets
+
+
+def read_archive(file) -> list[BatchDataset]:
+    """Datasets from a zip archive, paired by its manifest.json or by file name"""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise BatchError("The archive is not a zip file")
+
+    with archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        # Sizes from the zip directory, checked before anything is decompressed
+        if sum(info.file_size for info in members) > BATCH_MAX_BYTES:
+            raise BatchError(f"The archive is larger than {BATCH_MAX_BYTES} bytes uncompressed")
+
+        files = {info.filename: (lambda name=info.filename: archive.read(name)) for info in members}
+        manifest = parse_manifest(files.pop(MANIFEST_NAME)()) if MANIFEST_NAME in files else None
+        return collect_datasets(files, manifest)
+
+
+def read_uploads(uploads: list, manifest_text: str | None) -> list[BatchDataset]:
+    """Datasets from uploaded files, paired by the manifest or by file name"""
+    files = {}
+    for upload in uploads:
+        if upload.filename in files:
+            raise BatchError(f"Duplicate file name: {upload.filename}")
+        files[upload.filename] = upload.file.read
+
+    if sum(upload.size or 0 for upload in uploads) > BATCH_MAX_BYTES:
+        raise BatchError(f"The uploads are larger than {BATCH_MAX_BYTES} bytes")
+    manifest = parse_manifest(manifest_text) if manifest_text is not None else None
+    return collect_datasets(files, manifest)
+
+
+def run_batch(datasets: list[BatchDataset], params: ScheduleParams, use_cache: bool = True):
+    """Schedule the datasets side by side and store every new schedule in one transaction.
+
+    params.workers is the budget for the whole batch: that many datasets are
+    read and solved at once, each solve in one process of the rollout pool.
+    A dataset that fails (invalid upload, solver error) does not stop the
+    others. Returns a BatchDatasetResult-shaped dict per dataset and the
+    batch timings.
+    """
+    timer = PhaseTimer()
+    solver_pool = get_rollout_pool(params.workers) if params.workers > 1 else None
+
+    def solve(dataset: BatchDataset):
+        dataset_params = replace(params, faculty=dataset.faculty) if dataset.faculty is not None else params
+        dataset_timer = PhaseTimer()
+        try:
+            with Session(engine) as session:
+                availability = io.BytesIO(dataset.availability) if dataset.availability is not None else None
+                response, cached, pending = solve_schedule(io.BytesIO(dataset.dosen), io.BytesIO(dataset.jadwal),
+                                                           dataset_params, session, use_cache, dataset_timer,
+                                                           solver_pool=solver_pool, availability_file=availability)
+        except IngestionError as e:
+            return {"status": "failed", "error": str(e)}, None
+        except Exception as e:
+            logger.exception("Batch dataset %s failed", dataset.name)
+            return {"status": "failed", "error": f"{type(e).__name__}: {e}"}, None
+
+        result = {key: response[key] for key in ("reward", "iterations", "total_schedule", "total_dosen", "avg_dosen")}
+        result["timings"] = dataset_timer.rounded()
+        if cached is not None:
+            return {**result, "status": "cached", "id": cached.id}, None
+        return {**result, "status": "done"}, pending
+
+    with timer.phase("solve"):
+        with ThreadPoolExecutor(max_workers=max(1, min(params.workers, len(datasets))),
+                                thread_name_prefix="schedule-batch") as threads:
+            solved = list(threads.map(solve, datasets))
+
+    def write_all(write_session: Session):
+        stored = {}
+        for i, (_, pending) in enumerate(solved):
+            if pending is None:
+                continue
+            # A failing dataset only rolls back its own rows
+            try:
+                with write_session.begin_nested():
+                    stored[i] = pending.write(write_session)
+            except SQLAlchemyError:
+                logger.exception("Storing batch dataset %s failed", datasets[i].name)
+                stored[i] = None
+        return stored
+
+    with timer.phase("db_commit"):
+        try:
+            stored = run_write(write_all) if any(pending is not None for _, pending in solved) else {}
+        except SQLAlchemyError:
+            logger.exception("Storing the batch failed")
+            stored = {i: None for i, (_, pending) in enumerate(solved) if pending is not None}
+
+    results = []
+    for i, (dataset, (result, pending)) in enumerate(zip(datasets, solved)):
+        if pending is not None:
+            if stored[i] is None:
+                result = {"status": "failed", "error": "Database error"}
+            else:
+                pending.stored(stored[i])
+                result = {**result, "id": stored[i].id}
+        results.append({"name": dataset.name, **result})
+    return results, timer.rounded()
@@ -0,0 +1,148 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from sqlmodel import Session, select, func, delete, update
+
+from backend.database import run_write
+from backend.models import Schedule, ScheduleCacheEntry
+
+# Entries older than the TTL are ignored and removed (0 keeps them forever)
+SCHEDULE_CACHE_TTL = int(os.environ.get("SCHEDULE_CACHE_TTL", 7 * 24 * 3600))
+# Least recently used entries beyond this are evicted from the table
+SCHEDULE_CACHE_MAX_ENTRIES = int(os.environ.get("SCHEDULE_CACHE_MAX_ENTRIES", 1000))
+# Size of the per-process in-memory tier (0 disables it)
+SCHEDULE_CACHE_MEMORY_SIZE = int(os.environ.get("SCHEDULE_CACHE_MEMORY_SIZE", 32))
+
+CHUNK_SIZE = 1024 * 1024
+
+# Parameters that do not change the result
+UNKEYED_PARAMS = {"workers"}
+
+
+def cache_key(dosen_file: BinaryIO, jadwal_file: BinaryIO, params, availability_file: BinaryIO | None = None) -> str:
+    """Content hash of the uploads plus the solver parameters.
+
+    The files are read in chunks and rewound afterwards. Without an
+    availability upload the key is the same as before it was accepted.
+    """
+    digest = hashlib.sha256()
+    files = (dosen_file, jadwal_file) if availability_file is None else (dosen_file, jadwal_file, availability_file)
+    for f in files:
+        size = f.seek(0, io.SEEK_END)
+        f.seek(0)
+        digest.update(size.to_bytes(8, "big"))
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+        f.seek(0)
+    solver_params = {k: v for k, v in asdict(params).items() if k not in UNKEYED_PARAMS}
+    digest.update(json.dumps(solver_params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ScheduleCache:
+    """Maps cache keys to stored Schedule rows, with an optional in-memory LRU tier.
+
+    The table decides what is cached: every lookup reads the entry (by
+    primary key), and the memory tier only saves loading the Schedule row
+    again. An entry deleted by another process (an edit, eviction or
+    expiry) is therefore a miss here too.
+    """
+
+    def __init__(self, ttl, max_entries, memory_size):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # key -> detached Schedule
+        self.lock = threading.Lock()
+
+    def is_expired(self, created_at: datetime) -> bool:
+        if not self.ttl:
+            return False
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - created_at > timedelta(seconds=self.ttl)
+
+    def remember(self, key, schedule: Schedule):
+        if not self.memory_size:
+            return
+        with self.lock:
+            self.memory[key] = Schedule(**schedule.model_dump())
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def recall(self, key, schedule_id: int) -> Schedule | None:
+        """The remembered schedule of a key, if it is still the one its entry points at"""
+        with self.lock:
+            schedule = self.memory.get(key)
+            if schedule is None:
+                return None
+            if schedule.id != schedule_id:
+                del self.memory[key]
+                return None
+            self.memory.move_to_end(key)
+            return schedule
+
+    def forget(self, key):
+        with self.lock:
+            self.memory.pop(key, None)
+
+    def get(self, session: Session, key: str) -> Schedule | None:
+        """The schedule cached under key, or None; hits and expired entries are written through run_write"""
+        entry = session.get(ScheduleCacheEntry, key, populate_existing=True)
+        if entry is None:
+            self.forget(key)
+            return None
+
+        schedule = self.recall(key, entry.schedule_id)
+        if schedule is None and not self.is_expired(entry.created_at):
+            schedule = session.get(Schedule, entry.schedule_id)
+            if schedule is not None:
+                self.remember(key, schedule)
+
+        # Only this entry, in case another request replaced it in the meantime
+        this_entry = (ScheduleCacheEntry.key == key) & (ScheduleCacheEntry.schedule_id == entry.schedule_id)
+        if schedule is None or self.is_expired(entry.created_at):
+            self.forget(key)
+            run_write(lambda write_session: write_session.exec(delete(ScheduleCacheEntry).where(this_entry)))
+            return None
+
+        run_write(lambda write_session: write_session.exec(
+            update(ScheduleCacheEntry).where(this_entry)
+            .values(hits=ScheduleCacheEntry.hits + 1, last_used_at=datetime.now(timezone.utc))
+        ))
+        return schedule
+
+    def put(self, session: Session, key: str, schedule: Schedule):
+        """Add an entry for a schedule; the caller commits and then calls remember()"""
+        session.merge(ScheduleCacheEntry(key=key, schedule_id=schedule.id))
+
+        if self.max_entries:
+            overflow = session.exec(select(func.count()).select_from(ScheduleCacheEntry)).one() - self.max_entries
+            if overflow > 0:
+                oldest = select(ScheduleCacheEntry.key).order_by(ScheduleCacheEntry.last_used_at).limit(overflow)
+                session.exec(delete(ScheduleCacheEntry).where(ScheduleCacheEntry.key.in_(oldest)))
+
+    def invalidate(self, session: Session, schedule_id: int):
+        """Drop the entries of a schedule that was edited after it was generated; the caller commits.
+
+        Other processes see the deleted entries on their next lookup.
+        """
+        session.exec(delete(ScheduleCacheEntry).where(ScheduleCacheEntry.schedule_id == schedule_id))
+        with self.lock:
+            for key in [key for key, schedule in self.memory.items() if schedule.id == schedule_id]:
+                del self.memory[key]
+
+    def clear_memory(self):
+        with self.lock:
+            self.memory.clear()
+
+
+schedule_cache = ScheduleCache(SCHEDULE_CACHE_TTL, SCHEDULE_CACHE_MAX_ENTRIES, SCHEDULE_CACHE_MEMORY_SIZE)
@@ -0,0 +1,95 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlmodel import Session, select, update
+
+from backend.database import engine, run_write
+from backend.metrics import register_gauge
+from backend.profiling import profile_if_slow
+from backend.models import ScheduleJob
+from backend.scheduling import ScheduleParams, build_schedule
+
+# Jobs that run at the same time, and jobs (running + queued) accepted before returning 429
+JOB_WORKERS = int(os.environ.get("SCHEDULE_JOB_WORKERS", 2))
+JOB_QUEUE_LIMIT = int(os.environ.get("SCHEDULE_JOB_QUEUE_LIMIT", 16))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobRunner:
+    """Runs schedule jobs on a bounded thread pool; job state lives in the database"""
+
+    def __init__(self, max_workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="schedule-job")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Claim a queue slot before the job is stored, or raise QueueFullError"""
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise QueueFullError()
+            self.pending += 1
+
+    def release(self):
+        with self.lock:
+            self.pending -= 1
+
+    def submit(self, job_id):
+        self.executor.submit(self.run, job_id)
+
+    @staticmethod
+    def set_state(job_id, **values):
+        """Update columns of a job (status, result, ...) through the write batcher"""
+        run_write(lambda session: session.exec(update(ScheduleJob).where(ScheduleJob.id == job_id).values(**values)))
+
+    def run(self, job_id):
+        try:
+            self.set_state(job_id, status="running")
+            try:
+                with Session(engine) as session, profile_if_slow(f"schedule_job_{job_id}"):
+                    job = session.get(ScheduleJob, job_id)
+                    availability = io.BytesIO(job.availability_file) if job.availability_file is not None else None
+                    _, new_schedule, _ = build_schedule(io.BytesIO(job.dosen_file), io.BytesIO(job.jadwal_file),
+                                                        ScheduleParams.from_dict(job.params), session,
+                                                        availability_file=availability)
+                # The uploads are only needed until the schedule exists
+                outcome = dict(status="done", schedule_id=new_schedule.id,
+                               dosen_file=None, jadwal_file=None, availability_file=None)
+            except Exception as e:
+                outcome = dict(status="failed", error=f"{type(e).__name__}: {e}")
+
+            self.set_state(job_id, finished_at=datetime.now(timezone.utc), **outcome)
+        finally:
+            self.release()
+
+    def resume(self):
+        """Requeue jobs left queued or running by a previous process"""
+        def requeue(session: Session):
+            job_ids = session.exec(
+                select(ScheduleJob.id).where(ScheduleJob.status.in_(["queued", "running"])).order_by(ScheduleJob.id)
+            ).all()
+            session.exec(update(ScheduleJob).where(ScheduleJob.id.in_(job_ids)).values(status="queued"))
+            return job_ids
+
+        job_ids = run_write(requeue)
+
+        # Jobs accepted before the restart are never rejected
+        with self.lock:
+            self.pending += len(job_ids)
+        for job_id in job_ids:
+            self.submit(job_id)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+job_runner = JobRunner(JOB_WORKERS, JOB_QUEUE_LIMIT)
+register_gauge("sofi_schedule_jobs_pending", "Schedule jobs queued or running", lambda: job_runner.pending)
+register_gauge("sofi_schedule_job_queue_limit", "Schedule jobs accepted before returning 429", lambda: job_runner.max_pending)
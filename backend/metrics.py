@@ -0,0 +1,148 @@
+import bisect
+import threading
+
+# Latency buckets in seconds, from cache hits to full runs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+ITERATION_BUCKETS = (1, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def label_text(labelnames, values):
+    if not labelnames:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labelnames, escaped)) + "}"
+
+
+class Metric:
+    """Base of the Prometheus text-format metrics below (no client library needed)"""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values -> state
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                lines.extend(self.samples(key, state))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        with self.lock:
+            key = self.key(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self, key, value):
+        return [f"{self.name}{label_text(self.labelnames, key)} {value}"]
+
+
+class Gauge(Metric):
+    """A value that is set or moved, or read from a function at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, amount=1, **labels):
+        with self.lock:
+            key = self.key(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        if self.function is not None:
+            with self.lock:
+                self.values[()] = self.function()
+        return super().render()
+
+    def samples(self, key, value):
+        return [f"{self.name}{label_text(self.labelnames, key)} {value}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        with self.lock:
+            key = self.key(labels)
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self, key, state):
+        counts, total = state
+        names = self.labelnames + ("le",)
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{label_text(names, key + (bound,))} {cumulative}")
+        lines.append(f"{self.name}_sum{label_text(self.labelnames, key)} {total}")
+        lines.append(f"{self.name}_count{label_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+REGISTRY = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+http_request_seconds = register(Histogram(
+    "sofi_http_request_duration_seconds", "HTTP request latency by route",
+    LATENCY_BUCKETS, ("method", "route", "status"),
+))
+http_requests_in_flight = register(Gauge("sofi_http_requests_in_flight", "HTTP requests being handled"))
+schedule_seconds = register(Histogram(
+    "sofi_schedule_duration_seconds", "Time to build a schedule, by cache result",
+    LATENCY_BUCKETS, ("cache",),
+))
+schedule_phase_seconds = register(Histogram(
+    "sofi_schedule_phase_duration_seconds", "Time spent per schedule generation phase",
+    LATENCY_BUCKETS, ("phase",),
+))
+rl_iterations = register(Histogram("sofi_rl_iterations", "RL iterations run per schedule", ITERATION_BUCKETS))
+rl_iterations_total = register(Counter("sofi_rl_iterations_total", "RL iterations run in total"))
+slow_profiles_total = register(Counter("sofi_slow_request_profiles_total", "Profiles saved for slow requests"))
+
+
+def register_gauge(name, documentation, function):
+    """Gauge read from function() when /metrics is scraped (queue sizes and the like)"""
+    return register(Gauge(name, documentation, function=function))
+
+
+def observe_schedule(timer, iterations, cache_hit):
+    schedule_seconds.observe(timer.total() / 1000, cache="hit" if cache_hit else "miss")
+    for phase, ms in timer.phases.items():
+        schedule_phase_seconds.observe(ms / 1000, phase=phase)
+    if iterations:
+        rl_iterations.observe(iterations)
+        rl_iterations_total.inc(iterations)
+
+
+def server_timing(timer):
+    """Server-Timing header value, e.g. "parse;dur=12.3, rl_search;dur=840.0" """
+    return ", ".join(f"{phase};dur={ms:.1f}" for phase, ms in timer.phases.items())
+
+
+def render_metrics():
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
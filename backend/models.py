@@ -1,5 +1,6 @@
-from typing import Dict, Any
-from sqlalchemy import JSON
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+from sqlalchemy import JSON, LargeBinary, Index
 from sqlmodel import SQLModel, Field, Column
 
 
@@ -9,3 +10,90 @@ class Schedule(SQLModel, table=True):
     total_schedule: int = Field(default=None)
     total_dosen: int = Field(default=None)
     avg_dosen: float = Field(default=None)
+    # Milliseconds per generation phase (read, parse, expertise, availability, compile, rl_search,
+    # panel or flow, decompose, components when the problem splits, portfolio, format)
+    timings: Dict[str, float] | None = Field(default=None, sa_column=Column(JSON))
+
+
+class FacultyQTable(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    faculty: str = Field(index=True, unique=True)
+    q_values: List[Any] = Field(default=[], sa_column=Column(JSON))
+    episodes: int = Field(default=0)
+
+
+class ScheduleJob(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    status: str = Field(default="queued", index=True)  # queued, running, done, failed
+    params: Dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    dosen_file: bytes | None = Field(default=None, sa_column=Column(LargeBinary))
+    jadwal_file: bytes | None = Field(default=None, sa_column=Column(LargeBinary))
+    availability_file: bytes | None = Field(default=None, sa_column=Column(LargeBinary))
+    schedule_id: int | None = Field(default=None, foreign_key="schedule.id")
+    error: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = Field(default=None)
+
+
+class ScheduleCacheEntry(SQLModel, table=True):
+    key: str = Field(primary_key=True)  # sha256 of the uploads and solver parameters
+    schedule_id: int = Field(foreign_key="schedule.id")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_used_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+    hits: int = Field(default=0)
+
+
+class ScheduleExpertise(SQLModel, table=True):
+    schedule_id: int = Field(primary_key=True, foreign_key="schedule.id")
+    # [[lecturer id, [field, ...]], ...] so lecturer ids keep their JSON type
+    lecturer_expertise: List[Any] = Field(default=[], sa_column=Column(JSON))
+
+
+class Defense(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    schedule_id: int = Field(foreign_key="schedule.id", index=True)
+    date: str = Field(index=True)
+    time: str
+    room: str | None = Field(default=None)
+    student_id: int
+    thesis_title: str | None = Field(default=None)
+    field: str = Field(index=True)
+    # What exports order by, set on insert: the date without the time of Excel dates and the
+    # start in seconds after midnight (-1 when unreadable); None only until the startup backfill
+    day: str | None = Field(default=None)
+    start: int | None = Field(default=None)
+
+
+class PanelAssignment(SQLModel, table=True):
+    __tablename__ = "panel_assignment"
+
+    id: int | None = Field(default=None, primary_key=True)
+    defense_id: int = Field(foreign_key="defense.id", index=True)
+    schedule_id: int = Field(foreign_key="schedule.id", index=True)
+    lecturer_id: int = Field(index=True)
+    role: str  # penguji1, penguji2, pembimbing1, pembimbing2
+
+
+class LecturerUnavailability(SQLModel, table=True):
+    __tablename__ = "lecturer_unavailability"
+
+    id: int | None = Field(default=None, primary_key=True)
+    schedule_id: int = Field(foreign_key="schedule.id", index=True)
+    lecturer_id: int
+    date: str
+    time: str | None = Field(default=None)  # a time or range ("08:00 - 12:00"); None for the whole date
+
+
+# Panels per lecturer, date and field of each stored schedule, kept by backend/analytics.py
+class LecturerWorkload(SQLModel, table=True):
+    __tablename__ = "lecturer_workload"
+    __table_args__ = (Index("ix_lecturer_workload_lecturer_id_date", "lecturer_id", "date"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    schedule_id: int = Field(foreign_key="schedule.id", index=True)
+    lecturer_id: int
+    date: str = Field(index=True)
+    field: str = Field(index=True)
+    panels: int
+    examiner: int  # penguji1, penguji2
+    supervisor: int  # pembimbing1, pembimbing2
@@ -0,0 +1,65 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from backend.metrics import slow_profiles_total
+
+logger = logging.getLogger(__name__)
+
+# Keep a profile of schedule generations slower than this (0 disables profiling)
+PROFILE_SLOW_MS = int(os.environ.get("PROFILE_SLOW_MS", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+
+def make_profiler():
+    """pyinstrument (sampling, low overhead) when it is installed, cProfile otherwise"""
+    try:
+        from pyinstrument import Profiler
+        return Profiler(), "html"
+    except ImportError:
+        import cProfile
+        return cProfile.Profile(), "prof"
+
+
+def save_profile(profiler, kind, name):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}.{kind}")
+    if kind == "html":
+        with open(path, "w") as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.dump_stats(path)
+    return path
+
+
+@contextmanager
+def profile_if_slow(name, threshold_ms=None):
+    """Profile the block and keep the profile only when it took longer than threshold_ms.
+
+    Only the calling thread is profiled, so RL rollouts in worker processes
+    show up as time spent waiting on them.
+    """
+    threshold_ms = PROFILE_SLOW_MS if threshold_ms is None else threshold_ms
+    if not threshold_ms:
+        yield
+        return
+
+    profiler, kind = make_profiler()
+    start = time.perf_counter()
+    if kind == "html":
+        profiler.start()
+    else:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if kind == "html":
+            profiler.stop()
+        else:
+            profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > threshold_ms:
+            path = save_profile(profiler, kind, f"{name}-{int(time.time() * 1000)}-{int(elapsed_ms)}ms")
+            slow_profiles_total.inc()
+            logger.warning("%s took %.0f ms, profile saved to %s", name, elapsed_ms, path)
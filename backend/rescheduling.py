@@ -0,0 +1,193 @@
+from collections import Counter
+from statistics import mean
+
+import pandas as pd
+from sqlmodel import Session, select, delete
+
+from backend.analytics import refresh_workload
+from backend.cache import schedule_cache
+from backend.database import run_write
+from backend.models import Schedule, Defense, PanelAssignment, LecturerUnavailability
+from backend.scheduling import PANEL_ROLES, store_assignments
+from backend.verification import stored_expertise
+from rl_impelementation.availability import date_key, time_range
+from rl_impelementation.interval_index import to_seconds
+from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+
+
+class RescheduleError(ValueError):
+    """Edits that cannot be applied to the schedule (unknown defense, unknown lecturer, ...)"""
+
+
+class ScheduleChangedError(RuntimeError):
+    """The schedule was edited by another request while these edits were solved"""
+
+
+def scheduler_panel(row: dict) -> dict:
+    """panelAssignment of a response row as {scheduler role: lecturer id}"""
+    return {f"{role}_id": row["panelAssignment"].get(key) for key, role in PANEL_ROLES.items()}
+
+
+def apply_edits(rows: dict, edits: list, lecturer_expertise: dict, absences: list):
+    """Apply the edits to rows ({studentId: response row}), adding new absences to
+    absences as (lecturer id, date, time) tuples.
+
+    Returns the studentIds that need a new panel, the removed studentIds and the
+    previous panel ({scheduler role: lecturer id}) of every edited defense that had one.
+    """
+    known_fields = {field for expertise in lecturer_expertise.values() for field in expertise}
+    affected, removed, previous = set(), set(), {}
+
+    def check_time(time):
+        if to_seconds(time) is None:
+            raise RescheduleError(f"Unreadable time: {time}")
+
+    def existing(student_id):
+        if student_id not in rows:
+            raise RescheduleError(f"No defense for studentId {student_id}")
+        row = rows[student_id]
+        previous.setdefault(student_id, scheduler_panel(row))
+        return row
+
+    for edit in edits:
+        if edit.op == "add":
+            defense = edit.defense
+            if defense.studentId in rows:
+                raise RescheduleError(f"studentId {defense.studentId} already has a defense")
+            if defense.field not in known_fields:
+                raise RescheduleError(f"No lecturer has expertise in: {defense.field}")
+            check_time(defense.time)
+            rows[defense.studentId] = {
+                **defense.model_dump(),
+                "panelAssignment": {key: None for key in PANEL_ROLES},
+            }
+            affected.add(defense.studentId)
+            removed.discard(defense.studentId)
+
+        elif edit.op == "remove":
+            existing(edit.studentId)
+            del rows[edit.studentId]
+            affected.discard(edit.studentId)
+            removed.add(edit.studentId)
+
+        elif edit.op == "move":
+            row = existing(edit.studentId)
+            if edit.time is not None:
+                check_time(edit.time)
+            for key in ("date", "time", "room"):
+                if getattr(edit, key) is not None:
+                    row[key] = getattr(edit, key)
+            affected.add(edit.studentId)
+
+        elif edit.op == "unavailable":
+            if edit.lecturerId not in lecturer_expertise:
+                raise RescheduleError(f"Unknown lecturer {edit.lecturerId}")
+            try:
+                span = time_range(edit.time)
+            except ValueError:
+                raise RescheduleError(f"Unreadable time: {edit.time}")
+            absences.append((edit.lecturerId, date_key(edit.date), edit.time))
+            for student_id, row in rows.items():
+                if (date_key(row["date"]) == date_key(edit.date)
+                        and (span is None or span[0] <= to_seconds(row["time"]) < span[1])
+                        and edit.lecturerId in row["panelAssignment"].values()):
+                    existing(student_id)
+                    affected.add(student_id)
+
+    return affected, removed, previous
+
+
+def reschedule(session: Session, schedule: Schedule, edits: list):
+    """Apply edits to a stored schedule and solve again only the defenses they touch.
+
+    The workload of every other panel is loaded into a ThesisPanelSchedulerFinal,
+    so the limits of a full run still hold. A moved or affected defense keeps each
+    of its lecturers that is still available. Returns the new response body and
+    the studentIds that got a new panel.
+    """
+    lecturer_expertise = stored_expertise(session, schedule.id)
+    if lecturer_expertise is None:
+        raise RescheduleError("This schedule was stored without its lecturer expertise; generate it again to edit it")
+
+    original = schedule.schedule
+    rows = {row["studentId"]: dict(row) for row in original["schedule"]}
+    if len(rows) != len(original["schedule"]):
+        raise RescheduleError("studentId is not unique in this schedule")
+
+    # Absences uploaded with the schedule and from earlier edits
+    stored_absences = [tuple(absence) for absence in session.exec(
+        select(LecturerUnavailability.lecturer_id, LecturerUnavailability.date, LecturerUnavailability.time)
+        .where(LecturerUnavailability.schedule_id == schedule.id)
+    )]
+    absences = []
+    affected, removed, previous = apply_edits(rows, edits, lecturer_expertise, absences)
+    stored = set(stored_absences)
+    new_absences = [absence for absence in dict.fromkeys(absences) if absence not in stored]
+
+    scheduler = ThesisPanelSchedulerFinal(
+        pd.DataFrame({"bidang": [row["field"] for row in rows.values()]}), lecturer_expertise,
+        absences=stored_absences + new_absences,
+    )
+    scheduler.load_assignments(
+        (lecturer_id, role, row["date"], row["time"])
+        for student_id, row in rows.items() if student_id not in affected
+        for role, lecturer_id in scheduler_panel(row).items() if lecturer_id is not None
+    )
+
+    for student_id in sorted(affected, key=lambda sid: (rows[sid]["date"], rows[sid]["time"])):
+        row = rows[student_id]
+        defense = {"date": row["date"], "time": row["time"], "bidang": row["field"]}
+        panel = scheduler.assign_panel(defense, keep=previous.get(student_id))
+        row["panelAssignment"] = {key: panel[f"{role}_id"] for key, role in PANEL_ROLES.items()}
+
+    formatted_schedule = sorted(rows.values(), key=lambda row: (row["date"], row["time"]))
+    workload_summary = dict(Counter(
+        lecturer_id for row in formatted_schedule
+        for lecturer_id in row["panelAssignment"].values() if lecturer_id is not None
+    ).most_common())
+
+    response = {
+        **original,
+        "schedule": formatted_schedule,
+        "analysis": {**original.get("analysis", {}), "workload": workload_summary},
+        "total_schedule": len(formatted_schedule),
+        "total_dosen": len(workload_summary),
+        "avg_dosen": mean(workload_summary.values()) if workload_summary else 0,
+        "unique_fields": len(set(row["field"] for row in formatted_schedule)),
+    }
+    new_unavailable = [
+        LecturerUnavailability(schedule_id=schedule.id, lecturer_id=lecturer_id, date=date, time=time)
+        for lecturer_id, date, time in new_absences
+    ]
+    changed_ids = list(affected | removed)
+
+    def write(write_session: Session):
+        stored = write_session.get(Schedule, schedule.id)
+        if stored is None or stored.schedule != original:
+            raise ScheduleChangedError(f"Schedule {schedule.id} was changed by another request")
+
+        stored.schedule = response
+        stored.total_schedule = response["total_schedule"]
+        stored.total_dosen = response["total_dosen"]
+        stored.avg_dosen = response["avg_dosen"]
+        write_session.add(stored)
+
+        defense_ids = select(Defense.id).where(Defense.schedule_id == schedule.id,
+                                               Defense.student_id.in_(changed_ids))
+        write_session.exec(delete(PanelAssignment).where(PanelAssignment.defense_id.in_(defense_ids)))
+        write_session.exec(delete(Defense).where(Defense.schedule_id == schedule.id,
+                                                 Defense.student_id.in_(changed_ids)))
+        store_assignments(write_session, schedule.id, [rows[student_id] for student_id in changed_ids
+                                                        if student_id in rows])
+        refresh_workload(write_session, schedule.id)
+        write_session.add_all(new_unavailable)
+
+        # The cached uploads no longer describe this schedule
+        schedule_cache.invalidate(write_session, schedule.id)
+
+    run_write(write)
+
+    # End this session's read transaction so later reads see the edit
+    session.commit()
+
+    return response, sorted(affected)
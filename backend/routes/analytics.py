@@ -0,0 +1,49 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from fastapi.params import Query
+from sqlmodel import Session
+
+from backend.analytics import WorkloadFilters, lecturer_totals, period_totals, schedule_balance
+from backend.database import get_session
+from backend.schemas import LecturerWorkloadTotal, PeriodWorkloadTotal, ScheduleBalancePage
+
+
+router = APIRouter()
+
+# All analytics read the lecturer_workload summary with SQL aggregates, never the schedule JSON
+
+
+@router.get("/api/v1/analytics/lecturers", response_model=list[LecturerWorkloadTotal])
+def read_lecturer_workload(
+    filters: WorkloadFilters = Depends(),
+    offset: int = 0,
+    limit: int = Query(default=100, le=1000),
+    session: Session = Depends(get_session),
+):
+    return lecturer_totals(session, filters, limit, offset)
+
+
+@router.get("/api/v1/analytics/periods", response_model=list[PeriodWorkloadTotal])
+def read_period_workload(
+    filters: WorkloadFilters = Depends(),
+    period: Literal["day", "month", "year"] = Query(default="month"),
+    offset: int = 0,
+    limit: int = Query(default=100, le=1000),
+    session: Session = Depends(get_session),
+):
+    return period_totals(session, filters, period, limit, offset)
+
+
+@router.get("/api/v1/analytics/balance", response_model=ScheduleBalancePage)
+def read_schedule_balance(
+    filters: WorkloadFilters = Depends(),
+    after_id: int | None = None,
+    limit: int = Query(default=100, le=1000),
+    session: Session = Depends(get_session),
+) -> ScheduleBalancePage:
+    items = schedule_balance(session, filters, limit, after_id)
+    return ScheduleBalancePage(
+        items=items,
+        next_after_id=items[-1]["scheduleId"] if len(items) == limit else None,
+    )
@@ -0,0 +1,91 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, File
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from backend.database import get_session, run_write
+from backend.jobs import job_runner, QueueFullError
+from backend.models import Schedule, ScheduleJob
+from backend.schemas import JobResponse, ResponseModel
+from backend.scheduling import ScheduleParams
+
+
+router = APIRouter()
+
+
+def to_job_response(job: ScheduleJob) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        status=job.status,
+        schedule_id=job.schedule_id,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/api/v1/schedule/jobs", response_model=JobResponse, status_code=202)
+def submit_schedule_job(dosen_file: UploadFile = File(...),
+                        jadwal_file: UploadFile = File(...),
+                        availability_file: UploadFile | None = File(default=None),
+                        params: ScheduleParams = Depends()) -> JobResponse:
+    try:
+        job_runner.reserve()
+    except QueueFullError:
+        raise HTTPException(status_code=429, detail="Too many scheduling jobs queued, try again later",
+                            headers={"Retry-After": "30"})
+
+    # The slot is the runner's once the job is submitted; until then any failure gives it back
+    submitted = False
+    try:
+        job = ScheduleJob(params=asdict(params),
+                          dosen_file=dosen_file.file.read(),
+                          jadwal_file=jadwal_file.file.read(),
+                          availability_file=availability_file.file.read() if availability_file is not None else None)
+
+        def store(write_session: Session):
+            write_session.add(job)
+            write_session.flush()
+            return job
+
+        job = run_write(store)
+        job_runner.submit(job.id)
+        submitted = True
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Database error")
+    finally:
+        if not submitted:
+            job_runner.release()
+
+    return to_job_response(job)
+
+
+@router.get("/api/v1/schedule/jobs/{id}", response_model=JobResponse)
+def get_schedule_job(
+    id: int,
+    session: Session = Depends(get_session),
+) -> JobResponse:
+    job = session.get(ScheduleJob, id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return to_job_response(job)
+
+
+@router.get("/api/v1/schedule/jobs/{id}/result", response_model=ResponseModel)
+def get_schedule_job_result(
+    id: int,
+    session: Session = Depends(get_session),
+):
+    job = session.get(ScheduleJob, id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    return session.get(Schedule, job.schedule_id).schedule
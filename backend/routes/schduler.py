@@ -1,23 +1,78 @@
-import io
-from itertools import count
-from statistics import mean
-from typing import Annotated, List
+from typing import Literal
 
-from fastapi import APIRouter, UploadFile, HTTPException, Depends, File
-import pandas as pd
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, File, Form, Response
+from fastapi.responses import StreamingResponse
 from fastapi.params import Query
 from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session, select
 
+from backend.batch import BatchError, read_archive, read_uploads, run_batch
 from backend.database import get_session
-from backend.models import Schedule
-from backend.schemas import ResponseModel, ScheduleResponse
-from rl_impelementation.thesis_defense_scheduler import ThesisDefenseScheduler
-from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+from backend.metrics import server_timing
+from backend.profiling import profile_if_slow
+from backend.models import Schedule, ScheduleExpertise
+from backend.rescheduling import RescheduleError, ScheduleChangedError, reschedule
+from backend.schemas import ResponseModel, ScheduleResponse, VerificationResponse, ScheduleSummary, \
+    ScheduleSummaryPage, ScheduleEditRequest, RescheduleResponse, BatchResponse
+from backend.scheduling import ScheduleParams, build_schedule
+from backend.streaming import ScheduleStream, EXPORTERS, EXPORT_MEDIA_TYPES
+from backend.verification import verify_response, verify_stored_schedule
+from rl_impelementation.ingestion import IngestionError
+from rl_impelementation.timing import PhaseTimer
 
 
 router = APIRouter()
 
+# Declared before /api/v1/schedules/{id} so "verify" is not read as an id
+@router.get("/api/v1/schedules/verify", response_model=list[VerificationResponse])
+def verify_schedules(
+    session: Session = Depends(get_session),
+    offset: int = 0,
+    limit: int = Query(default=100, le=1000),
+    only_invalid: bool = False,
+):
+    results = session.exec(select(Schedule).order_by(Schedule.id).offset(offset).limit(limit)).all()
+
+    expertise_rows = session.exec(
+        select(ScheduleExpertise).where(ScheduleExpertise.schedule_id.in_([row.id for row in results]))
+    ).all()
+    expertise = {
+        row.schedule_id: {lecturer_id: fields for lecturer_id, fields in row.lecturer_expertise}
+        for row in expertise_rows
+    }
+
+    verifications = [
+        VerificationResponse(id=row.id, **verify_response(row.schedule, expertise.get(row.id)))
+        for row in results
+    ]
+
+    if only_invalid:
+        verifications = [verification for verification in verifications if not verification.valid]
+
+    return verifications
+
+@router.get("/api/v1/schedules/summaries", response_model=ScheduleSummaryPage)
+def read_schedule_summaries(
+    session: Session = Depends(get_session),
+    after_id: int | None = None,
+    limit: int = Query(default=100, le=1000),
+) -> ScheduleSummaryPage:
+    # Keyset pagination on the primary key, without loading the schedule JSON
+    query = select(Schedule.id, Schedule.total_schedule, Schedule.total_dosen, Schedule.avg_dosen)
+    if after_id is not None:
+        query = query.where(Schedule.id > after_id)
+    rows = session.exec(query.order_by(Schedule.id).limit(limit)).all()
+
+    items = [
+        ScheduleSummary(id=id, total_schedule=total_schedule, total_dosen=total_dosen, avg_dosen=avg_dosen)
+        for id, total_schedule, total_dosen, avg_dosen in rows
+    ]
+
+    return ScheduleSummaryPage(
+        items=items,
+        next_after_id=items[-1].id if len(items) == limit else None,
+    )
+
 @router.get("/api/v1/schedules/{id}", response_model=ScheduleResponse)
 def get_schedule_by_id(
     id: int,
@@ -34,15 +89,21 @@ def get_schedule_by_id(
         total_schedule=schedule.total_schedule,
         total_dosen=schedule.total_dosen,
         avg_dosen=schedule.avg_dosen,
+        timings=schedule.timings,
     )
 @router.get("/api/v1/schedules", response_model=list[ScheduleResponse])
 def read_schedules(
     session: Session = Depends(get_session),
     offset: int = 0,
     limit: int = Query(default=100, le=100),
+    after_id: int | None = None,
 ):
 
-    results = session.exec(select(Schedule).offset(offset).limit(limit)).all()
+    if after_id is not None:
+        query = select(Schedule).where(Schedule.id > after_id).order_by(Schedule.id)
+    else:
+        query = select(Schedule).offset(offset)
+    results = session.exec(query.limit(limit)).all()
 
     schedules = [
         ScheduleResponse(
@@ -54,89 +115,146 @@ def read_schedules(
 
     return schedules
 
-@router.post("/api/v1/schedule", response_model=ResponseModel)
-def generate_schedule(dosen_file: UploadFile = File(...),
-                      jadwal_file: UploadFile = File(...),
-                      session: Session = Depends(get_session)):
-    try:
-        dosen_content = dosen_file.file.read()
-        jadwal_content = jadwal_file.file.read()
-
-        dosen_df = pd.read_excel(io.BytesIO(dosen_content))
-        jadwal_df = pd.read_excel(io.BytesIO(jadwal_content))
-
-        lecturer_expertise = {}
-        for _, row in dosen_df.iterrows():
-            lecturer_expertise[row['id']] = [field.strip() for field in row['keahlian'].split(',')]
-
-        scheduler_defense = ThesisDefenseScheduler(jadwal_df, lecturer_expertise)
-
-        best_schedule, best_reward = scheduler_defense.schedule_defenses(jadwal_df, lecturer_expertise,max_iterations=500)
-        analysis = scheduler_defense.analyze_schedule(best_schedule)
+@router.get("/api/v1/schedules/{id}/verify", response_model=VerificationResponse)
+def verify_schedule_by_id(
+    id: int,
+    session: Session = Depends(get_session),
+) -> VerificationResponse:
+    schedule = session.get(Schedule, id)
 
-        scheduler = ThesisPanelSchedulerFinal(jadwal_df, lecturer_expertise)
-        final_schedule = scheduler.create_schedule()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
 
-        workload_summary = {}
-        workload = final_schedule[['penguji1_id', 'penguji2_id', 'pembimbing1_id', 'pembimbing2_id']].stack()
-        workload_counts = workload.value_counts()
-        for lecturer_id, workload in workload_counts.items():
-            workload_summary[lecturer_id] = workload
+    return VerificationResponse(id=schedule.id, **verify_stored_schedule(session, schedule))
 
-        formatted_schedule = []
+@router.get("/api/v1/schedules/{id}/export")
+def export_schedule(
+    id: int,
+    format: Literal["csv", "xlsx"] = Query(default="csv"),
+    session: Session = Depends(get_session),
+):
+    # Only the id is read here; the rows are streamed from the defense table in chunks
+    if session.exec(select(Schedule.id).where(Schedule.id == id)).first() is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
 
-        for _, row in final_schedule.iterrows():
-            panel_assignment = {
-                "penguji1Id": int(row["penguji1_id"]) if row["penguji1_id"] else None,
-                "penguji2Id": int(row["penguji2_id"]) if row["penguji2_id"] else None,
-                "pembimbing1Id": int(row["pembimbing1_id"]) if row["pembimbing1_id"] else None,
-                "pembimbing2Id": int(row["pembimbing2_id"]) if row["pembimbing2_id"] else None,
-            }
-            formatted_schedule.append({
-                "date": str(row["tanggal"]),
-                "time": str(row["waktu"]),
-                "room": row["ruang"],
-                "studentId": int(row["mahasiswa_id"]),
-                "thesisTitle": row["judul"],
-                "field": row["bidang"],
-                "panelAssignment": panel_assignment,
-            })
+    return StreamingResponse(
+        EXPORTERS[format](id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="schedule-{id}.{format}"'},
+    )
 
-        unique_fields = len(set(row["field"] for row in formatted_schedule))
+@router.patch("/api/v1/schedules/{id}", response_model=RescheduleResponse)
+def edit_schedule(
+    id: int,
+    request: ScheduleEditRequest,
+    verify: bool = Query(default=False),
+    session: Session = Depends(get_session),
+):
+    schedule = session.get(Schedule, id)
 
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
 
-        response = {
-            "schedule": formatted_schedule,
-            "reward": float(best_reward),
-            "analysis": {
-                "workload": workload_summary,
-                "expertiseRatio": float(analysis["expertise_ratio"]),
-                "balanceScore": float(analysis.get("balanceScore", 1.0)),
-            },
-            "total_schedule" : len(formatted_schedule),
-            "total_dosen" : len(workload_summary),
-            "avg_dosen" : mean(list(workload_summary.values())),
-            "unique_fields": unique_fields  # Include unique field count
+    try:
+        result, changed = reschedule(session, schedule, request.edits)
+    except RescheduleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ScheduleChangedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except SQLAlchemyError:
+        session.rollback()
+        raise HTTPException(status_code=500, detail="Database error")
 
-        }
+    verification = None
+    if verify:
+        verification = verify_stored_schedule(session, session.get(Schedule, id))
 
+    return RescheduleResponse(id=id, changed=changed, verification=verification, **{
+        key: result[key] for key in ("schedule", "analysis", "total_schedule", "total_dosen", "avg_dosen")
+    })
 
+@router.post("/api/v1/schedule", response_model=ResponseModel)
+def generate_schedule(response: Response,
+                      dosen_file: UploadFile = File(...),
+                      jadwal_file: UploadFile = File(...),
+                      availability_file: UploadFile | None = File(default=None),
+                      params: ScheduleParams = Depends(),
+                      use_cache: bool = Query(default=True),
+                      verify: bool = Query(default=False),
+                      stream: bool = Query(default=False),
+                      session: Session = Depends(get_session)):
+    if stream:
+        return stream_schedule(dosen_file, jadwal_file, availability_file, params, use_cache, verify)
 
-        new_schedule = Schedule(schedule=response,
-                                total_schedule=len(formatted_schedule),
-                                total_dosen=len(workload_summary),
-                                avg_dosen=mean(list(workload_summary.values())),
+    timer = PhaseTimer()
+    try:
+        # UploadFile spools large uploads to disk; the pipeline streams from it
+        with profile_if_slow("generate_schedule"):
+            result, new_schedule, cache_hit = build_schedule(
+                dosen_file.file, jadwal_file.file, params, session, use_cache, timer,
+                availability_file=availability_file.file if availability_file is not None else None,
+            )
+        response.headers["X-Schedule-Cache"] = "hit" if cache_hit else "miss"
+        response.headers["Server-Timing"] = server_timing(timer)
+
+        if verify:
+            result = {**result, "verification": verify_stored_schedule(session, new_schedule)}
+
+        return result
+
+    except IngestionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SQLAlchemyError:
+        session.rollback()
+        raise HTTPException(status_code=500, detail="Database error")
 
 
-                                )
-        session.add(new_schedule)
-        session.commit()
-        session.refresh(new_schedule)
+@router.post("/api/v1/schedule/batch", response_model=BatchResponse)
+def generate_schedule_batch(archive: UploadFile | None = File(default=None),
+                            files: list[UploadFile] | None = File(default=None),
+                            manifest: str | None = Form(default=None),
+                            params: ScheduleParams = Depends(),
+                            use_cache: bool = Query(default=True)):
+    """Schedule many dosen/jadwal pairs in one request.
+
+    Send either a zip archive, or the files themselves with an optional
+    manifest (JSON). Without a manifest, files are paired by name:
+    <name>/dosen.xlsx with <name>/jadwal.xlsx, or <name>_dosen.csv with
+    <name>_jadwal.csv, each optionally with an availability file named the
+    same way. The workers parameter is the budget for the whole
+    batch. Every dataset gets its own status; new schedules are stored in
+    one transaction.
+    """
+    if (archive is None) == (not files):
+        raise HTTPException(status_code=422, detail="Send either an archive or files")
+    try:
+        datasets = read_archive(archive.file) if archive is not None else read_uploads(files, manifest)
+    except BatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    with profile_if_slow("generate_schedule_batch"):
+        results, timings = run_batch(datasets, params, use_cache)
+
+    return BatchResponse(
+        datasets=results,
+        done=sum(result["status"] == "done" for result in results),
+        cached=sum(result["status"] == "cached" for result in results),
+        failed=sum(result["status"] == "failed" for result in results),
+        timings=timings,
+    )
 
-        return response
 
-    except SQLAlchemyError as e:
-        session.rollback()
+def stream_schedule(dosen_file: UploadFile, jadwal_file: UploadFile, availability_file: UploadFile | None,
+                    params: ScheduleParams, use_cache: bool, verify: bool):
+    """NDJSON response: one schedule row per line as panels are assigned, then a summary line"""
+    # The stream keeps spooled copies of the uploads, which are closed once the endpoint returns
+    schedule_stream = ScheduleStream(dosen_file.file, jadwal_file.file, params, use_cache, verify,
+                                     availability_file.file if availability_file is not None else None)
+    try:
+        first_event = schedule_stream.start()
+    except IngestionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Database error")
 
-
+    return StreamingResponse(schedule_stream.lines(first_event), media_type="application/x-ndjson")
@@ -0,0 +1,360 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass, fields
+from functools import partial
+import os
+from typing import BinaryIO, Callable, Literal
+from statistics import mean
+
+import pandas as pd
+from fastapi import Query
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
+
+from backend.analytics import refresh_workload
+from backend.cache import cache_key, schedule_cache
+from backend.database import engine, run_write
+from backend.metrics import observe_schedule
+from backend.models import Schedule, FacultyQTable, ScheduleExpertise, Defense, PanelAssignment, \
+    LecturerUnavailability
+from rl_impelementation.availability import date_key
+from rl_impelementation.components import solve_components
+from rl_impelementation.panel_rules import ROLE_COLUMNS
+from rl_impelementation.portfolio import solve_portfolio
+from rl_impelementation.ingestion import load_inputs, load_availability
+from rl_impelementation.interval_index import to_seconds
+from rl_impelementation.q_table import QTable, to_builtin
+from rl_impelementation.thesis_defense_scheduler import rollout_seed
+from rl_impelementation.timing import PhaseTimer
+
+# Number of processes used for the RL rollouts when the request does not say otherwise
+SCHEDULER_WORKERS = int(os.environ.get("SCHEDULER_WORKERS", 1))
+# Defenses given their sort keys per transaction of the startup backfill
+SORT_KEY_BATCH = 1000
+
+
+@dataclass
+class ScheduleParams:
+    """Solver parameters shared by the schedule endpoints (read from the query string)"""
+    workers: int = Query(default=SCHEDULER_WORKERS, ge=1, le=os.cpu_count() or 1)
+    seed: int | None = Query(default=None, ge=0)
+    faculty: str | None = Query(default=None, min_length=1)
+    max_iterations: int = Query(default=500, ge=1, le=5000)
+    patience: int | None = Query(default=None, ge=1)
+    min_improvement: float = Query(default=0.0, ge=0.0)
+    deadline_ms: int | None = Query(default=None, ge=1)
+    # "rl": RL search plus greedy panels, "flow": all panels at once as a min-cost flow,
+    # "portfolio": every engine raced within deadline_ms, the best schedule wins
+    engine: Literal["rl", "flow", "portfolio"] = Query(default="rl")
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        """Parameters stored as a dict (e.g. with a job), which may predate some of them.
+
+        Missing parameters get their default value rather than the Query
+        object the dataclass defaults are; unknown keys are dropped.
+        """
+        defaults = {field.name: field.default.default for field in fields(cls)}
+        return cls(**{**defaults, **{key: value for key, value in values.items() if key in defaults}})
+
+
+# panelAssignment keys in the response and their role names in panel_assignment
+PANEL_ROLES = {
+    "penguji1Id": "penguji1",
+    "penguji2Id": "penguji2",
+    "pembimbing1Id": "pembimbing1",
+    "pembimbing2Id": "pembimbing2",
+}
+
+
+def sort_keys(date, time) -> dict:
+    """The day and start columns of a defense row"""
+    start = to_seconds(time)
+    return {"day": date_key(date), "start": -1 if start is None else start}
+
+
+def store_assignments(session: Session, schedule_id: int, formatted_schedule: list):
+    """Bulk insert the defense and panel_assignment rows of a schedule"""
+    if not formatted_schedule:
+        return
+
+    defense_ids = session.scalars(
+        insert(Defense).returning(Defense.id, sort_by_parameter_order=True),
+        [
+            {
+                "schedule_id": schedule_id,
+                "date": row["date"],
+                "time": row["time"],
+                "room": None if row["room"] is None else str(row["room"]),
+                "student_id": row["studentId"],
+                "thesis_title": None if row["thesisTitle"] is None else str(row["thesisTitle"]),
+                "field": str(row["field"]),
+                **sort_keys(row["date"], row["time"]),
+            }
+            for row in formatted_schedule
+        ],
+    ).all()
+
+    assignments = [
+        {"defense_id": defense_id, "schedule_id": schedule_id, "lecturer_id": lecturer_id, "role": role}
+        for defense_id, row in zip(defense_ids, formatted_schedule)
+        for key, role in PANEL_ROLES.items()
+        if (lecturer_id := row["panelAssignment"][key]) is not None
+    ]
+    if assignments:
+        session.execute(insert(PanelAssignment), assignments)
+
+
+def backfill_sort_keys():
+    """Give the defenses stored before the day and start columns existed their sort keys (at startup)"""
+    while True:
+        with Session(engine) as session:
+            defenses = session.exec(
+                select(Defense.id, Defense.date, Defense.time).where(Defense.start.is_(None)).limit(SORT_KEY_BATCH)
+            ).all()
+        if not defenses:
+            return
+        keys = [{"id": defense_id, **sort_keys(date, time)} for defense_id, date, time in defenses]
+        run_write(lambda write_session: write_session.execute(update(Defense), keys))
+
+
+def format_row(row: dict) -> dict:
+    """One schedule row (as yielded by iter_schedule) in the response format"""
+    return {
+        "date": str(row["tanggal"]),
+        "time": str(row["waktu"]),
+        "room": to_builtin(row["ruang"]),
+        "studentId": int(row["mahasiswa_id"]),
+        "thesisTitle": to_builtin(row["judul"]),
+        "field": to_builtin(row["bidang"]),
+        "panelAssignment": {
+            key: None if pd.isna(row[f"{role}_id"]) else int(row[f"{role}_id"])
+            for key, role in PANEL_ROLES.items()
+        },
+    }
+
+
+def format_schedule(final_schedule) -> list:
+    """All rows of a schedule DataFrame in the response format, converted column by column"""
+    if final_schedule.empty:
+        return []
+
+    def column(name):
+        # tolist() turns NumPy scalars into plain Python values
+        return final_schedule[name].tolist()
+
+    def lecturer_column(name):
+        # Roles left empty are None or NaN depending on the column dtype
+        ids = final_schedule[name].astype("Int64").astype(object)
+        return ids.where(ids.notna(), None).tolist()
+
+    panels = [lecturer_column(f"{role}_id") for role in PANEL_ROLES.values()]
+    keys = list(PANEL_ROLES)
+    return [
+        {
+            "date": date,
+            "time": time_,
+            "room": room,
+            "studentId": student_id,
+            "thesisTitle": title,
+            "field": field,
+            "panelAssignment": dict(zip(keys, panel)),
+        }
+        for date, time_, room, student_id, title, field, *panel in zip(
+            # str() of every value, as format_row: astype(str) would drop the midnight time of Excel dates
+            final_schedule["tanggal"].map(str).tolist(),
+            final_schedule["waktu"].map(str).tolist(),
+            column("ruang"),
+            final_schedule["mahasiswa_id"].astype("int64").tolist(),
+            column("judul"),
+            column("bidang"),
+            *panels,
+        )
+    ]
+
+
+def format_response(final_schedule, best_reward, iterations, analysis) -> dict:
+    """Response body for a ThesisPanelSchedulerFinal schedule"""
+    workload_summary = {}
+    workload = final_schedule[ROLE_COLUMNS].stack()
+    workload_counts = workload.value_counts()
+    for lecturer_id, workload in workload_counts.items():
+        workload_summary[int(lecturer_id)] = int(workload)
+
+    formatted_schedule = format_schedule(final_schedule)
+
+    unique_fields = int(final_schedule["bidang"].nunique())
+
+
+    response = {
+        "schedule": formatted_schedule,
+        "reward": None if best_reward is None else float(best_reward),
+        "iterations": iterations,
+        "analysis": {
+            "workload": workload_summary,
+            "expertiseRatio": float(analysis["expertise_ratio"]),
+            "balanceScore": float(analysis.get("balanceScore", 1.0)),
+            **({"portfolio": analysis["portfolio"]} if "portfolio" in analysis else {}),
+        },
+        "total_schedule" : len(formatted_schedule),
+        "total_dosen" : len(workload_summary),
+        "avg_dosen" : mean(list(workload_summary.values())),
+        "unique_fields": unique_fields  # Include unique field count
+
+    }
+
+    return response
+
+
+@dataclass
+class PendingSchedule:
+    """A solved schedule that is not stored yet; write(session) adds its rows and returns the Schedule"""
+    key: str
+    response: dict
+    iterations: int
+    timer: PhaseTimer
+    write: Callable[[Session], Schedule]
+
+    def stored(self, new_schedule: Schedule):
+        """Call once the transaction that ran write() has committed"""
+        schedule_cache.remember(self.key, new_schedule)
+        observe_schedule(self.timer, self.iterations, cache_hit=False)
+
+
+def solve_schedule(dosen_file: BinaryIO, jadwal_file: BinaryIO, params: ScheduleParams, session: Session,
+                   use_cache: bool = True, timer: PhaseTimer | None = None,
+                   on_row: Callable[[dict], None] | None = None, solver_pool: Executor | None = None,
+                   availability_file: BinaryIO | None = None):
+    """build_schedule up to the database write.
+
+    Returns (response, Schedule, None) on a cache hit and (response, None,
+    PendingSchedule) otherwise. With a solver_pool, the solving itself runs
+    in one of its processes (without on_row), so several uploads can be
+    solved side by side.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+
+    with timer.phase("read"):
+        key = cache_key(dosen_file, jadwal_file, params, availability_file)
+    if use_cache:
+        with timer.phase("cache"):
+            cached = schedule_cache.get(session, key)
+        if cached is not None:
+            if on_row is not None:
+                for row in cached.schedule["schedule"]:
+                    on_row(row)
+            observe_schedule(timer, 0, cache_hit=True)
+            return cached.schedule, cached, None
+
+    jadwal_df, lecturer_expertise = load_inputs(dosen_file, jadwal_file, timer)
+    absences = None
+    if availability_file is not None:
+        absences = load_availability(availability_file, jadwal_df, lecturer_expertise, timer)
+
+    # Warm-start from the Q-table learned on this faculty's previous runs
+    q_table_row = None
+    if params.faculty is not None and params.engine in ("rl", "portfolio"):
+        with timer.phase("compile"):
+            q_table_row = session.exec(select(FacultyQTable).where(FacultyQTable.faculty == params.faculty)).first()
+
+    options = dict(q_entries=q_table_row.q_values if q_table_row is not None else None,
+                   q_episodes=q_table_row.episodes if q_table_row is not None else 0,
+                   max_iterations=params.max_iterations, seed=params.seed, patience=params.patience,
+                   min_improvement=params.min_improvement, deadline_ms=params.deadline_ms, absences=absences)
+    if params.engine == "portfolio":
+        solve = solve_portfolio
+    else:
+        # Independent parts of the problem (e.g. departments) are solved separately, in parallel
+        solve = partial(solve_components, engine=params.engine)
+
+    if solver_pool is not None:
+        options["seed"] = rollout_seed(options["seed"])
+        with timer.phase("components"):
+            solved = solver_pool.submit(solve, jadwal_df, lecturer_expertise, n_workers=1, **options).result()
+    else:
+        solved = solve(jadwal_df, lecturer_expertise, n_workers=params.workers, timer=timer,
+                       on_row=None if on_row is None else lambda row: on_row(format_row(row)),
+                       **options)
+    iterations = solved["iterations"]
+    q_entries = solved["q_entries"]
+
+    with timer.phase("format"):
+        response = format_response(solved["final_schedule"], solved["best_reward"], iterations, solved["analysis"])
+        formatted_schedule = response["schedule"]
+        workload_summary = response["analysis"]["workload"]
+
+    def write(write_session: Session):
+        new_schedule = Schedule(schedule=response,
+                                total_schedule=len(formatted_schedule),
+                                total_dosen=len(workload_summary),
+                                avg_dosen=mean(list(workload_summary.values())),
+                                timings=timer.rounded(),
+                                )
+        write_session.add(new_schedule)
+        write_session.flush()
+        schedule_cache.put(write_session, key, new_schedule)
+        store_assignments(write_session, new_schedule.id, formatted_schedule)
+        refresh_workload(write_session, new_schedule.id)
+        write_session.add(ScheduleExpertise(
+            schedule_id=new_schedule.id,
+            lecturer_expertise=[[to_builtin(lid), expertise] for lid, expertise in lecturer_expertise.items()],
+        ))
+        # Kept so edits of this schedule honour the same absences
+        write_session.add_all(
+            LecturerUnavailability(schedule_id=new_schedule.id, lecturer_id=to_builtin(lecturer_id),
+                                   date=date, time=time)
+            for lecturer_id, date, time in absences or ()
+        )
+
+        if params.faculty is not None and q_entries is not None:
+            # The run only exports the entries of this upload, and other runs of the faculty may have
+            # stored theirs since it started: add what it learned to the stored table
+            base_entries, base_episodes = options["q_entries"] or [], options["q_episodes"]
+            q_table_row = write_session.exec(
+                select(FacultyQTable).where(FacultyQTable.faculty == params.faculty)
+            ).first() or FacultyQTable(faculty=params.faculty)
+            q_table_row.q_values = QTable.merge_entries(base_entries, [q_table_row.q_values or [], q_entries])
+            q_table_row.episodes = q_table_row.episodes + solved["q_episodes"] - base_episodes
+            write_session.add(q_table_row)
+
+        return new_schedule
+
+    return response, None, PendingSchedule(key, response, iterations, timer, write)
+
+
+def build_schedule(dosen_file: BinaryIO, jadwal_file: BinaryIO, params: ScheduleParams, session: Session,
+                   use_cache: bool = True, timer: PhaseTimer | None = None,
+                   on_row: Callable[[dict], None] | None = None, availability_file: BinaryIO | None = None):
+    """Run the full pipeline on the uploaded files and store the result.
+
+    The uploads are seekable binary files (Excel, CSV, JSON or Parquet).
+    Identical uploads with the same solver parameters return the stored
+    Schedule without solving again. Returns the response body, the Schedule
+    row and whether it came from the cache. Invalid uploads raise
+    IngestionError before any solving starts.
+
+    availability_file, if given, lists the dates and slots in which
+    lecturers cannot sit on a panel (see load_availability); the absences
+    are stored with the schedule, so later edits honour them too.
+
+    The time of each phase is added to timer (a new PhaseTimer if none is
+    given) and stored on the Schedule row, except for the final db_commit.
+
+    on_row, if given, receives every schedule row in the response format as
+    soon as its panel is assigned (all rows at once on a cache hit, and per
+    part when the problem splits into independent parts).
+    """
+    timer = timer if timer is not None else PhaseTimer()
+    response, cached, pending = solve_schedule(dosen_file, jadwal_file, params, session, use_cache, timer, on_row,
+                                               availability_file=availability_file)
+    if cached is not None:
+        return response, cached, True
+
+    with timer.phase("db_commit"):
+        # Writes go through run_write so concurrent generations share a transaction
+        new_schedule = run_write(pending.write)
+
+        # End this session's read transaction so later reads see the new rows
+        session.commit()
+
+    pending.stored(new_schedule)
+    return response, new_schedule, False
@@ -1,17 +1,170 @@
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Literal, Annotated, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ResponseModel(BaseModel):
     schedule:list
-    reward:float
+    reward:float | None  # None when no RL search ran (engine=flow)
+    iterations:int
     analysis:dict
     total_schedule:float
     total_dosen:float
     avg_dosen:float
+    verification:dict | None = None
 
 
 class ScheduleResponse(BaseModel):
     id: int
-    schedule: Dict[str, Any]
\ No newline at end of file
+    schedule: Dict[str, Any]
+    timings: Dict[str, float] | None = None
+
+
+class JobResponse(BaseModel):
+    id: int
+    status: str
+    schedule_id: int | None = None
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+class VerificationResponse(BaseModel):
+    id: int
+    total_assignments: int
+    empty_roles: int
+    expertise_violations: int | None
+    time_conflicts: int
+    gap_violations: int
+    daily_violations: int
+    workload_violations: int | None
+    valid: bool
+
+
+class ScheduleSummary(BaseModel):
+    id: int
+    total_schedule: int
+    total_dosen: int
+    avg_dosen: float
+
+
+class ScheduleSummaryPage(BaseModel):
+    items: list[ScheduleSummary]
+    next_after_id: int | None = None
+
+
+class DefenseInput(BaseModel):
+    date: str
+    time: str
+    room: str | None = None
+    studentId: int
+    thesisTitle: str | None = None
+    field: str
+
+
+class AddDefense(BaseModel):
+    op: Literal["add"]
+    defense: DefenseInput
+
+
+class RemoveDefense(BaseModel):
+    op: Literal["remove"]
+    studentId: int
+
+
+class MoveDefense(BaseModel):
+    op: Literal["move"]
+    studentId: int
+    date: str | None = None
+    time: str | None = None
+    room: str | None = None
+
+
+class LecturerUnavailable(BaseModel):
+    op: Literal["unavailable"]
+    lecturerId: int
+    date: str
+    time: str | None = None  # a time or range ("08:00 - 12:00"); the whole date when left out
+
+
+ScheduleEdit = Annotated[Union[AddDefense, RemoveDefense, MoveDefense, LecturerUnavailable], Field(discriminator="op")]
+
+
+class ScheduleEditRequest(BaseModel):
+    edits: list[ScheduleEdit] = Field(min_length=1)
+
+
+class RescheduleResponse(BaseModel):
+    id: int
+    schedule: list
+    analysis: dict
+    total_schedule: float
+    total_dosen: float
+    avg_dosen: float
+    changed: list[int]  # studentIds whose panel was solved again
+    verification: dict | None = None
+
+
+class BatchManifestEntry(BaseModel):
+    name: str | None = None  # defaults to the dosen file's directory
+    dosen: str  # path in the archive, or the filename of an uploaded file
+    jadwal: str
+    availability: str | None = None
+    faculty: str | None = None  # overrides the faculty query parameter for this dataset
+
+
+class BatchDatasetResult(BaseModel):
+    name: str
+    status: Literal["done", "cached", "failed"]
+    id: int | None = None
+    error: str | None = None
+    reward: float | None = None
+    iterations: int | None = None
+    total_schedule: float | None = None
+    total_dosen: float | None = None
+    avg_dosen: float | None = None
+    timings: Dict[str, float] | None = None
+
+
+class BatchResponse(BaseModel):
+    datasets: list[BatchDatasetResult]
+    done: int
+    cached: int
+    failed: int
+    timings: Dict[str, float]  # solve (all datasets, side by side) and db_commit (one transaction)
+
+
+class LecturerWorkloadTotal(BaseModel):
+    lecturerId: int
+    panels: int
+    examiner: int  # penguji1 and penguji2 roles
+    supervisor: int  # pembimbing1 and pembimbing2 roles
+    schedules: int  # stored schedules the lecturer has panels in
+    firstDate: str
+    lastDate: str
+
+
+class PeriodWorkloadTotal(BaseModel):
+    period: str  # YYYY-MM-DD, YYYY-MM or YYYY
+    panels: int
+    examiner: int
+    supervisor: int
+    lecturers: int
+    schedules: int
+
+
+class ScheduleBalance(BaseModel):
+    scheduleId: int
+    lecturers: int  # lecturers with at least one panel
+    panels: int
+    mean: float
+    std: float
+    min: int
+    max: int
+    balanceScore: float  # 1 / (1 + std)
+
+
+class ScheduleBalancePage(BaseModel):
+    items: list[ScheduleBalance]
+    next_after_id: int | None = None
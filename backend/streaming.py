@@ -0,0 +1,216 @@
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+
+from backend.database import engine
+from backend.models import Schedule, Defense, PanelAssignment
+from backend.profiling import profile_if_slow
+from backend.scheduling import ScheduleParams, PANEL_ROLES, build_schedule, sort_keys
+from backend.verification import verify_stored_schedule
+from rl_impelementation.q_table import to_builtin
+from rl_impelementation.timing import PhaseTimer
+
+# Defenses read from the database per export chunk (also bounds the IN (...) list of panel lookups)
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 1000))
+# Bytes per chunk when streaming a finished XLSX file; smaller files stay in memory while written
+EXPORT_XLSX_CHUNK_BYTES = 64 * 1024
+EXPORT_XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+# Uploads a stream keeps until it is done; larger ones go to disk (as UploadFile does)
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+
+EXPORT_COLUMNS = ["date", "time", "room", "studentId", "thesisTitle", "field", *PANEL_ROLES]
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def ndjson_line(value) -> str:
+    return json.dumps(value, default=to_builtin) + "\n"
+
+
+def spool_copy(source):
+    """A copy of a binary file that stays in memory up to UPLOAD_SPOOL_BYTES and is spooled to disk beyond"""
+    copy = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    shutil.copyfileobj(source, copy)
+    copy.seek(0)
+    return copy
+
+
+class ScheduleStream:
+    """Runs build_schedule on its own thread and hands out the rows as NDJSON.
+
+    Every schedule row is one line, written as soon as its panel is assigned.
+    The last line is {"summary": {...}} with the rest of the response body,
+    the schedule id, cache result and timings, or {"error": "..."} if the
+    generation failed after the first row.
+
+    The uploads are closed once the endpoint returns, before the stream is
+    done, so the stream works on spooled copies of them that it closes when
+    the generation ends.
+    """
+
+    def __init__(self, dosen_file, jadwal_file, params: ScheduleParams, use_cache: bool = True, verify: bool = False,
+                 availability_file=None):
+        self.dosen_file = spool_copy(dosen_file)
+        self.jadwal_file = spool_copy(jadwal_file)
+        self.availability_file = spool_copy(availability_file) if availability_file is not None else None
+        self.params = params
+        self.use_cache = use_cache
+        self.verify = verify
+        self.timer = PhaseTimer()
+        # Unbounded: a client that stops reading must not block the generation and its database write
+        self.events = queue.Queue()
+
+    def start(self):
+        """Start the generation and wait for its first event.
+
+        Errors before the first row (invalid uploads) are raised here, so the
+        caller can still answer with an error status instead of a stream.
+        """
+        threading.Thread(target=self.run, name="schedule-stream", daemon=True).start()
+        kind, payload = self.events.get()
+        if kind == "error":
+            raise payload
+        return kind, payload
+
+    def run(self):
+        try:
+            with Session(engine) as session, profile_if_slow("generate_schedule"):
+                result, new_schedule, cache_hit = build_schedule(
+                    self.dosen_file, self.jadwal_file, self.params, session, self.use_cache, self.timer,
+                    on_row=lambda row: self.events.put(("row", row)), availability_file=self.availability_file,
+                )
+                summary = {key: value for key, value in result.items() if key != "schedule"}
+                summary.update(id=new_schedule.id, cache="hit" if cache_hit else "miss", timings=self.timer.rounded())
+                if self.verify:
+                    summary["verification"] = verify_stored_schedule(session, new_schedule)
+            self.events.put(("summary", summary))
+        except Exception as e:
+            self.events.put(("error", e))
+        finally:
+            for f in (self.dosen_file, self.jadwal_file, self.availability_file):
+                if f is not None:
+                    f.close()
+
+    def lines(self, first_event):
+        """NDJSON text, starting with the event returned by start()"""
+        event = first_event
+        while True:
+            # Send whatever is already queued as one chunk rather than a chunk per row
+            chunk = []
+            while event is not None:
+                kind, payload = event
+                if kind == "error":
+                    chunk.append(ndjson_line({"error": f"{type(payload).__name__}: {payload}"}))
+                    yield "".join(chunk)
+                    return
+                chunk.append(ndjson_line({"summary": payload} if kind == "summary" else payload))
+                if kind == "summary":
+                    yield "".join(chunk)
+                    return
+                try:
+                    event = self.events.get_nowait()
+                except queue.Empty:
+                    event = None
+            yield "".join(chunk)
+            event = self.events.get()
+
+
+def legacy_frame(schedule: Schedule) -> pd.DataFrame:
+    """Export rows of a schedule stored before the defense table existed"""
+    rows = schedule.schedule.get("schedule", [])
+    frame = pd.json_normalize(rows)
+    frame.columns = [column.removeprefix("panelAssignment.") for column in frame.columns]
+    frame = frame.reindex(columns=EXPORT_COLUMNS)
+    frame[list(PANEL_ROLES)] = frame[list(PANEL_ROLES)].astype("Int64")
+    # In the order of the defense table exports
+    keys = [tuple(sort_keys(date, time).values()) for date, time in zip(frame["date"], frame["time"])]
+    return frame.iloc[sorted(range(len(frame)), key=keys.__getitem__)].reset_index(drop=True)
+
+
+def export_frames(schedule_id: int, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """The rows of a stored schedule as DataFrames of at most chunk_rows rows, in date and time order.
+
+    Reads the defense and panel_assignment tables with keyset pagination, so
+    memory stays bounded by the chunk size rather than the schedule size.
+    Rows are ordered by the day and start columns, so "9:00" comes before
+    "10:00" and Excel dates sort with the others.
+    """
+    role_keys = {role: key for key, role in PANEL_ROLES.items()}
+
+    with Session(engine) as session:
+        has_rows = session.exec(select(Defense.id).where(Defense.schedule_id == schedule_id).limit(1)).first()
+        if has_rows is None:
+            schedule = session.get(Schedule, schedule_id)
+            if schedule is not None:
+                yield legacy_frame(schedule)
+            return
+
+        order = (Defense.day, Defense.start, Defense.id)
+        after = None
+        while True:
+            query = select(Defense.id, Defense.date, Defense.time, Defense.room, Defense.student_id,
+                           Defense.thesis_title, Defense.field, *order[:2]).where(Defense.schedule_id == schedule_id)
+            if after is not None:
+                query = query.where(tuple_(*order) > tuple_(*after))
+            defenses = session.exec(query.order_by(*order).limit(chunk_rows)).all()
+            if not defenses:
+                return
+
+            frame = pd.DataFrame([defense[:7] for defense in defenses], columns=["id", *EXPORT_COLUMNS[:6]])
+            panels = pd.DataFrame(session.exec(
+                select(PanelAssignment.defense_id, PanelAssignment.role, PanelAssignment.lecturer_id)
+                .where(PanelAssignment.defense_id.in_(frame["id"].tolist()))
+            ).all(), columns=["defense_id", "role", "lecturer_id"])
+            panels = (panels.assign(role=panels["role"].map(role_keys))
+                      .pivot(index="defense_id", columns="role", values="lecturer_id")
+                      .reindex(columns=list(PANEL_ROLES)).astype("Int64"))
+            yield frame.join(panels, on="id")[EXPORT_COLUMNS]
+
+            last = defenses[-1]
+            after = (last.day, last.start, last.id)
+
+
+def export_csv(schedule_id: int):
+    """CSV text of a stored schedule, one chunk of rows at a time"""
+    header = True
+    for frame in export_frames(schedule_id):
+        yield frame.to_csv(index=False, header=header)
+        header = False
+    if header:
+        yield ",".join(EXPORT_COLUMNS) + "\n"
+
+
+def export_xlsx(schedule_id: int):
+    """XLSX bytes of a stored schedule.
+
+    An XLSX file is a zip archive that can only be sent once it is complete,
+    so the rows are written in openpyxl's write-only mode (constant memory)
+    to a spooled temporary file, which is then streamed in chunks.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("schedule")
+    sheet.append(EXPORT_COLUMNS)
+    for frame in export_frames(schedule_id):
+        values = frame.astype(object)
+        for row in values.where(values.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_XLSX_SPOOL_BYTES) as f:
+        workbook.save(f)
+        f.seek(0)
+        while chunk := f.read(EXPORT_XLSX_CHUNK_BYTES):
+            yield chunk
+
+
+EXPORTERS = {"csv": export_csv, "xlsx": export_xlsx}
@@ -0,0 +1,34 @@
+from sqlmodel import Session
+
+from backend.models import Schedule, ScheduleExpertise
+from backend.scheduling import PANEL_ROLES
+from rl_impelementation.panel_rules import default_max_workload
+from rl_impelementation.schedule_verifier import verify_assignments
+
+
+def verify_response(response: dict, lecturer_expertise: dict | None = None) -> dict:
+    """Verify a schedule in the API response format"""
+    max_workload = None
+    if lecturer_expertise:
+        max_workload = default_max_workload(len(response["schedule"]), len(lecturer_expertise))
+
+    return verify_assignments(
+        (
+            (row["date"], row["time"], row["field"], [row["panelAssignment"].get(key) for key in PANEL_ROLES])
+            for row in response["schedule"]
+        ),
+        lecturer_expertise=lecturer_expertise,
+        max_workload=max_workload,
+    )
+
+
+def stored_expertise(session: Session, schedule_id: int) -> dict | None:
+    """Lecturer expertise used for a stored schedule (None for schedules from before it was kept)"""
+    row = session.get(ScheduleExpertise, schedule_id)
+    if row is None:
+        return None
+    return {lecturer_id: expertise for lecturer_id, expertise in row.lecturer_expertise}
+
+
+def verify_stored_schedule(session: Session, schedule: Schedule) -> dict:
+    return verify_response(schedule.schedule, stored_expertise(session, schedule.id))
@@ -0,0 +1,51 @@
+import importlib
+import os
+
+import pandas as pd
+
+from backend.scheduling import SCHEDULER_WORKERS
+from rl_impelementation.flow_scheduler import FlowPanelScheduler
+from rl_impelementation.ingestion import read_table
+from rl_impelementation.thesis_defense_scheduler import ThesisDefenseScheduler
+from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+
+# Warm the solver during startup so the first request does not pay for it
+SCHEDULER_PREWARM = os.environ.get("SCHEDULER_PREWARM", "0") == "1"
+
+
+def warmup_inputs():
+    """A tiny schedule that touches every solver code path"""
+    jadwal_df = pd.DataFrame({
+        'date': ['2024-01-08', '2024-01-08', '2024-01-09', '2024-01-09'],
+        'time': ['08:00', '10:00', '08:00', '13:00'],
+        'ruang': ['R1', 'R1', 'R2', 'R2'],
+        'mahasiswa_id': [1, 2, 3, 4],
+        'judul': ['a', 'b', 'c', 'd'],
+        'bidang': ['A', 'B', 'A', 'B'],
+    })
+    lecturer_expertise = {1: ['A'], 2: ['A', 'B'], 3: ['B'], 4: ['A', 'B'], 5: ['A'], 6: ['B']}
+    return jadwal_df, lecturer_expertise
+
+
+def prewarm_solver(n_workers=SCHEDULER_WORKERS):
+    """Import lazily loaded readers, run both solvers once and start the rollout
+    worker processes"""
+    for module in ('openpyxl',):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    jadwal_df, lecturer_expertise = warmup_inputs()
+    read_table(jadwal_df.to_csv(index=False).encode())
+
+    scheduler = ThesisDefenseScheduler(jadwal_df, lecturer_expertise)
+    scheduler.schedule_defenses(jadwal_df, lecturer_expertise, max_iterations=2, seed=0)
+    if n_workers > 1:
+        # One chunk per worker makes the pool start all of its processes
+        scheduler.schedule_defenses(jadwal_df, lecturer_expertise,
+                                    max_iterations=n_workers * ThesisDefenseScheduler.ROLLOUTS_PER_CHUNK,
+                                    n_workers=n_workers, seed=0)
+
+    ThesisPanelSchedulerFinal(jadwal_df, lecturer_expertise).create_schedule()
+    FlowPanelScheduler(jadwal_df, lecturer_expertise).create_schedule()
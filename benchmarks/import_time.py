@@ -0,0 +1,68 @@
+"""Measure how long importing the API (or any module) takes in a fresh interpreter.
+
+    python benchmarks/import_time.py                 # import main
+    python benchmarks/import_time.py --max-ms 1500   # fail above a budget
+    python benchmarks/import_time.py --module rl_impelementation.thesis_defense_scheduler
+
+Prints one JSON object with the total time and the slowest top-level imports,
+so results can be compared between commits.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module, repeat):
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        # Lines look like "import time:   self [us] | cumulative | package" with nesting by indentation
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            imports.append((name.rstrip(), int(cumulative)))
+        runs.append(imports)
+
+    # Keep the fastest run, the others are mostly noise from the OS
+    imports = min(runs, key=lambda run: sum(us for name, us in run if not name.startswith(" ")))
+    top_level = [(name.strip(), us) for name, us in imports if not name.startswith("  ")]
+    return {
+        "module": module,
+        "total_ms": round(sum(us for _, us in top_level) / 1000, 1),
+        "slowest": [
+            {"module": name, "ms": round(us / 1000, 1)}
+            for name, us in sorted(top_level, key=lambda item: -item[1])[:10]
+        ],
+        "plotting_loaded": any(name.strip().startswith(("matplotlib", "seaborn")) for name, _ in imports),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ms", type=float, default=None, help="exit with status 1 above this import time")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+    print(json.dumps(result, indent=2))
+
+    if result["plotting_loaded"]:
+        print("matplotlib/seaborn must not be imported at startup", file=sys.stderr)
+        sys.exit(1)
+    if args.max_ms is not None and result["total_ms"] > args.max_ms:
+        print(f"import took {result['total_ms']} ms, budget is {args.max_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark the schedulers on synthetic data.
+
+    python benchmarks/run.py                                  # small preset, all schedulers
+    python benchmarks/run.py --preset large --schedulers panel final --out large.json
+    python benchmarks/run.py --lecturers 200 --defenses 1000 5000 --overlap 0.1 0.5
+    python benchmarks/run.py --baseline before.json           # compare with an earlier run
+
+Every case runs in a fresh process, so peak memory is measured per case and a
+case that exceeds --timeout is stopped without losing the others. Results are
+one JSON document (see result()), keyed by commit so runs can be compared.
+Wall times exclude imports; with --repeat the fastest run is reported.
+
+Schedulers: rl (ThesisDefenseScheduler), panel (ThesisPanelSchedulerFinal),
+flow (FlowPanelScheduler), final (FinalThesisScheduler) and api (POST /api/v1/schedule through the
+FastAPI test client, against a temporary SQLite database).
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate, lecturer_expertise  # noqa: E402
+from rl_impelementation.panel_rules import ROLE_COLUMNS, default_max_workload  # noqa: E402
+
+SCHEDULERS = ["rl", "panel", "flow", "final", "api"]
+
+# (lecturers, defenses) per preset
+PRESETS = {
+    "small": [(50, 100), (100, 500)],
+    "medium": [(200, 1000), (500, 5000)],
+    "large": [(1000, 10000), (2000, 20000)],
+}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def violations(assignments, expertise, n_defenses, roles_per_defense):
+    from rl_impelementation.schedule_verifier import verify_assignments
+
+    max_workload = default_max_workload(n_defenses, len(expertise), roles_per_defense)
+    return verify_assignments(assignments, lecturer_expertise=expertise, max_workload=max_workload)
+
+
+def run_rl(dosen, jadwal, expertise, args):
+    from rl_impelementation.thesis_defense_scheduler import ThesisDefenseScheduler
+
+    scheduler = ThesisDefenseScheduler(jadwal, expertise)
+    best_schedule, best_reward = scheduler.schedule_defenses(jadwal, expertise, max_iterations=args.iterations,
+                                                             n_workers=args.workers, seed=args.seed)
+    lecturers = dict(best_schedule)
+    assignments = ((row.date, row.time, row.bidang, [lecturers.get(defense_id)])
+                   for defense_id, row in zip(jadwal.index, jadwal.itertuples()))
+    return best_reward, violations(assignments, expertise, len(jadwal), 1)
+
+
+def run_panel(dosen, jadwal, expertise, args):
+    from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+
+    final_schedule = ThesisPanelSchedulerFinal(jadwal, expertise).create_schedule()
+    panels = final_schedule[ROLE_COLUMNS].astype(object).where(final_schedule[ROLE_COLUMNS].notna(), None)
+    assignments = zip(final_schedule['tanggal'], final_schedule['waktu'], final_schedule['bidang'],
+                      panels.values.tolist())
+    return None, violations(assignments, expertise, len(jadwal), 4)
+
+
+def run_flow(dosen, jadwal, expertise, args):
+    from rl_impelementation.flow_scheduler import FlowPanelScheduler
+
+    final_schedule = FlowPanelScheduler(jadwal, expertise).create_schedule()
+    panels = final_schedule[ROLE_COLUMNS].astype(object).where(final_schedule[ROLE_COLUMNS].notna(), None)
+    assignments = zip(final_schedule['tanggal'], final_schedule['waktu'], final_schedule['bidang'],
+                      panels.values.tolist())
+    return None, violations(assignments, expertise, len(jadwal), 4)
+
+
+def run_final(dosen, jadwal, expertise, args):
+    from rl_impelementation.final_thesis_scheduler import FinalThesisScheduler
+
+    scheduler = FinalThesisScheduler(jadwal, expertise)
+    complete_schedule = {defense_id: scheduler.schedule_defense(defense_id, print_details=False)
+                         for defense_id in jadwal.index}
+    assignments = ((row.date, row.time, row.bidang, list(complete_schedule[defense_id].values()))
+                   for defense_id, row in zip(jadwal.index, jadwal.itertuples()))
+    return None, violations(assignments, expertise, len(jadwal), 4)
+
+
+def run_api(dosen, jadwal, expertise, args):
+    from io import BytesIO
+
+    from fastapi.testclient import TestClient
+    from backend.verification import verify_response
+    from main import app
+
+    files = {"dosen_file": ("dosen.csv", BytesIO(dosen.to_csv(index=False).encode())),
+             "jadwal_file": ("jadwal.csv", BytesIO(jadwal.to_csv(index=False).encode()))}
+    params = {"max_iterations": args.iterations, "workers": args.workers, "use_cache": False, "engine": args.engine}
+    if args.seed is not None:
+        params["seed"] = args.seed
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/schedule", files=files, params=params)
+    response.raise_for_status()
+    body = response.json()
+    return body["reward"], verify_response(body, expertise)
+
+
+RUNNERS = {"rl": run_rl, "panel": run_panel, "flow": run_flow, "final": run_final, "api": run_api}
+
+# Imported before the clock starts, so wall times do not include import time
+MODULES = {
+    "rl": "rl_impelementation.thesis_defense_scheduler",
+    "panel": "rl_impelementation.thesis_panel_scheduler_final",
+    "flow": "rl_impelementation.flow_scheduler",
+    "final": "rl_impelementation.final_thesis_scheduler",
+    "api": "main",
+}
+
+
+def run_case(case, args, conn):
+    """Runs in a fresh process and sends the measurement back through conn"""
+    dosen, jadwal = generate(case["lecturers"], case["defenses"], case["fields"], case["overlap"], seed=case["seed"])
+    expertise = lecturer_expertise(dosen)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The api case writes to a throwaway database, read when backend.database is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+        importlib.import_module(MODULES[case["scheduler"]])
+        baseline_mb = peak_rss_mb()
+
+        wall_times = []
+        try:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                reward, verification = RUNNERS[case["scheduler"]](dosen, jadwal, expertise, args)
+                wall_times.append(time.perf_counter() - start)
+        except Exception as e:
+            conn.send({"status": "failed", "error": repr(e)})
+            return
+
+    conn.send({
+        "status": "ok",
+        "wall_s": round(min(wall_times), 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": round(peak_rss_mb() - baseline_mb, 1),
+        "reward": None if reward is None else float(reward),
+        "violations": {key: value for key, value in verification.items() if key != "valid"},
+        "valid": verification["valid"],
+    })
+
+
+def measure(case, args):
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=run_case, args=(case, args, sender))
+    process.start()
+    sender.close()
+
+    measurement = {"status": "timeout"}
+    if receiver.poll(args.timeout):
+        try:
+            measurement = receiver.recv()
+        except EOFError:
+            measurement = {"status": "failed"}
+    process.join(timeout=1)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    elif process.exitcode and measurement["status"] != "ok":
+        measurement = {"status": "failed", "exitcode": process.exitcode}
+    return {**case, **measurement}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result(cases, args):
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "iterations": args.iterations,
+        "workers": args.workers,
+        "engine": args.engine,
+        "repeat": args.repeat,
+        "cases": cases,
+    }
+
+
+def case_key(case):
+    return (case["scheduler"], case["lecturers"], case["defenses"], case["fields"], case["overlap"], case["seed"])
+
+
+def compare(baseline, current, threshold):
+    """Print the wall time ratio per case; returns the cases that got slower than threshold"""
+    previous = {case_key(case): case for case in baseline["cases"]}
+    regressions = []
+    for case in current["cases"]:
+        before = previous.get(case_key(case))
+        if before is None or before.get("status") != "ok" or case["status"] != "ok":
+            continue
+        ratio = case["wall_s"] / max(before["wall_s"], 1e-9)
+        flag = ""
+        if ratio > threshold:
+            regressions.append(case)
+            flag = "  SLOWER"
+        print(f"{case['scheduler']:>6} {case['lecturers']:>5}x{case['defenses']:<6} overlap={case['overlap']:<4} "
+              f"{before['wall_s']:>9.3f}s -> {case['wall_s']:>9.3f}s  x{ratio:.2f}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--lecturers", type=int, nargs="+", help="overrides the preset sizes")
+    parser.add_argument("--defenses", type=int, nargs="+", help="overrides the preset sizes")
+    parser.add_argument("--fields", type=int, default=10)
+    parser.add_argument("--overlap", type=float, nargs="+", default=[0.3])
+    parser.add_argument("--schedulers", nargs="+", choices=SCHEDULERS, default=SCHEDULERS)
+    parser.add_argument("--iterations", type=int, default=50, help="RL iterations (rl and api)")
+    parser.add_argument("--workers", type=int, default=1, help="RL rollout processes (rl and api)")
+    parser.add_argument("--engine", choices=["rl", "flow", "portfolio"], default="rl", help="engine for the api case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, the fastest is reported")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per case")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    parser.add_argument("--baseline", help="JSON of an earlier run to compare wall times with")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    if args.lecturers or args.defenses:
+        sizes = [(lecturers, defenses)
+                 for lecturers in args.lecturers or [50]
+                 for defenses in args.defenses or [100]]
+    else:
+        sizes = PRESETS[args.preset]
+
+    cases = []
+    for lecturers, defenses in sizes:
+        for overlap in args.overlap:
+            for scheduler in args.schedulers:
+                case = {"scheduler": scheduler, "lecturers": lecturers, "defenses": defenses,
+                        "fields": args.fields, "overlap": overlap, "seed": args.seed}
+                cases.append(measure(case, args))
+                print(f"{scheduler:>6} {lecturers:>5}x{defenses:<6} overlap={overlap:<4} "
+                      f"{cases[-1]['status']} {cases[-1].get('wall_s', '')}", file=sys.stderr)
+
+    output = result(cases, args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(json.load(f), output, args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
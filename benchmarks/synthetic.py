@@ -0,0 +1,96 @@
+"""Synthetic lecturer (dosen) and defense (jadwal) datasets for benchmarks.
+
+    python benchmarks/synthetic.py --lecturers 200 --defenses 2000 --overlap 0.3 --out /tmp/data
+    python benchmarks/synthetic.py --lecturers 2000 --defenses 20000 --format csv --out /tmp/large
+
+Writes dosen.<format> and jadwal.<format> with the columns the API expects.
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+TIMES = ["08:00", "10:00", "13:00", "15:00"]
+
+
+def generate(n_lecturers=50, n_defenses=100, n_fields=10, overlap=0.3, n_dates=None, seed=0):
+    """Returns (dosen_df, jadwal_df).
+
+    overlap (0..1) is the share of the other fields each lecturer also knows
+    on average: 0 gives every lecturer a single field, 1 gives everyone every
+    field. Every field has at least one lecturer. Unless n_dates is given,
+    there are enough dates for the daily limit of ThesisPanelSchedulerFinal
+    to leave room for full panels (about 40% of the lecturer-days are needed).
+    """
+    rng = np.random.default_rng(seed)
+    fields = np.array([f"Bidang {i}" for i in range(n_fields)])
+
+    keahlian = []
+    for i in range(n_lecturers):
+        main_field = i % n_fields if i < n_fields else rng.integers(n_fields)
+        others = np.flatnonzero((rng.random(n_fields) < overlap) & (np.arange(n_fields) != main_field))
+        known = fields[np.concatenate(([main_field], others)).astype(int)]
+        keahlian.append(", ".join(known))
+    dosen = pd.DataFrame({"id": np.arange(1, n_lecturers + 1), "keahlian": keahlian})
+
+    if n_dates is None:
+        # 4 lecturers per defense, at most 2 defenses per lecturer and day
+        n_dates = max(1, math.ceil(2.5 * n_defenses / n_lecturers))
+    dates = pd.bdate_range("2024-01-08", periods=n_dates).strftime("%Y-%m-%d")
+    rooms_per_slot = max(1, math.ceil(n_defenses / (n_dates * len(TIMES))))
+
+    slot = rng.permutation(n_defenses) % (n_dates * len(TIMES))
+    jadwal = pd.DataFrame({
+        "date": dates[slot // len(TIMES)],
+        "time": np.array(TIMES)[slot % len(TIMES)],
+        "ruang": [f"R{room + 1}" for room in rng.integers(rooms_per_slot, size=n_defenses)],
+        "mahasiswa_id": np.arange(100000, 100000 + n_defenses),
+        "judul": [f"Judul {i}" for i in range(n_defenses)],
+        "bidang": fields[rng.integers(n_fields, size=n_defenses)],
+    })
+    return dosen, jadwal
+
+
+def lecturer_expertise(dosen):
+    return {lid: [field.strip() for field in keahlian.split(",")]
+            for lid, keahlian in zip(dosen["id"], dosen["keahlian"])}
+
+
+def write(dosen, jadwal, out, file_format="xlsx"):
+    os.makedirs(out, exist_ok=True)
+    paths = []
+    for name, df in (("dosen", dosen), ("jadwal", jadwal)):
+        path = os.path.join(out, f"{name}.{file_format}")
+        if file_format == "xlsx":
+            df.to_excel(path, index=False)
+        elif file_format == "parquet":
+            df.to_parquet(path, index=False)
+        elif file_format == "json":
+            df.to_json(path, orient="records")
+        else:
+            df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lecturers", type=int, default=50)
+    parser.add_argument("--defenses", type=int, default=100)
+    parser.add_argument("--fields", type=int, default=10)
+    parser.add_argument("--overlap", type=float, default=0.3)
+    parser.add_argument("--dates", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["xlsx", "csv", "json", "parquet"], default="xlsx")
+    parser.add_argument("--out", default=".")
+    args = parser.parse_args()
+
+    dosen, jadwal = generate(args.lecturers, args.defenses, args.fields, args.overlap, args.dates, args.seed)
+    for path in write(dosen, jadwal, args.out, args.format):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.analytics import backfill_workload
 from backend.database import create_db_and_tables
+from backend.jobs import job_runner
+from backend.metrics import http_request_seconds, http_requests_in_flight
+from backend.routes.analytics import router as analytics_router
+from backend.routes.jobs import router as job_router
+from backend.routes.metrics import router as metrics_router
 from backend.routes.schduler import router as schedule_router
+from backend.scheduling import backfill_sort_keys
+from backend.warmup import SCHEDULER_PREWARM, prewarm_solver
+from rl_impelementation.thesis_defense_scheduler import shutdown_rollout_pool
 
 # Initialize FastAPI
 app = FastAPI(
@@ -25,12 +36,56 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        # Route templates keep the label set small ("/api/v1/schedules/{id}", not every id)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_request_seconds.observe(time.perf_counter() - start, method=request.method, route=route, status=status)
+
+
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    # Defenses stored before the export sort keys existed
+    backfill_sort_keys()
+    # Schedules stored before the lecturer_workload summary existed
+    backfill_workload()
+    if SCHEDULER_PREWARM:
+        prewarm_solver()
+    job_runner.resume()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    job_runner.shutdown()
+    shutdown_rollout_pool()
 
 
 app.include_router(
     schedule_router,
     tags=["Schedule"],
 )
+
+app.include_router(
+    job_router,
+    tags=["Jobs"],
+)
+
+app.include_router(
+    metrics_router,
+    tags=["Metrics"],
+)
+
+app.include_router(
+    analytics_router,
+    tags=["Analytics"],
+)
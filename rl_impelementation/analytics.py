@@ -0,0 +1,49 @@
+"""Optional plots for schedules.
+
+matplotlib and seaborn are only imported when a plot is drawn, so the solver
+and the API never load the plotting stack.
+"""
+import pandas as pd
+
+from rl_impelementation.panel_rules import ROLE_COLUMNS
+
+
+def load_plotting():
+    try:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+    except ImportError as e:
+        raise ImportError("Plotting needs the optional matplotlib and seaborn packages") from e
+    return plt, sns
+
+
+def plot_workload(workload, ax=None):
+    """Bar chart of panels per lecturer ({lecturer id: count})"""
+    plt, sns = load_plotting()
+    if ax is None:
+        _, ax = plt.subplots(figsize=(12, 4))
+
+    series = pd.Series(workload).sort_values(ascending=False)
+    sns.barplot(x=series.index.astype(str), y=series.values, ax=ax, color='steelblue')
+    ax.axhline(series.mean(), color='darkred', linestyle='--', label='mean')
+    ax.set_xlabel('Dosen')
+    ax.set_ylabel('Jumlah sidang')
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.legend()
+    return ax
+
+
+def plot_field_workload(final_schedule, lecturer_expertise, ax=None):
+    """Heatmap of assignments per field and lecturer for a ThesisPanelSchedulerFinal schedule"""
+    plt, sns = load_plotting()
+    if ax is None:
+        _, ax = plt.subplots(figsize=(12, 6))
+
+    assignments = final_schedule.melt(id_vars=['bidang'], value_vars=ROLE_COLUMNS, value_name='lecturer').dropna()
+    counts = pd.crosstab(assignments['bidang'], assignments['lecturer'])
+    counts = counts.reindex(columns=list(lecturer_expertise.keys()), fill_value=0)
+
+    sns.heatmap(counts, cmap='Blues', ax=ax)
+    ax.set_xlabel('Dosen')
+    ax.set_ylabel('Bidang')
+    return ax
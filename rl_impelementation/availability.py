@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from rl_impelementation.interval_index import TIME_PATTERN, to_seconds
+
+# Slot s of a lecturer is bit s % WORD_BITS of word s // WORD_BITS
+WORD_BITS = 64
+# Start and end of a whole-day absence; slots with an unreadable time start at -1
+WHOLE_DAY = (-1, 1 << 31)
+
+
+def date_key(date) -> str:
+    """A date as text, with the midnight time of Excel dates dropped ("2024-06-03 00:00:00" -> "2024-06-03")"""
+    return str(date).strip().removesuffix(' 00:00:00').removesuffix('T00:00:00')
+
+
+def time_range(time):
+    """(start, end) in seconds after midnight of the slots an absence covers, or None for the whole day.
+
+    A single time ("10:00") covers the slot starting then, a range
+    ("08:00 - 12:00") every slot starting within it. Raises ValueError when
+    no time can be read.
+    """
+    if time is None or (not isinstance(time, str) and pd.isna(time)) or (isinstance(time, str) and not time.strip()):
+        return None
+
+    if isinstance(time, str):
+        starts = [to_seconds(match.group(0)) for match in TIME_PATTERN.finditer(time)]
+    else:
+        starts = [to_seconds(time)]
+    starts = [start for start in starts if start is not None]
+    if not starts:
+        raise ValueError(f"Unreadable time: {time}")
+    if len(starts) == 1:
+        return starts[0], starts[0] + 1
+    return starts[0], starts[1]
+
+
+class AvailabilityCalendar:
+    """Lecturer absences compiled into a bitset per lecturer over the (date, time) slots.
+
+    absences are (lecturer id, date, time) tuples, time as accepted by
+    time_range; absences of lecturers not in lecturer_ids are ignored.
+    bits[w, l] holds slots 64w .. 64w + 63 of lecturer l, a set bit meaning
+    the lecturer is unavailable, so a shift and mask of row w answers one
+    slot for all lecturers at once. Slots are compiled up front or the
+    first time they are looked up.
+    """
+
+    def __init__(self, absences, lecturer_ids, slots=()):
+        lecturer_index = {lid: i for i, lid in enumerate(lecturer_ids)}
+        self.n_lecturers = len(lecturer_index)
+
+        # (lecturer index, start, end) rows per date
+        by_date = {}
+        for lecturer_id, date, time in absences:
+            if lecturer_id in lecturer_index:
+                start, end = time_range(time) or WHOLE_DAY
+                by_date.setdefault(date_key(date), []).append((lecturer_index[lecturer_id], start, end))
+        self.absences = {date: np.array(rows, dtype=np.int64) for date, rows in by_date.items()}
+
+        self.slot_index = {}
+        self.bits = np.zeros((0, self.n_lecturers), dtype=np.uint64)
+        self.last = (None, None)  # (slot, unavailable) of the last lookup
+        self.add_slots(slots)
+
+    @property
+    def n_absences(self):
+        return sum(len(rows) for rows in self.absences.values())
+
+    def add_slots(self, slots):
+        """Compile the bits of (date, time) slots that are not in the calendar yet"""
+        new = [slot for slot in dict.fromkeys(slots) if slot not in self.slot_index]
+        if not new:
+            return
+
+        first = len(self.slot_index)
+        for i, slot in enumerate(new, first):
+            self.slot_index[slot] = i
+        n_words = -(-len(self.slot_index) // WORD_BITS)
+        if n_words > len(self.bits):
+            grown = np.zeros((n_words, self.n_lecturers), dtype=np.uint64)
+            grown[:len(self.bits)] = self.bits
+            self.bits = grown
+
+        by_date = {}
+        for i, (date, time) in enumerate(new, first):
+            start = to_seconds(time)
+            by_date.setdefault(date_key(date), []).append((i, WHOLE_DAY[0] if start is None else start))
+
+        for date, date_slots in by_date.items():
+            rows = self.absences.get(date)
+            if rows is None:
+                continue
+            slot_ids, starts = np.array(date_slots, dtype=np.int64).T
+            # Every absence of the date against every new slot of the date
+            covered = (rows[:, 1, None] <= starts) & (starts < rows[:, 2, None])
+            absence, slot = np.nonzero(covered)
+            slot_ids = slot_ids[slot]
+            np.bitwise_or.at(self.bits, (slot_ids // WORD_BITS, rows[absence, 0]),
+                             np.left_shift(np.uint64(1), (slot_ids % WORD_BITS).astype(np.uint64)))
+
+    def unavailable_at(self, slot):
+        """Bool per lecturer: unavailable in the slot with this index"""
+        last_slot, unavailable = self.last
+        if last_slot != slot:
+            word = self.bits[slot // WORD_BITS]
+            unavailable = ((word >> np.uint64(slot % WORD_BITS)) & np.uint64(1)).astype(bool)
+            self.last = (slot, unavailable)
+        return unavailable
+
+    def unavailable(self, date, time):
+        """Bool per lecturer: unavailable in the slot starting at time on date"""
+        slot = self.slot_index.get((date, time))
+        if slot is None:
+            self.add_slots([(date, time)])
+            slot = self.slot_index[(date, time)]
+        return self.unavailable_at(slot)
@@ -0,0 +1,79 @@
+import numpy as np
+
+from rl_impelementation.availability import AvailabilityCalendar
+from rl_impelementation.interval_index import gap_neighbors
+
+
+class CompiledInstance:
+    """Integer-encoded view of one scheduling problem.
+
+    Defenses, (date, time) slots, fields and lecturers are mapped to dense
+    integer ids once, so episodes can run on NumPy arrays instead of
+    DataFrame lookups.
+    """
+
+    def __init__(self, schedule_df, lecturer_expertise, min_time_gap=7200, absences=None):
+        # Defenses keep the DataFrame index order
+        self.defense_ids = schedule_df.index.tolist()
+        self.defense_index = {did: i for i, did in enumerate(self.defense_ids)}
+
+        # Lecturers keep the lecturer_expertise key order (used for tie-breaking)
+        self.lecturer_ids = list(lecturer_expertise.keys())
+        self.lecturer_index = {lid: i for i, lid in enumerate(self.lecturer_ids)}
+
+        # Fields from both the schedule and the lecturers' expertise
+        self.fields = list(dict.fromkeys(
+            list(schedule_df['bidang']) +
+            [field for expertise in lecturer_expertise.values() for field in expertise]
+        ))
+        self.field_index = {field: i for i, field in enumerate(self.fields)}
+
+        # Slots are unique (date, time) pairs
+        slot_keys = list(zip(schedule_df['date'], schedule_df['time']))
+        self.slots = list(dict.fromkeys(slot_keys))
+        self.slot_index = {slot: i for i, slot in enumerate(self.slots)}
+
+        # Slots on the same date that start less than min_time_gap apart (itself included)
+        self.slot_neighbors = [np.array(n, dtype=np.int64) for n in gap_neighbors(self.slots, min_time_gap)]
+
+        # Lecturer absences as bitsets over the slots (None without any)
+        self.calendar = AvailabilityCalendar(absences, self.lecturer_ids, self.slots) if absences else None
+
+        # Times of day, without the date, so learned values carry over between terms
+        self.times = list(dict.fromkeys(schedule_df['time']))
+        self.time_index = {time: i for i, time in enumerate(self.times)}
+
+        self.defense_field = np.array([self.field_index[f] for f in schedule_df['bidang']], dtype=np.int64)
+        self.defense_slot = np.array([self.slot_index[s] for s in slot_keys], dtype=np.int64)
+        self.defense_time = np.array([self.time_index[t] for t in schedule_df['time']], dtype=np.int64)
+
+        # expertise[field, lecturer] and the matching expertise score (3.0 / number of fields)
+        self.expertise = np.zeros((len(self.fields), len(self.lecturer_ids)), dtype=bool)
+        self.expertise_score = np.zeros((len(self.fields), len(self.lecturer_ids)), dtype=np.float64)
+        for lecturer_id, expertise in lecturer_expertise.items():
+            l_idx = self.lecturer_index[lecturer_id]
+            for field in expertise:
+                self.expertise[self.field_index[field], l_idx] = True
+                self.expertise_score[self.field_index[field], l_idx] = 3.0 * (1.0 / len(expertise))
+
+        # Qualified lecturers per field, in lecturer order
+        self.eligible = [np.flatnonzero(row) for row in self.expertise]
+
+        total_roles = len(self.defense_ids) * 4  # 4 roles per sidang
+        self.target_workload = round(total_roles / len(self.lecturer_ids), 2)
+
+    @property
+    def n_defenses(self):
+        return len(self.defense_ids)
+
+    @property
+    def n_lecturers(self):
+        return len(self.lecturer_ids)
+
+    @property
+    def n_slots(self):
+        return len(self.slots)
+
+    def decode(self, actions):
+        """Turn (defense index, lecturer index) pairs back into original ids"""
+        return [(self.defense_ids[d], self.lecturer_ids[l]) for d, l in actions]
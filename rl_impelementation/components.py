@@ -0,0 +1,178 @@
+import time
+from concurrent.futures import as_completed
+from contextlib import nullcontext
+
+import pandas as pd
+
+from rl_impelementation.engines import make_panel_engine, run_engine
+from rl_impelementation.panel_rules import default_max_workload
+from rl_impelementation.thesis_defense_scheduler import ThesisDefenseScheduler, get_rollout_pool, rollout_seed
+
+
+def split_components(schedule_df, lecturer_expertise):
+    """Independent parts of a problem as [(schedule_df, lecturer_expertise), ...].
+
+    Lecturers only sit on panels of their own fields, so the lecturer-field
+    graph splits into connected components (e.g. departments uploaded
+    together) that share no lecturer and no defense. Parts keep the defense
+    and lecturer order of the input and are ordered by their first defense.
+    Lecturers without a field on the schedule belong to no part. A problem
+    that does not split comes back unchanged, idle lecturers included.
+    """
+    parent = {}
+
+    def find(field):
+        parent.setdefault(field, field)
+        while parent[field] != field:
+            parent[field] = parent[parent[field]]
+            field = parent[field]
+        return field
+
+    for expertise in lecturer_expertise.values():
+        for field in expertise[1:]:
+            parent[find(field)] = find(expertise[0])
+
+    roots = schedule_df['bidang'].map(find)
+    if roots.nunique() <= 1:
+        return [(schedule_df, lecturer_expertise)]
+
+    lecturers = {}
+    for lecturer_id, expertise in lecturer_expertise.items():
+        if expertise:
+            lecturers.setdefault(find(expertise[0]), {})[lecturer_id] = expertise
+
+    return [(part, lecturers[root]) for root, part in schedule_df.groupby(roots, sort=False)]
+
+
+def solve_component(schedule_df, lecturer_expertise, engine="rl", max_workload=None, q_entries=None,
+                    q_episodes=0, max_iterations=500, n_workers=1, seed=None, patience=None,
+                    min_improvement=0.0, deadline_at=None, absences=None, timer=None, on_row=None):
+    """RL search and panels (or flow panels) for one problem or one part of it.
+
+    Returns a dict with final_schedule (indexed by defense id, in date and time
+    order), best_schedule, best_reward, iterations, analysis and, for the RL
+    engine, the learned q_entries and q_episodes. deadline_at is a
+    time.time() value, so parts queued behind others get what is left of it.
+    absences are (lecturer id, date, time) tuples; those of lecturers outside
+    the part are ignored.
+    """
+    def phase(name):
+        return timer.phase(name) if timer is not None else nullcontext()
+
+    result = {'best_schedule': None, 'best_reward': None, 'iterations': 0, 'q_entries': None, 'q_episodes': 0}
+
+    if engine == "flow":
+        with phase("flow"):
+            final_schedule = run_engine(make_panel_engine("flow", schedule_df, lecturer_expertise, max_workload,
+                                                          absences), on_row)
+        # No RL search; flow panels only use lecturers with the field's expertise
+        result.update(final_schedule=final_schedule, analysis={'expertise_ratio': 1.0})
+        return result
+
+    with phase("compile"):
+        scheduler_defense = ThesisDefenseScheduler(schedule_df, lecturer_expertise, absences=absences)
+        # Warm-start from the Q-table learned on this faculty's previous runs
+        if q_entries:
+            scheduler_defense.load_q_table(q_entries, q_episodes)
+
+    with phase("rl_search"):
+        deadline_ms = None
+        if deadline_at is not None:
+            deadline_ms = max(1, int((deadline_at - time.time()) * 1000))
+        best_schedule, best_reward = scheduler_defense.schedule_defenses(schedule_df, lecturer_expertise,
+                                                                      max_iterations=max_iterations,
+                                                                      n_workers=n_workers, seed=seed,
+                                                                      patience=patience,
+                                                                      min_improvement=min_improvement,
+                                                                      deadline_ms=deadline_ms)
+        analysis = scheduler_defense.analyze_schedule(best_schedule)
+
+    with phase("panel"):
+        final_schedule = run_engine(make_panel_engine("greedy", schedule_df, lecturer_expertise, max_workload,
+                                                      absences), on_row)
+
+    result.update(final_schedule=final_schedule, best_schedule=best_schedule, best_reward=best_reward,
+                  iterations=scheduler_defense.iterations_run, analysis=analysis,
+                  q_entries=scheduler_defense.q_table.to_entries(), q_episodes=scheduler_defense.q_table.episodes)
+    return result
+
+
+def merge_results(results, schedule_df):
+    """One result from the results of all parts, with the schedule in date and time order"""
+    if len(results) == 1:
+        return results[0]
+
+    order = schedule_df.sort_values(['date', 'time']).index
+    final_schedule = pd.concat([result['final_schedule'] for result in results]).loc[order]
+
+    # Every part scored the expertise of its own defenses
+    n_defenses = [len(result['final_schedule']) for result in results]
+    expertise_ratio = sum(result['analysis']['expertise_ratio'] * n
+                          for result, n in zip(results, n_defenses)) / sum(n_defenses)
+    workload = {}
+    for result in results:
+        workload.update(result['analysis'].get('workload', {}))
+
+    rewards = [result['best_reward'] for result in results]
+    schedules = [result['best_schedule'] for result in results]
+    q_entries = [result['q_entries'] for result in results]
+    return {
+        'final_schedule': final_schedule,
+        'best_schedule': None if None in schedules else [pair for schedule in schedules for pair in schedule],
+        'best_reward': None if None in rewards else sum(rewards),
+        # Parts search side by side, so the run took as many iterations as its longest search
+        'iterations': max(result['iterations'] for result in results),
+        'analysis': {'workload': workload, 'expertise_ratio': expertise_ratio},
+        'q_entries': None if None in q_entries else [entry for entries in q_entries for entry in entries],
+        'q_episodes': max(result['q_episodes'] for result in results),
+    }
+
+
+def solve_components(schedule_df, lecturer_expertise, engine="rl", q_entries=None, q_episodes=0,
+                     max_iterations=500, n_workers=1, seed=None, patience=None, min_improvement=0.0,
+                     deadline_ms=None, absences=None, timer=None, on_row=None):
+    """solve_component on every independent part of the problem, merged into one result.
+
+    A problem that does not split is solved as a whole, with its RL rollouts
+    spread over n_workers processes. Otherwise each part is solved on its own,
+    with the parts spread over the n_workers processes, so the run takes about
+    as long as its largest part. Every part keeps the workload limit of the
+    whole problem, so panels are the same as for the whole problem; the RL
+    search balances workload within each part. on_row receives the rows of
+    a part when its panels are assigned, grouped by part.
+    """
+    max_workload = default_max_workload(len(schedule_df), len(lecturer_expertise))
+    deadline_at = time.time() + deadline_ms / 1000 if deadline_ms is not None else None
+    options = dict(engine=engine, max_workload=max_workload, q_entries=q_entries, q_episodes=q_episodes,
+                   max_iterations=max_iterations, patience=patience, min_improvement=min_improvement,
+                   deadline_at=deadline_at, absences=absences)
+
+    with timer.phase("decompose") if timer is not None else nullcontext():
+        parts = split_components(schedule_df, lecturer_expertise)
+
+    if len(parts) == 1:
+        return solve_component(schedule_df, lecturer_expertise, n_workers=n_workers, seed=seed, timer=timer,
+                               on_row=on_row, **options)
+
+    if n_workers > 1:
+        seed = rollout_seed(seed)
+
+    def emit(result):
+        if on_row is not None:
+            for row in result['final_schedule'].to_dict('records'):
+                on_row(row)
+        return result
+
+    with timer.phase("components") if timer is not None else nullcontext():
+        if n_workers == 1:
+            results = [emit(solve_component(part_df, part_expertise, n_workers=1, seed=seed, **options))
+                       for part_df, part_expertise in parts]
+        else:
+            pool = get_rollout_pool(n_workers)
+            futures = {pool.submit(solve_component, part_df, part_expertise, n_workers=1, seed=seed, **options): i
+                       for i, (part_df, part_expertise) in enumerate(parts)}
+            results = [None] * len(parts)
+            for future in as_completed(futures):
+                results[futures[future]] = emit(future.result())
+
+    return merge_results(results, schedule_df)
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from rl_impelementation.final_thesis_scheduler import FinalThesisScheduler
+from rl_impelementation.flow_scheduler import FlowPanelScheduler
+from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+
+# Panel engines share one interface: engine(schedule_df, lecturer_expertise, max_workload=None,
+# absences=None), absences being (lecturer id, date, time) tuples (see availability.py), with
+# iter_schedule() yielding one row per defense in date and time order, with the columns
+# tanggal, waktu, ruang, mahasiswa_id, judul, bidang and panel_rules.ROLE_COLUMNS (None for empty roles).
+PANEL_ENGINES = {
+    'greedy': ThesisPanelSchedulerFinal,  # least-loaded lecturer first, defense by defense
+    'flow': FlowPanelScheduler,  # all panels at once as a min-cost flow
+    'score': FinalThesisScheduler,  # highest expertise and workload score, defense by defense
+}
+
+
+def make_panel_engine(name, schedule_df, lecturer_expertise, max_workload=None, absences=None):
+    return PANEL_ENGINES[name](schedule_df, lecturer_expertise, max_workload=max_workload, absences=absences)
+
+
+def run_engine(engine, on_row=None, **options):
+    """The engine's schedule as a DataFrame indexed by defense id (date and time order).
+    on_row receives every row as it is yielded; options go to iter_schedule."""
+    rows = []
+    for row in engine.iter_schedule(**options):
+        rows.append(row)
+        if on_row is not None:
+            on_row(row)
+    return pd.DataFrame(rows, index=engine.schedule_df.sort_values(['date', 'time']).index)
@@ -1,16 +1,37 @@
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import math
+from rl_impelementation.availability import AvailabilityCalendar
+from rl_impelementation.interval_index import LecturerIntervalIndex
+from rl_impelementation.schedule_verifier import verify_assignments
 
 class FinalThesisScheduler:
-    def __init__(self, schedule_df, lecturer_expertise):
+    # Roles of schedule_defense and the matching create_schedule columns
+    ROLE_COLUMNS = {'examiner1': 'penguji1_id', 'examiner2': 'penguji2_id',
+                    'supervisor1': 'pembimbing1_id', 'supervisor2': 'pembimbing2_id'}
+
+    def __init__(self, schedule_df, lecturer_expertise, max_workload=None, absences=None):
         self.schedule_df = schedule_df
         self.lecturer_expertise = lecturer_expertise
         self.roles = ['examiner1', 'examiner2', 'supervisor1', 'supervisor2']
         self.lecturer_workload = {lid: 0 for lid in lecturer_expertise.keys()}
         self.target_workload = (len(schedule_df) * 4) / len(lecturer_expertise)
+        self.max_workload = max_workload if max_workload is not None else max(5, self.target_workload * 1.5)
+
+        # Lecturers per field, in lecturer_expertise order
+        self.field_lecturers = {}
+        for lid, expertise in lecturer_expertise.items():
+            for field in dict.fromkeys(expertise):
+                self.field_lecturers.setdefault(field, []).append(lid)
+
+        # Same limits as ThesisPanelSchedulerFinal, only enforced by create_schedule
+        self.MIN_TIME_GAP = pd.Timedelta(hours=2)
+        self.MAX_DAILY_ASSIGNMENTS = 2
+
+        # Absences as bitsets over the slots, in lecturer_expertise order (None without any)
+        self.lecturer_order = {lid: order for order, lid in enumerate(lecturer_expertise.keys())}
+        self.calendar = None
+        if absences:
+            self.calendar = AvailabilityCalendar(absences, lecturer_expertise.keys(),
+                                                 zip(schedule_df['date'], schedule_df['time']))
 
     def calculate_assignment_score(self, lecturer_id, field, current_workload):
         base_score = 0
@@ -25,15 +46,15 @@ class FinalThesisScheduler:
 
         return base_score
 
-    def schedule_defense(self, defense_id, print_details=True):
+    def schedule_defense(self, defense_id, print_details=True, unavailable=()):
         defense = self.schedule_df.loc[defense_id]
         role_assignments = {}
         for role in self.roles:
             valid_lecturers = [
-                lid for lid, expertise in self.lecturer_expertise.items()
-                if defense['bidang'] in expertise
-                and lid not in role_assignments.values()
-                and self.lecturer_workload[lid] < max(5, self.target_workload * 1.5)
+                lid for lid in self.field_lecturers.get(defense['bidang'], ())
+                if lid not in role_assignments.values()
+                and lid not in unavailable
+                and self.lecturer_workload[lid] < self.max_workload
             ]
             if valid_lecturers:
                 scores = {
@@ -49,6 +70,42 @@ class FinalThesisScheduler:
                 self.lecturer_workload[selected] += 1
         return role_assignments
 
+    def iter_schedule(self):
+        """Yield the schedule rows in date and time order, in the columns of
+        ThesisPanelSchedulerFinal.create_schedule. Lecturers with a panel less than
+        MIN_TIME_GAP before or after, MAX_DAILY_ASSIGNMENTS on the date or an
+        absence in the slot are skipped."""
+        intervals = LecturerIntervalIndex(int(self.MIN_TIME_GAP.total_seconds()))
+        daily = {}  # (lecturer id, date) -> assignments
+
+        sorted_defenses = self.schedule_df.sort_values(['date', 'time'])
+        for defense_id, defense in zip(sorted_defenses.index, sorted_defenses.to_dict('records')):
+            date, time = defense['date'], defense['time']
+            absent = self.calendar.unavailable(date, time) if self.calendar is not None else None
+            unavailable = {
+                lid for lid in self.field_lecturers.get(defense['bidang'], ())
+                if (daily.get((lid, date), 0) >= self.MAX_DAILY_ASSIGNMENTS or intervals.conflicts(lid, date, time)
+                    or (absent is not None and absent[self.lecturer_order[lid]]))
+            }
+            role_assignments = self.schedule_defense(defense_id, print_details=False, unavailable=unavailable)
+            for lid in role_assignments.values():
+                intervals.add(lid, date, time)
+                daily[(lid, date)] = daily.get((lid, date), 0) + 1
+
+            yield {
+                'tanggal': date,
+                'waktu': time,
+                'ruang': defense['ruang'],
+                'mahasiswa_id': defense['mahasiswa_id'],
+                'judul': defense['judul'],
+                'bidang': defense['bidang'],
+                **{column: role_assignments.get(role) for role, column in self.ROLE_COLUMNS.items()}
+            }
+
+    def create_schedule(self):
+        """Create complete schedule"""
+        return pd.DataFrame(list(self.iter_schedule()))
+
     def analyze_schedule(self, complete_schedule):
         workload_series = pd.Series(self.lecturer_workload)
         expertise_matches = 0
@@ -60,30 +117,21 @@ class FinalThesisScheduler:
                 if defense['bidang'] in self.lecturer_expertise[lecturer_id]:
                     expertise_matches += 1
         workload_std = workload_series.std()
-        balance_score = 1.0 / (1.0 + workload_std)
+        return {
+            'expertise_ratio': expertise_matches / max(total_assignments, 1),
+            'balanceScore': 1.0 / (1.0 + workload_std),
+        }
 
     def verify_schedule(self, complete_schedule):
-        expertise_violations = 0
-        time_conflicts = 0
-        workload_violations = 0
-
-        for defense_id, assignments in complete_schedule.items():
-            defense = self.schedule_df.loc[defense_id]
-
-            # Check each assigned lecturer
-            for role, lecturer_id in assignments.items():
-                # Expertise check
-                if defense['bidang'] not in self.lecturer_expertise[lecturer_id]:
-                    expertise_violations += 1
-
-                # Time conflict check
-                time_conflict = False
-                for other_id, other_assignments in complete_schedule.items():
-                    if other_id != defense_id:
-                        other_defense = self.schedule_df.loc[other_id]
-                        if (other_defense['date'] == defense['date'] and
-                            other_defense['time'] == defense['time'] and
-                            lecturer_id in other_assignments.values()):
-                            time_conflicts += 1
-        return expertise_violations == 0 and time_conflicts == 0
+        defense_ids = list(complete_schedule.keys())
+        defenses = self.schedule_df.loc[defense_ids, ['date', 'time', 'bidang']]
 
+        result = verify_assignments(
+            (
+                (date, time, field, list(complete_schedule[defense_id].values()))
+                for defense_id, date, time, field in zip(defense_ids, defenses['date'], defenses['time'],
+                                                         defenses['bidang'])
+            ),
+            lecturer_expertise=self.lecturer_expertise,
+        )
+        return result['expertise_violations'] == 0 and result['time_conflicts'] == 0
@@ -0,0 +1,294 @@
+import heapq
+import importlib.util
+import math
+
+import numpy as np
+import pandas as pd
+
+from rl_impelementation.compiled_instance import CompiledInstance
+from rl_impelementation.panel_rules import ROLE_COLUMNS, default_max_workload
+
+# Integer costs: an empty role costs more than any balance/expertise trade-off
+UNFILLED_COST = 1_000_000
+BALANCE_WEIGHT = 10  # the k-th assignment of a lecturer costs BALANCE_WEIGHT * (2k - 1), i.e. sum of squared loads
+EXPERTISE_WEIGHT = 10  # generalists cost up to EXPERTISE_WEIGHT more than specialists
+
+
+class MinCostFlow:
+    """Directed graph with integer capacities and costs, solved for a required
+    flow from source to sink with either SciPy (HiGHS LP) or pure Python
+    (successive shortest paths with Dijkstra potentials; costs must be >= 0)."""
+
+    def __init__(self, n_nodes):
+        self.n_nodes = n_nodes
+        self.tails, self.heads, self.caps, self.costs = [], [], [], []
+
+    def add_edge(self, tail, head, cap, cost):
+        self.tails.append(tail)
+        self.heads.append(head)
+        self.caps.append(cap)
+        self.costs.append(cost)
+        return len(self.tails) - 1
+
+    def solve(self, source, sink, flow, solver="auto"):
+        """Flow per edge (NumPy int array) of a min-cost flow of the given value"""
+        if solver == "auto":
+            solver = "scipy" if importlib.util.find_spec("scipy") is not None else "python"
+        if solver == "scipy":
+            return self.solve_scipy(source, sink, flow)
+        if solver == "python":
+            return self.solve_python(source, sink, flow)
+        raise ValueError(f"Unknown solver: {solver}")
+
+    def solve_scipy(self, source, sink, flow):
+        from scipy.optimize import linprog
+        from scipy.sparse import coo_array
+
+        # Node-arc incidence matrix; it is totally unimodular, so the vertex the
+        # dual simplex ends on is integral (interior point would not guarantee one)
+        n_edges = len(self.tails)
+        rows = np.concatenate([self.tails, self.heads])
+        cols = np.concatenate([np.arange(n_edges), np.arange(n_edges)])
+        values = np.concatenate([np.ones(n_edges), -np.ones(n_edges)])
+        incidence = coo_array((values, (rows, cols)), shape=(self.n_nodes, n_edges)).tocsr()
+
+        supply = np.zeros(self.n_nodes)
+        supply[source] = flow
+        supply[sink] = -flow
+
+        # HiGHS presolve takes far longer than the simplex itself on these networks
+        result = linprog(self.costs, A_eq=incidence, b_eq=supply, bounds=np.column_stack([np.zeros(n_edges), self.caps]),
+                         method="highs-ds", options={"presolve": False})
+        if result.status != 0:
+            raise ValueError(f"Min-cost flow failed: {result.message}")
+        edge_flow = np.rint(result.x).astype(np.int64)
+        if not self.is_feasible(edge_flow, supply, result.x):
+            # Not a clean vertex (e.g. numerical trouble): solve exactly instead
+            return self.solve_python(source, sink, flow)
+        return edge_flow
+
+    def is_feasible(self, edge_flow, supply, lp_flow=None):
+        """Whether integer edge_flow fits the capacities and conserves flow (and is lp_flow rounded)"""
+        if lp_flow is not None and not np.allclose(lp_flow, edge_flow, rtol=0, atol=1e-6):
+            return False
+        if (edge_flow < 0).any() or (edge_flow > np.asarray(self.caps)).any():
+            return False
+        balance = (np.bincount(self.tails, edge_flow, self.n_nodes)
+                   - np.bincount(self.heads, edge_flow, self.n_nodes))
+        return np.array_equal(balance, supply)
+
+    def solve_python(self, source, sink, flow):
+        n_edges = len(self.tails)
+        # Residual graph: edge e and its reverse e ^ 1
+        to, cap, cost = [0] * (2 * n_edges), [0] * (2 * n_edges), [0] * (2 * n_edges)
+        adjacency = [[] for _ in range(self.n_nodes)]
+        for e, (tail, head, c, w) in enumerate(zip(self.tails, self.heads, self.caps, self.costs)):
+            to[2 * e], cap[2 * e], cost[2 * e] = head, c, w
+            to[2 * e + 1], cap[2 * e + 1], cost[2 * e + 1] = tail, 0, -w
+            adjacency[tail].append(2 * e)
+            adjacency[head].append(2 * e + 1)
+
+        potential = [0] * self.n_nodes
+        remaining = flow
+        while remaining > 0:
+            distance = [math.inf] * self.n_nodes
+            parent = [-1] * self.n_nodes
+            distance[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > distance[node]:
+                    continue
+                for e in adjacency[node]:
+                    if cap[e] > 0:
+                        head = to[e]
+                        nd = d + cost[e] + potential[node] - potential[head]
+                        if nd < distance[head]:
+                            distance[head] = nd
+                            parent[head] = e
+                            heapq.heappush(heap, (nd, head))
+
+            if distance[sink] == math.inf:
+                raise ValueError("Min-cost flow failed: the required flow does not fit")
+            for node in range(self.n_nodes):
+                if distance[node] < math.inf:
+                    potential[node] += distance[node]
+
+            push, node = remaining, sink
+            while node != source:
+                e = parent[node]
+                push = min(push, cap[e])
+                node = to[e ^ 1]
+            node = sink
+            while node != source:
+                e = parent[node]
+                cap[e] -= push
+                cap[e ^ 1] += push
+                node = to[e ^ 1]
+            remaining -= push
+
+        return np.array([cap[2 * e + 1] for e in range(n_edges)], dtype=np.int64)
+
+
+class FlowPanelScheduler:
+    """Fills all panels at once as a min-cost flow instead of defense by defense.
+
+    Same limits as ThesisPanelSchedulerFinal: expertise in the field, at most
+    MAX_WORKLOAD assignments per lecturer, MAX_DAILY_ASSIGNMENTS per date and
+    no two panels of one lecturer less than MIN_TIME_GAP apart or in a slot
+    the lecturer is absent. Slots closer than MIN_TIME_GAP are chained into
+    clusters in which a lecturer sits at most once (and not at all when absent
+    in any of its slots); for the usual 2-hour grid a cluster is a single
+    slot, otherwise this is slightly stricter than the gap rule.
+
+    Defenses of one field in one cluster are interchangeable, so the network
+    has a node per (cluster, field) rather than per defense:
+
+        source -> (cluster, field) -> (lecturer, cluster) -> (lecturer, date) -> lecturer -> sink
+
+    Empty roles are a costly bypass from (cluster, field) to the sink. The flow
+    therefore first fills as many roles as the limits allow, then minimizes
+    the sum of squared workloads, then prefers specialists.
+    """
+
+    def __init__(self, schedule_df, lecturer_expertise, solver="auto", max_workload=None, absences=None):
+        self.schedule_df = schedule_df.copy()
+        self.lecturer_expertise = lecturer_expertise
+        self.solver = solver
+        self.MIN_TIME_GAP = pd.Timedelta(hours=2)
+        self.MAX_WORKLOAD = max_workload or default_max_workload(len(schedule_df), len(lecturer_expertise))
+        self.MAX_DAILY_ASSIGNMENTS = 2
+        self.instance = CompiledInstance(schedule_df, lecturer_expertise, int(self.MIN_TIME_GAP.total_seconds()),
+                                         absences)
+
+    def slot_clusters(self):
+        """Cluster id per slot: slots connected by gap conflicts share a cluster"""
+        cluster = list(range(self.instance.n_slots))
+
+        def find(slot):
+            while cluster[slot] != slot:
+                cluster[slot] = cluster[cluster[slot]]
+                slot = cluster[slot]
+            return slot
+
+        for slot, neighbors in enumerate(self.instance.slot_neighbors):
+            for neighbor in neighbors:
+                cluster[find(int(neighbor))] = find(slot)
+        roots = [find(slot) for slot in range(self.instance.n_slots)]
+        _, cluster_ids = np.unique(roots, return_inverse=True)
+        return cluster_ids
+
+    def build_network(self):
+        instance = self.instance
+        slot_cluster = self.slot_clusters()
+        defense_cluster = slot_cluster[instance.defense_slot]
+        cluster_date = {}
+        for slot, (date, _) in enumerate(instance.slots):
+            cluster_date[slot_cluster[slot]] = date
+        dates = {date: i for i, date in enumerate(dict.fromkeys(cluster_date.values()))}
+
+        # Lecturers absent in any slot of a cluster get no edge into it
+        cluster_absent = None
+        if instance.calendar is not None:
+            cluster_absent = np.zeros((slot_cluster.max() + 1, instance.n_lecturers), dtype=bool)
+            for slot, cluster in enumerate(slot_cluster):
+                cluster_absent[cluster] |= instance.calendar.unavailable_at(slot)
+
+        # Defenses per (cluster, field), in schedule order
+        groups = {}
+        for d in np.lexsort((np.arange(instance.n_defenses), instance.defense_field, defense_cluster)):
+            groups.setdefault((int(defense_cluster[d]), int(instance.defense_field[d])), []).append(int(d))
+
+        n_lecturers = instance.n_lecturers
+        nodes = {}
+
+        def node(key):
+            if key not in nodes:
+                nodes[key] = len(nodes)
+            return nodes[key]
+
+        source, sink = node(('source',)), node(('sink',))
+        edges = []  # (tail, head, cap, cost); group edges are remembered for decoding
+        group_edges = []  # (edge position, group key, lecturer index)
+
+        for key, defenses in groups.items():
+            cluster, field = key
+            roles = 4 * len(defenses)
+            group = node(('group', key))
+            edges.append((source, group, roles, 0))
+            edges.append((group, sink, roles, UNFILLED_COST))
+            scores = instance.expertise_score[field]
+            eligible = instance.eligible[field]
+            if cluster_absent is not None:
+                eligible = eligible[~cluster_absent[cluster, eligible]]
+            for l_idx in eligible:
+                cost = int(round(EXPERTISE_WEIGHT * (1 - scores[l_idx] / 3.0)))
+                group_edges.append((len(edges), key, int(l_idx)))
+                edges.append((group, node(('lecturer_cluster', int(l_idx), cluster)), 1, cost))
+
+        for (kind, *rest), tail in list(nodes.items()):
+            if kind == 'lecturer_cluster':
+                l_idx, cluster = rest
+                edges.append((tail, node(('lecturer_date', l_idx, dates[cluster_date[cluster]])), 1, 0))
+        for (kind, *rest), tail in list(nodes.items()):
+            if kind == 'lecturer_date':
+                l_idx, _ = rest
+                edges.append((tail, node(('lecturer', l_idx)), self.MAX_DAILY_ASSIGNMENTS, 0))
+        for l_idx in range(n_lecturers):
+            if ('lecturer', l_idx) in nodes:
+                lecturer = nodes[('lecturer', l_idx)]
+                for k in range(1, self.MAX_WORKLOAD + 1):
+                    edges.append((lecturer, sink, 1, BALANCE_WEIGHT * (2 * k - 1)))
+
+        network = MinCostFlow(len(nodes))
+        for tail, head, cap, cost in edges:
+            network.add_edge(tail, head, cap, cost)
+        total_roles = 4 * instance.n_defenses
+        return network, source, sink, total_roles, groups, group_edges
+
+    def solve(self):
+        """Lecturer indices per defense index (up to 4, lecturer order)"""
+        network, source, sink, total_roles, groups, group_edges = self.build_network()
+        flows = network.solve(source, sink, total_roles, self.solver)
+
+        chosen = {}
+        for position, key, l_idx in group_edges:
+            if flows[position] > 0:
+                chosen.setdefault(key, []).append(l_idx)
+
+        # Each lecturer appears once per cluster, so any split keeps panels distinct;
+        # dealing them out round-robin spreads empty roles over the group
+        panels = {}
+        for key, defenses in groups.items():
+            lecturers = chosen.get(key, [])
+            for i, d in enumerate(defenses):
+                panels[d] = lecturers[i::len(defenses)]
+        return panels
+
+    def iter_schedule(self):
+        """Yield the schedule rows one by one (all panels are solved before the first)"""
+        panels = self.solve()
+        lecturer_ids = self.instance.lecturer_ids
+        workload = np.zeros(self.instance.n_lecturers, dtype=np.int64)
+        for lecturers in panels.values():
+            workload[lecturers] += 1
+
+        sorted_defenses = self.schedule_df.sort_values(['date', 'time'])
+        for defense_id, defense in zip(sorted_defenses.index, sorted_defenses.to_dict('records')):
+            lecturers = panels[self.instance.defense_index[defense_id]]
+            # Roles go to the least loaded lecturers first, as in the greedy order
+            ordered = sorted(lecturers, key=lambda l_idx: (workload[l_idx], l_idx))
+            panel = {role: lecturer_ids[ordered[i]] if i < len(ordered) else None for i, role in enumerate(ROLE_COLUMNS)}
+            yield {
+                'tanggal': defense['date'],
+                'waktu': defense['time'],
+                'ruang': defense['ruang'],
+                'mahasiswa_id': defense['mahasiswa_id'],
+                'judul': defense['judul'],
+                'bidang': defense['bidang'],
+                **panel
+            }
+
+    def create_schedule(self):
+        """Create complete schedule (same columns as ThesisPanelSchedulerFinal.create_schedule)"""
+        return pd.DataFrame(list(self.iter_schedule()))
@@ -0,0 +1,177 @@
+import io
+import zipfile
+from contextlib import nullcontext
+from xml.etree.ElementTree import ParseError
+
+import pandas as pd
+
+from rl_impelementation.availability import date_key, time_range
+from rl_impelementation.interval_index import to_seconds
+
+DOSEN_COLUMNS = ['id', 'keahlian']
+JADWAL_COLUMNS = ['date', 'time', 'bidang', 'ruang', 'mahasiswa_id', 'judul']
+# Plus an optional time column (empty for the whole date)
+AVAILABILITY_COLUMNS = ['id', 'date']
+
+
+class IngestionError(ValueError):
+    """Uploaded data that cannot be scheduled (unknown format, missing columns, ...)"""
+
+
+def open_source(source):
+    """Paths and file objects are used as they are, raw bytes are wrapped in a buffer"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def detect_format(head: bytes) -> str:
+    """Guess the format from the first bytes of the data"""
+    if head.startswith(b'PK\x03\x04'):
+        return 'xlsx'
+    if head.startswith(b'\xd0\xcf\x11\xe0'):
+        return 'xls'
+    if head.startswith(b'PAR1'):
+        return 'parquet'
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n')[:1] in (b'[', b'{'):
+        return 'json'
+    return 'csv'
+
+
+def excel_errors():
+    """Errors of the Excel readers for data that is not a workbook (a broken zip, a zip of other files)"""
+    errors = (zipfile.BadZipFile, KeyError, ParseError, OSError)
+    try:
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        return errors
+    return errors + (InvalidFileException,)
+
+
+def read_table(source) -> pd.DataFrame:
+    """Read an Excel, CSV, JSON or Parquet table from a path, file object or bytes"""
+    source = open_source(source)
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return read_table(f)
+
+    head = source.read(64)
+    source.seek(0)
+    file_format = detect_format(head)
+
+    try:
+        if file_format == 'xlsx':
+            # Named, since pandas would take a zip that is not a workbook for another format
+            return pd.read_excel(source, engine='openpyxl')
+        if file_format == 'xls':
+            return pd.read_excel(source)
+        if file_format == 'parquet':
+            return pd.read_parquet(source)
+        if file_format == 'json':
+            return pd.read_json(source, convert_dates=False)
+        return pd.read_csv(source)
+    except ImportError as e:
+        raise IngestionError(f"Reading {file_format} files needs an optional dependency: {e}")
+    except ValueError as e:
+        raise IngestionError(f"Could not read {file_format} data: {e}")
+    except excel_errors() as e:
+        if file_format not in ('xlsx', 'xls'):
+            raise
+        raise IngestionError(f"Could not read {file_format} data: {e}")
+
+
+def validate_columns(df: pd.DataFrame, columns, name: str):
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise IngestionError(f"{name} is missing columns: {', '.join(missing)}")
+
+    empty = [column for column in columns if df[column].isna().any()]
+    if empty:
+        raise IngestionError(f"{name} has empty values in columns: {', '.join(empty)}")
+
+
+def validate_times(jadwal_df: pd.DataFrame):
+    unreadable = [time for time in jadwal_df['time'].unique() if to_seconds(time) is None]
+    if unreadable:
+        raise IngestionError(f"jadwal has unreadable times: {', '.join(map(str, unreadable[:5]))}")
+
+
+def parse_expertise(dosen_df: pd.DataFrame) -> dict:
+    """{lecturer id: [field, ...]} from the comma separated keahlian column"""
+    keahlian = dosen_df['keahlian'].reset_index(drop=True)
+    fields = keahlian.astype(str).str.split(',').explode().str.strip()
+    per_row = fields.groupby(level=0, sort=False).agg(list)
+    return dict(zip(dosen_df['id'], per_row))
+
+
+def validate_coverage(jadwal_df: pd.DataFrame, lecturer_expertise: dict):
+    """Every defense field needs at least one lecturer with that expertise"""
+    known_fields = {field for expertise in lecturer_expertise.values() for field in expertise}
+    uncovered = sorted(set(jadwal_df['bidang']) - known_fields)
+    if uncovered:
+        raise IngestionError(f"No lecturer has expertise in: {', '.join(map(str, uncovered))}")
+
+
+def load_inputs(dosen_source, jadwal_source, timer=None):
+    """Read and validate both uploads; returns (jadwal_df, lecturer_expertise).
+
+    With a PhaseTimer, reading goes into the "parse" phase and building the
+    expertise into "expertise".
+    """
+    def phase(name):
+        return timer.phase(name) if timer is not None else nullcontext()
+
+    with phase('parse'):
+        dosen_df = read_table(dosen_source)
+        validate_columns(dosen_df, DOSEN_COLUMNS, 'dosen')
+
+        jadwal_df = read_table(jadwal_source)
+        validate_columns(jadwal_df, JADWAL_COLUMNS, 'jadwal')
+        validate_times(jadwal_df)
+
+    with phase('expertise'):
+        lecturer_expertise = parse_expertise(dosen_df)
+        validate_coverage(jadwal_df, lecturer_expertise)
+
+    return jadwal_df, lecturer_expertise
+
+
+def load_availability(availability_source, jadwal_df, lecturer_expertise, timer=None):
+    """Read and validate an availability upload; returns [(lecturer id, date, time or None), ...].
+
+    Every row is a period in which a lecturer cannot sit on a panel: the
+    whole date when time is empty or missing, the slot starting at time
+    ("10:00"), or every slot starting within a range ("08:00 - 12:00").
+    Every date must be a jadwal date, as an absence on any other date
+    (a typo, another date format) would silently not apply. With a
+    PhaseTimer, this goes into the "availability" phase.
+    """
+    with timer.phase('availability') if timer is not None else nullcontext():
+        availability_df = read_table(availability_source)
+        validate_columns(availability_df, AVAILABILITY_COLUMNS, 'availability')
+
+        unknown = [lid for lid in availability_df['id'].unique() if lid not in lecturer_expertise]
+        if unknown:
+            raise IngestionError(f"availability has unknown lecturers: {', '.join(map(str, unknown[:5]))}")
+
+        if 'time' in availability_df.columns:
+            times = [None if pd.isna(time) or not str(time).strip() else str(time).strip()
+                     for time in availability_df['time']]
+        else:
+            times = [None] * len(availability_df)
+        unreadable = []
+        for time in dict.fromkeys(time for time in times if time is not None):
+            try:
+                time_range(time)
+            except ValueError:
+                unreadable.append(time)
+        if unreadable:
+            raise IngestionError(f"availability has unreadable times: {', '.join(unreadable[:5])}")
+
+        dates = [date_key(date) for date in availability_df['date']]
+        jadwal_dates = set(jadwal_df['date'].map(date_key))
+        unmatched = [date for date in dict.fromkeys(dates) if date not in jadwal_dates]
+        if unmatched:
+            raise IngestionError(f"availability has dates that are not in jadwal: {', '.join(unmatched[:5])}")
+
+        return list(zip(availability_df['id'], dates, times))
@@ -0,0 +1,92 @@
+import bisect
+import datetime
+import functools
+import re
+
+import pandas as pd
+
+TIME_PATTERN = re.compile(r'(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?')
+
+
+def to_seconds(time):
+    """Start of a time slot in seconds after midnight.
+
+    Accepts datetime.time/datetime values, Timedeltas and strings such as
+    "08:00", "08.00 WIB" or "08:00 - 10:00" (the start is used). Returns None
+    when no time can be found.
+    """
+    if isinstance(time, (datetime.datetime, pd.Timestamp)):
+        time = time.time()
+    if isinstance(time, datetime.time):
+        return time.hour * 3600 + time.minute * 60 + time.second
+    if isinstance(time, (datetime.timedelta, pd.Timedelta)):
+        return int(time.total_seconds())
+
+    return parse_time_string(str(time))
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_time_string(time):
+    match = TIME_PATTERN.search(time)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds or 0)
+
+
+class LecturerIntervalIndex:
+    """Per-lecturer sorted start times per date.
+
+    Two assignments of one lecturer conflict when they are on the same date and
+    start less than min_gap seconds apart (the same slot included). Lookups and
+    inserts are a bisect on that lecturer's starts for the date.
+    """
+
+    def __init__(self, min_gap):
+        self.min_gap = min_gap
+        self.starts = {}  # lecturer id -> {date: [start seconds, ...]}
+
+    def conflicts(self, lecturer_id, date, time):
+        starts = self.starts.get(lecturer_id, {}).get(date)
+        if not starts:
+            return False
+
+        start = to_seconds(time)
+        pos = bisect.bisect_left(starts, start)
+        if pos < len(starts) and starts[pos] - start < self.min_gap:
+            return True
+        return pos > 0 and start - starts[pos - 1] < self.min_gap
+
+    def add(self, lecturer_id, date, time):
+        bisect.insort(self.starts.setdefault(lecturer_id, {}).setdefault(date, []), to_seconds(time))
+
+    def remove(self, lecturer_id, date, time):
+        starts = self.starts.get(lecturer_id, {}).get(date)
+        if starts:
+            pos = bisect.bisect_left(starts, to_seconds(time))
+            if pos < len(starts) and starts[pos] == to_seconds(time):
+                starts.pop(pos)
+
+    def clear(self):
+        self.starts = {}
+
+
+def gap_neighbors(slots, min_gap):
+    """For each (date, time) slot, the indices of the slots that conflict with it
+    (same date, starts less than min_gap apart, itself included)"""
+    by_date = {}
+    neighbors = [[i] for i in range(len(slots))]  # slots without a readable time only conflict with themselves
+    for i, (date, time) in enumerate(slots):
+        start = to_seconds(time)
+        if start is not None:
+            by_date.setdefault(date, []).append((start, i))
+
+    for date_slots in by_date.values():
+        date_slots.sort()
+        starts = [start for start, _ in date_slots]
+        for start, i in date_slots:
+            lo = bisect.bisect_right(starts, start - min_gap)
+            hi = bisect.bisect_left(starts, start + min_gap)
+            neighbors[i] = [j for _, j in date_slots[lo:hi]]
+
+    return neighbors
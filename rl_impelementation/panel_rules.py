@@ -0,0 +1,9 @@
+import math
+
+# Schedule columns of the four roles on every panel, in panel order
+ROLE_COLUMNS = ['penguji1_id', 'penguji2_id', 'pembimbing1_id', 'pembimbing2_id']
+
+
+def default_max_workload(n_defenses, n_lecturers, roles_per_defense=len(ROLE_COLUMNS)):
+    """MAX_WORKLOAD when none is given: an even share of all roles per lecturer, rounded up"""
+    return math.ceil(n_defenses * roles_per_defense / n_lecturers)
@@ -0,0 +1,200 @@
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from rl_impelementation.engines import make_panel_engine, run_engine
+from rl_impelementation.panel_rules import ROLE_COLUMNS, default_max_workload
+from rl_impelementation.schedule_verifier import verify_assignments
+from rl_impelementation.thesis_defense_scheduler import ThesisDefenseScheduler, get_rollout_pool, rollout_seed
+
+# Latency budget of a portfolio run when the request gives no deadline
+DEFAULT_DEADLINE_MS = 10_000
+# Greedy runs with a shuffled lecturer and defense order, besides the plain one
+GREEDY_VARIANTS = 3
+
+# Objective: expertise ratio + balance score (each at most 1), minus penalties that
+# outweigh any difference in those two; a violation costs more than an empty role
+VIOLATION_PENALTY = 10.0
+EMPTY_ROLE_PENALTY = 2.0
+
+# Role the lecturer chosen by the RL search keeps in the panel of the rl candidate
+RL_ROLE = 'penguji1_id'
+# Share of the budget the RL search may use, the rest is left for its panels and scoring
+RL_DEADLINE_SHARE = 0.9
+
+
+def score_schedule(final_schedule, lecturer_expertise, max_workload):
+    """The objective every portfolio candidate is ranked by (higher is better), with its parts"""
+    panels = final_schedule[ROLE_COLUMNS].astype(object)
+    panels = panels.where(panels.notna(), None).values.tolist()
+    verification = verify_assignments(zip(final_schedule['tanggal'], final_schedule['waktu'],
+                                          final_schedule['bidang'], panels),
+                                      lecturer_expertise=lecturer_expertise, max_workload=max_workload)
+
+    workload = Counter(lecturer_id for panel in panels for lecturer_id in panel if lecturer_id is not None)
+    workload_std = float(pd.Series([workload.get(lid, 0) for lid in lecturer_expertise]).std(ddof=0))
+    balance_score = 1.0 / (1.0 + workload_std)
+    expertise_ratio = 1.0 - verification['expertise_violations'] / max(verification['total_assignments'], 1)
+    violations = sum(verification[key] for key in ('expertise_violations', 'time_conflicts', 'gap_violations',
+                                                   'daily_violations', 'workload_violations'))
+
+    return {
+        'objective': (expertise_ratio + balance_score
+                      - VIOLATION_PENALTY * violations - EMPTY_ROLE_PENALTY * verification['empty_roles']),
+        'expertiseRatio': expertise_ratio,
+        'balanceScore': balance_score,
+        'workloadStd': workload_std,
+        'violations': violations,
+        'emptyRoles': verification['empty_roles'],
+    }
+
+
+def portfolio_candidates(n_variants=GREEDY_VARIANTS):
+    """(engine, variant) pairs, cheapest first (the order they run in on a single worker)"""
+    return ([('greedy', 0), ('score', 0)] + [('greedy', variant) for variant in range(1, n_variants + 1)]
+            + [('flow', 0), ('rl', 0)])
+
+
+def shuffled(schedule_df, lecturer_expertise, seed, variant):
+    """The same problem with lecturers and defenses in a seeded random order (greedy tie-breaking)"""
+    rng = np.random.default_rng([seed or 0, variant])
+    lecturer_ids = list(lecturer_expertise)
+    order = rng.permutation(len(lecturer_ids))
+    return (schedule_df.iloc[rng.permutation(len(schedule_df))],
+            {lecturer_ids[i]: lecturer_expertise[lecturer_ids[i]] for i in order})
+
+
+def run_candidate(candidate, schedule_df, lecturer_expertise, max_workload, seed=None, rl_deadline_at=None,
+                  q_entries=None, q_episodes=0, max_iterations=500, patience=None, min_improvement=0.0,
+                  absences=None):
+    """One candidate schedule and its score.
+
+    The rl candidate runs the RL search until rl_deadline_at and keeps the
+    lecturer it picks for each defense on the greedy panel; the others are a
+    panel engine on the problem, or on a shuffled copy for variants above 0.
+    """
+    engine, variant = candidate
+    started = time.perf_counter()
+    result = {'engine': engine, 'variant': variant}
+
+    if engine == 'rl':
+        scheduler = ThesisDefenseScheduler(schedule_df, lecturer_expertise, absences=absences)
+        if q_entries:
+            scheduler.load_q_table(q_entries, q_episodes)
+        deadline_ms = max(1, int((rl_deadline_at - time.time()) * 1000)) if rl_deadline_at is not None else None
+        best_schedule, best_reward = scheduler.schedule_defenses(schedule_df, lecturer_expertise,
+                                                                 max_iterations=max_iterations, seed=seed,
+                                                                 patience=patience, min_improvement=min_improvement,
+                                                                 deadline_ms=deadline_ms)
+        keep = {defense_id: {RL_ROLE: lecturer_id} for defense_id, lecturer_id in best_schedule or ()}
+        final_schedule = run_engine(make_panel_engine('greedy', schedule_df, lecturer_expertise, max_workload,
+                                                      absences), keep=keep)
+        result.update(best_schedule=best_schedule, best_reward=best_reward, iterations=scheduler.iterations_run,
+                      q_entries=scheduler.q_table.to_entries(), q_episodes=scheduler.q_table.episodes)
+    else:
+        problem = (schedule_df, lecturer_expertise) if variant == 0 else \
+            shuffled(schedule_df, lecturer_expertise, seed, variant)
+        final_schedule = run_engine(make_panel_engine(engine, *problem, max_workload, absences))
+
+    # Every candidate in the same row order, whatever order it solved the defenses in
+    final_schedule = final_schedule.loc[schedule_df.sort_values(['date', 'time']).index]
+    result.update(final_schedule=final_schedule,
+                  score=score_schedule(final_schedule, lecturer_expertise, max_workload),
+                  ms=round((time.perf_counter() - started) * 1000, 2))
+    return result
+
+
+def solve_portfolio(schedule_df, lecturer_expertise, q_entries=None, q_episodes=0, max_iterations=500,
+                    n_workers=1, seed=None, patience=None, min_improvement=0.0, deadline_ms=None,
+                    absences=None, timer=None, on_row=None):
+    """Race every engine (and greedy variants) under one deadline and keep the best schedule.
+
+    With several workers all candidates are submitted to the rollout pool at
+    once and whatever finished by the deadline is compared; a candidate still
+    running then keeps its worker busy until it is done (the RL search stops
+    at RL_DEADLINE_SHARE of the budget itself). With one worker the candidates run one after
+    the other, cheapest first, until the deadline. Either way at least one
+    candidate finishes. Candidates are ranked by score_schedule, ties going
+    to the earlier candidate.
+
+    Returns the same dict as components.solve_components; analysis also has
+    a "portfolio" list with the outcome of every candidate.
+    """
+    max_workload = default_max_workload(len(schedule_df), len(lecturer_expertise))
+    budget = (deadline_ms if deadline_ms is not None else DEFAULT_DEADLINE_MS) / 1000
+    deadline_at = time.time() + budget
+    if n_workers > 1:
+        seed = rollout_seed(seed)
+    options = dict(seed=seed, rl_deadline_at=deadline_at - (1 - RL_DEADLINE_SHARE) * budget,
+                   q_entries=q_entries, q_episodes=q_episodes, max_iterations=max_iterations,
+                   patience=patience, min_improvement=min_improvement, absences=absences)
+    candidates = portfolio_candidates()
+
+    outcomes = {}  # candidate -> result, or the exception it raised
+    with timer.phase("portfolio") if timer is not None else nullcontext():
+        if n_workers == 1:
+            for candidate in candidates:
+                if outcomes and time.time() >= deadline_at:
+                    break
+                try:
+                    outcomes[candidate] = run_candidate(candidate, schedule_df, lecturer_expertise, max_workload,
+                                                        **options)
+                except Exception as e:
+                    outcomes[candidate] = e
+        else:
+            pool = get_rollout_pool(n_workers)
+            futures = {pool.submit(run_candidate, candidate, schedule_df, lecturer_expertise, max_workload,
+                                   **options): candidate
+                       for candidate in candidates}
+            done, _ = wait(futures, timeout=max(0.0, deadline_at - time.time()))
+            while not any(future.exception() is None for future in done) and len(done) < len(futures):
+                # Nothing usable by the deadline: take the first candidate that finishes. Only the
+                # pending ones are waited on, as failed ones would make wait() return at once
+                finished, _ = wait([future for future in futures if not future.done()],
+                                   return_when=FIRST_COMPLETED)
+                done |= finished
+            for future in futures:
+                future.cancel()
+            for future, candidate in futures.items():
+                if future in done:
+                    outcomes[candidate] = future.exception() or future.result()
+
+    finished = [outcomes[candidate] for candidate in candidates
+                if candidate in outcomes and not isinstance(outcomes[candidate], Exception)]
+    if not finished:
+        raise next(outcome for outcome in outcomes.values() if isinstance(outcome, Exception))
+    winner = max(finished, key=lambda result: result['score']['objective'])
+
+    summary = []
+    for candidate in candidates:
+        outcome = outcomes.get(candidate)
+        entry = {'engine': candidate[0], 'variant': candidate[1]}
+        if outcome is None:
+            entry['status'] = 'timeout'
+        elif isinstance(outcome, Exception):
+            entry.update(status='failed', error=f"{type(outcome).__name__}: {outcome}")
+        else:
+            entry.update(status='done', winner=outcome is winner, ms=outcome['ms'], **outcome['score'])
+        summary.append(entry)
+
+    if on_row is not None:
+        for row in winner['final_schedule'].to_dict('records'):
+            on_row(row)
+
+    rl = outcomes.get(('rl', 0))
+    rl = rl if isinstance(rl, dict) else {}
+    return {
+        'final_schedule': winner['final_schedule'],
+        'best_schedule': rl.get('best_schedule'),
+        'best_reward': rl.get('best_reward'),
+        'iterations': rl.get('iterations', 0),
+        'analysis': {'expertise_ratio': winner['score']['expertiseRatio'],
+                     'balanceScore': winner['score']['balanceScore'],
+                     'portfolio': summary},
+        'q_entries': rl.get('q_entries'),
+        'q_episodes': rl.get('q_episodes', 0),
+    }
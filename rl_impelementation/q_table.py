@@ -0,0 +1,118 @@
+import numpy as np
+
+LOAD_BUCKETS = 4  # <0.5, <1.0, <1.5 and >=1.5 times the target workload
+
+
+def to_builtin(value):
+    """NumPy scalars (e.g. lecturer ids read from Excel) to plain Python for JSON"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+class QTable:
+    """Q-values over (field, time slot, lecturer load bucket) -> lecturer.
+
+    The table holds the learned value of the state that follows an assignment;
+    Q(s, a) is the immediate reward plus the discounted table entry.
+
+    Arrays are indexed with the ids of a CompiledInstance. Exported entries use
+    field names, times and lecturer ids instead, so a table learned on one term
+    can warm-start the next one.
+    """
+
+    def __init__(self, instance, discount_factor=0.9, entries=None):
+        self.instance = instance
+        self.discount_factor = discount_factor
+        shape = (len(instance.fields), len(instance.times), LOAD_BUCKETS, instance.n_lecturers)
+        self.q = np.zeros(shape, dtype=np.float64)
+        self.visits = np.zeros(shape, dtype=np.int64)
+        self.episodes = 0
+
+        if entries:
+            self.load_entries(entries)
+
+    def copy(self):
+        table = QTable(self.instance, self.discount_factor)
+        table.q = self.q.copy()
+        table.visits = self.visits.copy()
+        table.episodes = self.episodes
+        return table
+
+    def load_buckets(self, loads):
+        target = max(self.instance.target_workload, 1e-9)
+        return np.minimum((loads / target * 2).astype(np.int64), LOAD_BUCKETS - 1)
+
+    def state_index(self, defense_idx, lecturer_idxs, loads):
+        return (self.instance.defense_field[defense_idx],
+                self.instance.defense_time[defense_idx],
+                self.load_buckets(loads),
+                lecturer_idxs)
+
+    def values(self, defense_idx, lecturer_idxs, loads, rewards):
+        """Q-values of the candidate lecturers.
+
+        The immediate reward is exact, only the value of what follows is
+        learned; unvisited entries assume the same reward keeps coming.
+        """
+        index = self.state_index(defense_idx, lecturer_idxs, loads)
+        future = np.where(self.visits[index] > 0, self.q[index], rewards / (1 - self.discount_factor))
+        return rewards + self.discount_factor * future
+
+    def update(self, defense_idx, lecturer_idx, load, reward, next_value, learning_rate):
+        index = self.state_index(defense_idx, lecturer_idx, np.int64(load))
+        current = self.q[index] if self.visits[index] > 0 else reward / (1 - self.discount_factor)
+        self.q[index] = current + learning_rate * (next_value - current)
+        self.visits[index] += 1
+
+    @staticmethod
+    def merge(base, tables):
+        """Visit-weighted average of tables that were all trained starting from base"""
+        merged = base.copy()
+        new_visits = sum(table.visits - base.visits for table in tables)
+        weighted_q = sum((table.visits - base.visits) * table.q for table in tables)
+
+        updated = new_visits > 0
+        merged.q[updated] = weighted_q[updated] / new_visits[updated]
+        merged.visits = base.visits + new_visits
+        merged.episodes = base.episodes + sum(table.episodes - base.episodes for table in tables)
+        return merged
+
+    @staticmethod
+    def merge_entries(base, tables):
+        """merge over exported entries, which may cover fields, times or lecturers
+        that only some of the tables (or only base) have"""
+        base_values = {tuple(entry[:4]): entry[4:] for entry in base}
+        added = {}  # entry key -> (new visits, visit-weighted q)
+        for entries in tables:
+            for entry in entries:
+                key = tuple(entry[:4])
+                new_visits = entry[5] - base_values.get(key, (0.0, 0))[1]
+                if new_visits > 0:
+                    visits, weighted_q = added.get(key, (0, 0.0))
+                    added[key] = (visits + new_visits, weighted_q + new_visits * entry[4])
+
+        merged = dict(base_values)
+        for key, (visits, weighted_q) in added.items():
+            merged[key] = [weighted_q / visits, merged.get(key, (0.0, 0))[1] + visits]
+        return [[*key, q, visits] for key, (q, visits) in merged.items()]
+
+    def to_entries(self):
+        """Visited entries as [field, time, bucket, lecturer_id, q, visits]"""
+        instance = self.instance
+        return [
+            [instance.fields[f], str(instance.times[t]), int(b), to_builtin(instance.lecturer_ids[l]),
+             float(self.q[f, t, b, l]), int(self.visits[f, t, b, l])]
+            for f, t, b, l in zip(*np.nonzero(self.visits))
+        ]
+
+    def load_entries(self, entries):
+        """Warm-start from exported entries; fields, times or lecturers that are
+        not part of this instance are skipped"""
+        instance = self.instance
+        time_index = {str(time): i for i, time in enumerate(instance.times)}
+        for field, time, bucket, lecturer_id, q, visits in entries:
+            if (field not in instance.field_index or time not in time_index
+                    or lecturer_id not in instance.lecturer_index):
+                continue
+            index = (instance.field_index[field], time_index[time], bucket, instance.lecturer_index[lecturer_id])
+            self.q[index] = q
+            self.visits[index] = visits
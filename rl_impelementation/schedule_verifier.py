@@ -0,0 +1,75 @@
+from collections import Counter, defaultdict
+
+from rl_impelementation.availability import date_key
+from rl_impelementation.interval_index import to_seconds
+
+
+def verify_assignments(assignments, lecturer_expertise=None, min_time_gap=7200, max_daily=2, max_workload=None):
+    """Count constraint violations of a schedule in one pass.
+
+    `assignments` yields (date, time, field, lecturer_ids) per defense, where
+    lecturer_ids may contain None for roles that were left empty. Assignments
+    are bucketed by lecturer and (date, time), so the cost is linear in the
+    number of assignments (plus sorting each lecturer's starts within a day).
+    Expertise is only checked when lecturer_expertise is given, and total
+    workload only when max_workload is given. Dates and times are compared
+    by value, so "2024-01-08" and an Excel "2024-01-08 00:00:00", or "08:00"
+    and "08.00 WIB", are the same day and slot.
+    """
+    expertise_sets = None
+    if lecturer_expertise is not None:
+        expertise_sets = {lid: set(expertise) for lid, expertise in lecturer_expertise.items()}
+
+    expertise_violations = 0
+    empty_roles = 0
+    total_assignments = 0
+    slot_counts = Counter()  # (lecturer, date, time) -> assignments
+    day_starts = defaultdict(set)  # (lecturer, date) -> distinct start times
+    daily_counts = Counter()  # (lecturer, date) -> assignments
+    workload = Counter()
+
+    for date, time, field, lecturer_ids in assignments:
+        day = date_key(date)
+        start = to_seconds(time)
+        # Times that cannot be read are compared as text
+        slot = start if start is not None else str(time).strip()
+        for lecturer_id in lecturer_ids:
+            if lecturer_id is None:
+                empty_roles += 1
+                continue
+
+            total_assignments += 1
+            if expertise_sets is not None and field not in expertise_sets.get(lecturer_id, ()):
+                expertise_violations += 1
+
+            slot_counts[(lecturer_id, day, slot)] += 1
+            day_starts[(lecturer_id, day)].add(start)
+            daily_counts[(lecturer_id, day)] += 1
+            workload[lecturer_id] += 1
+
+    # Every assignment beyond the first in a slot is a double booking
+    time_conflicts = sum(count - 1 for count in slot_counts.values() if count > 1)
+
+    gap_violations = 0
+    for starts in day_starts.values():
+        if len(starts) > 1:
+            ordered = sorted(start for start in starts if start is not None)
+            gap_violations += sum(1 for a, b in zip(ordered, ordered[1:]) if b - a < min_time_gap)
+
+    daily_violations = sum(count - max_daily for count in daily_counts.values() if count > max_daily)
+
+    workload_violations = None
+    if max_workload is not None:
+        workload_violations = sum(count - max_workload for count in workload.values() if count > max_workload)
+
+    return {
+        'total_assignments': total_assignments,
+        'empty_roles': empty_roles,
+        'expertise_violations': expertise_violations if expertise_sets is not None else None,
+        'time_conflicts': time_conflicts,
+        'gap_violations': gap_violations,
+        'daily_violations': daily_violations,
+        'workload_violations': workload_violations,
+        'valid': (time_conflicts == 0 and gap_violations == 0 and daily_violations == 0
+                  and not expertise_violations and not workload_violations),
+    }
@@ -1,86 +1,117 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import math
+from rl_impelementation.compiled_instance import CompiledInstance
 
 class ThesisDefenseEnvironment:
-    def __init__(self, schedule_df, lecturer_expertise):
-        self.schedule = schedule_df.copy()
+    def __init__(self, schedule_df, lecturer_expertise, instance=None, absences=None):
+        self.schedule = schedule_df
         self.lecturer_expertise = lecturer_expertise
 
-        total_roles = len(self.schedule) * 4  # 4 roles per sidang
-        num_lecturers = len(self.lecturer_expertise)
-        avg_roles_per_lecturer = total_roles / num_lecturers
-
-        self.target_workload = round(avg_roles_per_lecturer, 2)
-        self.assignments = {}  # {(date, time_slot): [lecturer_ids]}
-        self.current_state = self.get_initial_state()
-
         # Constants from our analysis
         self.MAX_ASSIGNMENTS_PER_SLOT = 4  # 2 penguji + 2 pembimbing
         self.MIN_TIME_GAP = 7200  # 2 jam
 
+        # Compile once and share between episodes (and between environments)
+        if instance is None:
+            instance = CompiledInstance(schedule_df, lecturer_expertise, self.MIN_TIME_GAP, absences)
+        self.instance = instance
+        self.target_workload = self.instance.target_workload
+
+        # Episode state; stamp arrays let reset() skip clearing the slot and defense tables
+        self.episode = 0
+        self.lecturer_loads = np.zeros(self.instance.n_lecturers, dtype=np.int64)
+        self.slot_stamp = np.zeros((self.instance.n_slots, self.instance.n_lecturers), dtype=np.int32)
+        self.defense_stamp = np.zeros(self.instance.n_defenses, dtype=np.int32)
+        self.scheduled_order = np.zeros(self.instance.n_defenses, dtype=np.int64)
+        self.num_scheduled = 0
+        self.cursor = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new episode in O(lecturers)"""
+        self.episode += 1
+        self.lecturer_loads.fill(0)
+        self.num_scheduled = 0
+        self.cursor = 0
+
     def get_initial_state(self): # STATE
         """Create initial state representation"""
+        self.reset()
+        return self.current_state
+
+    @property
+    def current_state(self):
+        """Dictionary view of the episode state (built on demand)"""
+        instance = self.instance
         return {
-            'scheduled_defenses': [],
-            'lecturer_loads': {lid: 0 for lid in self.lecturer_expertise.keys()},
-            'remaining_defenses': self.schedule.index.tolist()
+            'scheduled_defenses': [instance.defense_ids[d] for d in self.scheduled_order[:self.num_scheduled]],
+            'lecturer_loads': {lid: int(self.lecturer_loads[i]) for i, lid in enumerate(instance.lecturer_ids)},
+            'remaining_defenses': [did for d, did in enumerate(instance.defense_ids)
+                                   if self.defense_stamp[d] != self.episode],
         }
 
-    def get_valid_actions(self, defense_id): # ACTION
-        defense = self.schedule.loc[defense_id]
-        valid_actions = []
+    def is_done(self):
+        return self.num_scheduled == self.instance.n_defenses
+
+    def next_defense(self):
+        """Index of the first defense that is not scheduled yet"""
+        while self.cursor < self.instance.n_defenses and self.defense_stamp[self.cursor] == self.episode:
+            self.cursor += 1
+        return self.cursor
+
+    def conflict_mask(self, defense_idx, lecturer_idxs):
+        """Lecturers already assigned in this slot or within MIN_TIME_GAP of it on the same date,
+        or unavailable in this slot"""
+        slot = self.instance.defense_slot[defense_idx]
+        neighbors = self.instance.slot_neighbors[slot]
+        conflicts = (self.slot_stamp[np.ix_(neighbors, lecturer_idxs)] == self.episode).any(axis=0)
+        if self.instance.calendar is not None:
+            conflicts |= self.instance.calendar.unavailable_at(slot)[lecturer_idxs]
+        return conflicts
+
+    def valid_action_indices(self, defense_idx):
+        """Qualified lecturers (as indices) without a time conflict or absence for the defense.
+
+        When every qualified lecturer has a conflict they are all returned, and
+        the reward carries the conflict penalty.
+        """
+        eligible = self.instance.eligible[self.instance.defense_field[defense_idx]]
+        free = eligible[~self.conflict_mask(defense_idx, eligible)]
+        return free if len(free) else eligible
+
+    def action_rewards(self, defense_idx, lecturer_idxs):
+        """Vectorized calculate_assignment_reward for several lecturers at once"""
+        field = self.instance.defense_field[defense_idx]
+
+        expertise_score = self.instance.expertise_score[field, lecturer_idxs]
+        workload_diff = np.abs(self.lecturer_loads[lecturer_idxs] - self.target_workload)
+        workload_penalty = 2.0 * (1.0 / (workload_diff + 1))
+        conflict_penalty = np.where(self.conflict_mask(defense_idx, lecturer_idxs), -2.0, 0)
 
-        for lecturer_id in self.lecturer_expertise.keys():
-            if defense['bidang'] in self.lecturer_expertise[lecturer_id]:
-                has_conflict = False
-                if (defense['date'], defense['time']) in self.assignments:
-                    if lecturer_id in self.assignments[(defense['date'], defense['time'])]:
-                        has_conflict = True
+        return expertise_score + workload_penalty + conflict_penalty
 
-                if not has_conflict:
-                    valid_actions.append(lecturer_id)
+    def step_index(self, defense_idx, lecturer_idx):
+        reward = float(self.action_rewards(defense_idx, np.array([lecturer_idx]))[0])
 
-        return valid_actions
+        self.slot_stamp[self.instance.defense_slot[defense_idx], lecturer_idx] = self.episode
+        self.lecturer_loads[lecturer_idx] += 1
 
-    def calculate_assignment_reward(self, lecturer_id, defense_id): # REWARD
-        defense = self.schedule.loc[defense_id]
+        if self.defense_stamp[defense_idx] != self.episode:
+            self.defense_stamp[defense_idx] = self.episode
+            self.scheduled_order[self.num_scheduled] = defense_idx
+            self.num_scheduled += 1
 
-        # 1. Expertise Matching (0 to 3.0)
-        expertise_score = 0
-        if defense['bidang'] in self.lecturer_expertise.get(lecturer_id, []):
-            expertise_score = 3.0 * (1.0 / len(self.lecturer_expertise[lecturer_id]))
+        return reward, self.is_done()
 
-        # 2. Workload Balance (0 to 2)
-        current_load = self.current_state['lecturer_loads'].get(lecturer_id, 0)
-        workload_diff = abs(current_load - self.target_workload)
-        workload_penalty = 2.0 * (1.0 / (workload_diff + 1))
-
-        # 3. Time Conflict Check (-2.0 or 0)
-        conflict_penalty = 0
-        if (defense['date'], defense['time']) in self.assignments:
-            if lecturer_id in self.assignments[(defense['date'], defense['time'])]:
-                conflict_penalty = -2.0
+    def get_valid_actions(self, defense_id): # ACTION
+        valid = self.valid_action_indices(self.instance.defense_index[defense_id])
+        return [self.instance.lecturer_ids[i] for i in valid]
 
-        return expertise_score + workload_penalty + conflict_penalty
+    def calculate_assignment_reward(self, lecturer_id, defense_id): # REWARD
+        defense_idx = self.instance.defense_index[defense_id]
+        lecturer_idx = self.instance.lecturer_index[lecturer_id]
+        return float(self.action_rewards(defense_idx, np.array([lecturer_idx]))[0])
 
     def step(self, defense_id, lecturer_id): # memperbarui status environment
-        defense = self.schedule.loc[defense_id]
-        reward = self.calculate_assignment_reward(lecturer_id, defense_id)
-
-        # Update state
-        key = (defense['date'], defense['time'])
-        if key not in self.assignments:
-            self.assignments[key] = []
-        self.assignments[key].append(lecturer_id)
-
-        self.current_state['lecturer_loads'][lecturer_id] = self.current_state['lecturer_loads'].get(lecturer_id, 0) + 1
-
-        if defense_id in self.current_state['remaining_defenses']:
-            self.current_state['remaining_defenses'].remove(defense_id)
-            self.current_state['scheduled_defenses'].append(defense_id)
-
-        done = len(self.current_state['remaining_defenses']) == 0
+        reward, done = self.step_index(self.instance.defense_index[defense_id],
+                                       self.instance.lecturer_index[lecturer_id])
         return self.current_state, reward, done
@@ -1,57 +1,331 @@
-import random
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError
+from rl_impelementation.q_table import QTable
 from rl_impelementation.thesis_defense_environment import ThesisDefenseEnvironment
 
 
+# Processes of the rollout pool shared by all requests; each call uses at most its own number of workers
+ROLLOUT_POOL_SIZE = int(os.environ.get("ROLLOUT_POOL_SIZE", os.cpu_count() or 1))
+_rollout_pool = None
+_rollout_pool_lock = threading.Lock()
+
+# Workers are not forked from the server itself, which runs other threads (database writes, jobs, streams)
+ROLLOUT_START_METHOD = os.environ.get(
+    "ROLLOUT_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def rollout_context():
+    context = multiprocessing.get_context(ROLLOUT_START_METHOD)
+    if ROLLOUT_START_METHOD == "forkserver":
+        # Workers are forked from a server that has the solver imported already
+        context.set_forkserver_preload([__name__])
+    return context
+
+
+class _Task(Future):
+    """Future of a BoundedPool task; it only runs once the task is done in the pool"""
+
+    def __init__(self, fn, args, kwargs):
+        super().__init__()
+        self.call = (fn, args, kwargs)
+        self.inner = None
+
+    def cancel(self):
+        # Still queued in the pool, or waiting for a slot
+        if self.inner is not None:
+            self.inner.cancel()
+        return super().cancel()
+
+
+class BoundedPool:
+    """An executor that runs at most n_workers of its tasks at once in a shared pool.
+
+    Further tasks wait here for a slot, so several requests can share one
+    pool without any of them taking more than its workers.
+    """
+
+    def __init__(self, pool, n_workers):
+        self.pool = pool
+        self.slots = n_workers
+        self.waiting = deque()
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        task = _Task(fn, args, kwargs)
+        with self.lock:
+            self.waiting.append(task)
+        self.start_waiting()
+        return task
+
+    def start_waiting(self):
+        while True:
+            with self.lock:
+                if not self.slots or not self.waiting:
+                    return
+                task = self.waiting.popleft()
+                if task.cancelled():
+                    continue
+                self.slots -= 1
+                fn, args, kwargs = task.call
+                try:
+                    task.inner = self.pool.submit(fn, *args, **kwargs)
+                except Exception as e:
+                    self.slots += 1
+                    task.set_exception(e)
+                    continue
+            task.inner.add_done_callback(lambda inner, task=task: self.finished(task, inner))
+
+    def finished(self, task, inner):
+        with self.lock:
+            self.slots += 1
+        if task.set_running_or_notify_cancel():
+            if inner.cancelled():
+                task.set_exception(CancelledError())
+            elif inner.exception() is not None:
+                task.set_exception(inner.exception())
+            else:
+                task.set_result(inner.result())
+        self.start_waiting()
+
+
+def get_rollout_pool(n_workers):
+    """An executor over the shared rollout pool that runs at most n_workers tasks at once"""
+    global _rollout_pool
+    with _rollout_pool_lock:
+        if _rollout_pool is None:
+            _rollout_pool = ProcessPoolExecutor(max_workers=ROLLOUT_POOL_SIZE, mp_context=rollout_context())
+        return BoundedPool(_rollout_pool, min(n_workers, ROLLOUT_POOL_SIZE))
+
+
+def shutdown_rollout_pool():
+    """Stop the worker processes of the rollout pool (at application shutdown)"""
+    global _rollout_pool
+    with _rollout_pool_lock:
+        pool, _rollout_pool = _rollout_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def rollout_seed(seed):
+    """seed, or a fresh random one, for a run whose work is spread over pool processes.
+
+    Workers started from one process share its global random state, so an
+    unseeded run would make the same random choices in every worker.
+    """
+    return seed if seed is not None else np.random.SeedSequence().entropy
+
+
+def iteration_rng(seed, iteration):
+    """Random generator for one rollout, independent of which worker runs it"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(iteration,)))
+
+
+def run_rollouts(q_table, epsilon, learning_rate, seed, start, stop):
+    """Run iterations [start, stop) from a copy of q_table.
+
+    Returns (best_reward, best_iteration, best_actions, learned_q_table).
+    """
+    scheduler = ThesisDefenseScheduler(None, None, instance=q_table.instance)
+    scheduler.q_table = q_table.copy()
+    scheduler.epsilon = epsilon
+    scheduler.learning_rate = learning_rate
+
+    best = (float('-inf'), None, None)
+    for iteration in range(start, stop):
+        total_reward, actions = scheduler.run_episode(iteration_rng(seed, iteration), explore=iteration > 0)
+        if total_reward > best[0]:
+            best = (total_reward, iteration, actions)
+
+    return best + (scheduler.q_table,)
+
+
 # Q-Learning model
 
 class ThesisDefenseScheduler:
-    def __init__(self, schedule_df, lecturer_expertise):
-        self.env = ThesisDefenseEnvironment(schedule_df, lecturer_expertise)
+    # Seeded runs learn in fixed rounds of chunks; every chunk starts from the
+    # table merged at the end of the previous round, whichever worker runs it
+    ROLLOUTS_PER_CHUNK = 8
+    CHUNKS_PER_ROUND = 16
+
+    def __init__(self, schedule_df, lecturer_expertise, instance=None, absences=None):
+        # (lecturer id, date, time) periods in which a lecturer cannot be picked
+        self.absences = absences
+        self.env = ThesisDefenseEnvironment(schedule_df, lecturer_expertise, instance=instance, absences=absences)
         self.learning_rate = 0.1
         self.discount_factor = 0.9
         self.epsilon = 0.1  # untuk exploration
+        self.seed = None
+        self.iterations_run = 0
+        self.q_table = QTable(self.env.instance, self.discount_factor)
 
-    def select_action(self, defense_id, valid_actions):
-        if np.random.random() < self.epsilon:
-            return np.random.choice(valid_actions)
+    def load_q_table(self, entries, episodes=0):
+        """Warm-start from entries exported by QTable.to_entries"""
+        self.q_table.load_entries(entries)
+        self.q_table.episodes = episodes
+
+    def action_values(self, defense_idx, valid_actions):
+        rewards = self.env.action_rewards(defense_idx, valid_actions)
+        return self.q_table.values(defense_idx, valid_actions, self.env.lecturer_loads[valid_actions], rewards)
+
+    def select_action(self, defense_idx, valid_actions, rng=np.random, action_values=None, explore=True):
+        if explore and rng.random() < self.epsilon:
+            return rng.choice(valid_actions)
         else:
-            action_rewards = {
-                lecturer_id: self.env.calculate_assignment_reward(lecturer_id, defense_id)
-                for lecturer_id in valid_actions
-            }
-            return max(action_rewards.items(), key=lambda x: x[1])[0]
+            if action_values is None:
+                action_values = self.action_values(defense_idx, valid_actions)
+            return valid_actions[np.argmax(action_values)]
 
-    def schedule_defenses(self, schedule_df, lecturer_expertise, max_iterations=1000):
-        best_schedule = None
-        best_reward = float('-inf')
+    def run_episode(self, rng=np.random, explore=True):
+        """Run one rollout, updating the Q-table, and return its total reward
+        and the lecturer index per defense. With explore=False the rollout
+        follows the current Q-values only."""
+        self.env.reset()
+        total_reward = 0
+        actions = np.zeros(self.env.instance.n_defenses, dtype=np.int64)
+        pending = None  # last transition, waiting for the value of the next state
+
+        # Process each defense
+        while not self.env.is_done():
+            defense_idx = self.env.next_defense()
+            valid_actions = self.env.valid_action_indices(defense_idx)
+            action_values = self.action_values(defense_idx, valid_actions)
+
+            if pending is not None:
+                self.q_table.update(*pending, next_value=action_values.max(), learning_rate=self.learning_rate)
+
+            # Select and take action
+            selected_lecturer = self.select_action(defense_idx, valid_actions, rng, action_values, explore)
+            load = self.env.lecturer_loads[selected_lecturer]
+            reward, done = self.env.step_index(defense_idx, selected_lecturer)
+            pending = (defense_idx, selected_lecturer, load, reward)
+
+            total_reward += reward
+            actions[defense_idx] = selected_lecturer
+
+        if pending is not None:
+            self.q_table.update(*pending, next_value=0.0, learning_rate=self.learning_rate)
+        self.q_table.episodes += 1
+
+        return total_reward, actions
 
-        for iteration in range(max_iterations):
-            self.env = ThesisDefenseEnvironment(schedule_df, lecturer_expertise)
-            total_reward = 0
-            schedule = []
+    def schedule_defenses(self, schedule_df, lecturer_expertise, max_iterations=1000,
+                          n_workers=1, seed=None, patience=None, min_improvement=0.0, deadline_ms=None):
+        """Best of max_iterations epsilon-greedy Q-learning rollouts.
 
-            # Process each defense
-            while len(self.env.current_state['remaining_defenses']) > 0:
-                defense_id = self.env.current_state['remaining_defenses'][0]
-                valid_actions = self.env.get_valid_actions(defense_id)
+        Without a seed and with a single worker the rollouts draw from the global
+        np.random state and learn into one Q-table. With a seed (or several
+        workers) every iteration gets its own generator derived from the seed and
+        learning happens in rounds of chunks, so the result does not depend on
+        n_workers. Iteration 0 is always a greedy rollout without exploration.
 
-                # Select and take action
-                selected_lecturer = self.select_action(defense_id, valid_actions)
-                new_state, reward, done = self.env.step(defense_id, selected_lecturer)
+        The search stops early once `patience` iterations pass without the best
+        reward improving by more than `min_improvement` (relative), or when
+        `deadline_ms` has elapsed; the best schedule found so far is returned.
+        Seeded runs check both after each chunk of ROLLOUTS_PER_CHUNK
+        rollouts; the chunks after it are dropped from the round's merge. The
+        number of iterations that ran is kept in self.iterations_run.
+        """
+        started = time.perf_counter()
+        deadline = started + deadline_ms / 1000 if deadline_ms is not None else None
 
-                total_reward += reward
-                schedule.append((defense_id, selected_lecturer))
+        # Compile the instance once; every iteration only resets the episode state
+        if schedule_df is not self.env.schedule or lecturer_expertise is not self.env.lecturer_expertise:
+            entries = self.q_table.to_entries()
+            self.env = ThesisDefenseEnvironment(schedule_df, lecturer_expertise, absences=self.absences)
+            self.q_table = QTable(self.env.instance, self.discount_factor, entries)
 
-            # Update best schedule if current is better
-            if total_reward > best_reward:
+        instance = self.env.instance
+        best_actions = None
+        best_reward = float('-inf')
+        last_improvement = 0
+        self.iterations_run = 0
+
+        def is_improvement(reward):
+            return best_reward == float('-inf') or reward - best_reward > min_improvement * abs(best_reward)
+
+        def should_stop():
+            if deadline is not None and time.perf_counter() >= deadline:
+                return True
+            return patience is not None and self.iterations_run - last_improvement >= patience
+
+        def take(result, n_iterations):
+            """Count a chunk of seeded rollouts and keep its best; True when the search should stop"""
+            nonlocal best_reward, best_actions, last_improvement
+            total_reward, iteration, actions, _ = result
+            self.iterations_run += n_iterations
+            if iteration is not None and total_reward > best_reward:
+                if is_improvement(total_reward):
+                    last_improvement = iteration + 1
                 best_reward = total_reward
-                best_schedule = schedule.copy()
+                best_actions = actions
+            return should_stop()
 
+        if seed is None and n_workers == 1:
+            for iteration in range(max_iterations):
+                # The first rollout exploits what the (possibly warm-started) table already knows
+                total_reward, actions = self.run_episode(explore=iteration > 0)
+                self.iterations_run += 1
+
+                # Update best schedule if current is better
+                if total_reward > best_reward:
+                    if is_improvement(total_reward):
+                        last_improvement = self.iterations_run
+                    best_reward = total_reward
+                    best_actions = actions
+
+                if should_stop():
+                    break
+        else:
+            seed = rollout_seed(seed)
+            self.seed = seed
+
+            round_size = self.ROLLOUTS_PER_CHUNK * self.CHUNKS_PER_ROUND
+            for round_start in range(0, max_iterations, round_size):
+                round_stop = min(max_iterations, round_start + round_size)
+                chunks = [(start, min(start + self.ROLLOUTS_PER_CHUNK, round_stop))
+                          for start in range(round_start, round_stop, self.ROLLOUTS_PER_CHUNK)]
+
+                # Chunks are taken in iteration order, so ties go to the earliest iteration
+                results = []
+                stopped = False
+                if n_workers == 1:
+                    for start, stop in chunks:
+                        results.append(run_rollouts(self.q_table, self.epsilon, self.learning_rate, seed, start, stop))
+                        stopped = take(results[-1], stop - start)
+                        if stopped:
+                            break
+                else:
+                    pool = get_rollout_pool(n_workers)
+                    futures = [pool.submit(run_rollouts, self.q_table, self.epsilon, self.learning_rate,
+                                           seed, start, stop)
+                               for start, stop in chunks]
+                    # Only the completed prefix counts, so the outcome only depends on where the deadline fell
+                    try:
+                        for future, (start, stop) in zip(futures, chunks):
+                            timeout = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+                            results.append(future.result(timeout=timeout))
+                            stopped = take(results[-1], stop - start)
+                            if stopped:
+                                break
+                    except TimeoutError:
+                        stopped = True
+                    finally:
+                        for future in futures:
+                            future.cancel()
+
+                self.q_table = QTable.merge(self.q_table, [result[3] for result in results])
+                if stopped:
+                    break
+
+        best_schedule = None
+        if best_actions is not None:
+            best_schedule = instance.decode(enumerate(best_actions))
 
         return best_schedule, best_reward
 
@@ -61,12 +335,11 @@ class ThesisDefenseScheduler:
         for defense_id, lecturer_id in schedule:
             workload[lecturer_id] = workload.get(lecturer_id, 0) + 1
 
-        workload_series = pd.Series(workload)
-
+        instance = self.env.instance
         expertise_matches = 0
         for defense_id, lecturer_id in schedule:
-            defense = self.env.schedule.loc[defense_id]
-            if defense['bidang'] in self.env.lecturer_expertise[lecturer_id]:
+            field = instance.defense_field[instance.defense_index[defense_id]]
+            if instance.expertise[field, instance.lecturer_index[lecturer_id]]:
                 expertise_matches += 1
 
         expertise_ratio = expertise_matches / len(schedule)
@@ -1,11 +1,11 @@
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import math
+import heapq
+from rl_impelementation.availability import AvailabilityCalendar
+from rl_impelementation.interval_index import LecturerIntervalIndex
+from rl_impelementation.panel_rules import ROLE_COLUMNS, default_max_workload
 
 class ThesisPanelSchedulerFinal:
-    def __init__(self, schedule_df, lecturer_expertise):
+    def __init__(self, schedule_df, lecturer_expertise, max_workload=None, absences=None):
         self.schedule_df = schedule_df.copy()
         self.lecturer_expertise = lecturer_expertise
         self.lecturer_workload = {lid: {'total': 0, 'examiner': 0, 'supervisor': 0,
@@ -13,74 +13,186 @@ class ThesisPanelSchedulerFinal:
                                 for lid in lecturer_expertise.keys()}
         #self.MAX_WORKLOAD = 3
         self.MIN_TIME_GAP = pd.Timedelta(hours=2)
-        self.MAX_WORKLOAD = math.ceil((len(schedule_df) * 4) / len(lecturer_expertise))
+        # A part of a larger problem (see components.py) keeps the limit of the whole
+        self.MAX_WORKLOAD = max_workload or default_max_workload(len(schedule_df), len(lecturer_expertise))
+        self.MAX_DAILY_ASSIGNMENTS = 2
+
+        # Start times per lecturer and date, to keep MIN_TIME_GAP between panels
+        self.intervals = LecturerIntervalIndex(int(self.MIN_TIME_GAP.total_seconds()))
+
+        # Inverted index field -> lecturers, and per-field heaps of
+        # (total workload, position in lecturer_expertise, lecturer id). Entries whose
+        # workload is out of date are dropped lazily when they reach the top.
+        self.lecturer_order = {lid: order for order, lid in enumerate(lecturer_expertise.keys())}
+        self.lecturer_fields = {lid: list(dict.fromkeys(expertise)) for lid, expertise in lecturer_expertise.items()}
+
+        # Slots in which a lecturer cannot sit on any panel, from (lecturer id, date, time) absences,
+        # as bitsets in lecturer_expertise order; slots outside schedule_df are compiled when looked up
+        self.calendar = None
+        if absences:
+            slots = zip(schedule_df['date'], schedule_df['time']) if 'date' in schedule_df else ()
+            self.calendar = AvailabilityCalendar(absences, lecturer_expertise.keys(), slots)
+
+        self.build_heaps()
+
+    def build_heaps(self):
+        """Field heaps from the current workload (also clears the parked entries)"""
+        self.field_heaps = {}
+        for lid, fields in self.lecturer_fields.items():
+            total = self.lecturer_workload[lid]['total']
+            if total >= self.MAX_WORKLOAD:
+                continue
+            for field in fields:
+                self.field_heaps.setdefault(field, []).append((total, self.lecturer_order[lid], lid))
+        for heap in self.field_heaps.values():
+            heapq.heapify(heap)
+
+        # Heap entries of lecturers that reached the daily cap on parked_date
+        self.parked = []
+        self.parked_date = None
 
 
     def is_lecturer_available(self, lecturer_id, date, time, assigned_lecturers):
         if lecturer_id in assigned_lecturers:
             return False
 
+        # One lookup per slot covers every lecturer; later candidates reuse it
+        if self.calendar is not None and self.calendar.unavailable(date, time)[self.lecturer_order[lecturer_id]]:
+            return False
+
         # Check daily workload
         daily_count = self.lecturer_workload[lecturer_id]['daily_assignments'].get(date, 0)
-        if daily_count >= 2:
+        if daily_count >= self.MAX_DAILY_ASSIGNMENTS:
             return False
 
         # Check total workload
         if self.lecturer_workload[lecturer_id]['total'] >= self.MAX_WORKLOAD:
             return False
 
+        # Check other panels in the same slot or within MIN_TIME_GAP
+        if self.intervals.conflicts(lecturer_id, date, time):
+            return False
+
         return True
 
-    def assign_panel(self, defense):
+    def restore_parked(self):
+        for field, entry in self.parked:
+            heapq.heappush(self.field_heaps[field], entry)
+        self.parked = []
+
+    def next_available(self, field, date, time, assigned_lecturers, set_aside):
+        """Least-loaded available lecturer for the field (ties go to lecturer_expertise order)"""
+        heap = self.field_heaps.get(field, [])
+        while heap:
+            total, order, lid = heap[0]
+            workload = self.lecturer_workload[lid]
+
+            if total != workload['total'] or total >= self.MAX_WORKLOAD:
+                heapq.heappop(heap)  # out of date, or full for the rest of the term
+            elif workload['daily_assignments'].get(date, 0) >= self.MAX_DAILY_ASSIGNMENTS:
+                self.parked.append((field, heapq.heappop(heap)))  # full for the rest of this date
+            elif not self.is_lecturer_available(lid, date, time, assigned_lecturers):
+                set_aside.append(heapq.heappop(heap))  # only unavailable for this defense
+            else:
+                return lid
+
+        return None
+
+    def add_assignment(self, lecturer_id, role, date, time, delta=1):
+        """Count (delta=1) or uncount (delta=-1) one assignment in the workload state.
+        The field heaps are not touched, callers push() or build_heaps() afterwards."""
+        workload = self.lecturer_workload[lecturer_id]
+        workload['total'] += delta
+        if 'penguji' in role:
+            workload['examiner'] += delta
+        else:
+            workload['supervisor'] += delta
+        workload['daily_assignments'][date] = workload['daily_assignments'].get(date, 0) + delta
+
+        if delta > 0:
+            self.intervals.add(lecturer_id, date, time)
+        else:
+            self.intervals.remove(lecturer_id, date, time)
+
+    def push(self, lecturer_id):
+        """Re-enter every field heap of the lecturer with the current workload"""
+        total = self.lecturer_workload[lecturer_id]['total']
+        if total < self.MAX_WORKLOAD:
+            entry = (total, self.lecturer_order[lecturer_id], lecturer_id)
+            for lecturer_field in self.lecturer_fields[lecturer_id]:
+                heapq.heappush(self.field_heaps.setdefault(lecturer_field, []), entry)
+
+    def load_assignments(self, assignments):
+        """Restore the workload state of an existing schedule from
+        (lecturer id, role, date, time) tuples, without solving anything"""
+        for lecturer_id, role, date, time in assignments:
+            if lecturer_id in self.lecturer_workload:
+                self.add_assignment(lecturer_id, role, date, time)
+        self.build_heaps()
+
+    def release_panel(self, date, time, panel):
+        """Undo the assignments of a panel ({role: lecturer id}) so its lecturers can be reused"""
+        for role, lecturer_id in panel.items():
+            if lecturer_id in self.lecturer_workload:
+                self.add_assignment(lecturer_id, role, date, time, delta=-1)
+                self.push(lecturer_id)
+
+    def assign_panel(self, defense, keep=None):
+        """Pick a panel for the defense. Lecturers in keep ({role: lecturer id}) stay
+        on their role when they are still available, other roles are filled from the heaps."""
         date, time = defense['date'], defense['time']
         field = defense['bidang']
         assigned_lecturers = []
         panel = {}
 
-        qualified_lecturers = [(lid, expertise) for lid, expertise in self.lecturer_expertise.items()
-                             if field in expertise]
+        if date != self.parked_date:
+            self.restore_parked()
+            self.parked_date = date
+
+        set_aside = []
 
-        qualified_lecturers.sort(key=lambda x: self.lecturer_workload[x[0]]['total'])
+        # Kept lecturers first, so a replacement never takes the role of one that stays
+        kept = {}
+        for role, lecturer_id in (keep or {}).items():
+            if (lecturer_id in self.lecturer_workload and field in self.lecturer_fields[lecturer_id]
+                    and self.is_lecturer_available(lecturer_id, date, time, assigned_lecturers)):
+                kept[role] = lecturer_id
+                assigned_lecturers.append(lecturer_id)
 
-        roles = ['penguji1_id', 'penguji2_id', 'pembimbing1_id', 'pembimbing2_id']
-        for role in roles:
-            available_lecturers = [
-                lid for lid, _ in qualified_lecturers
-                if self.is_lecturer_available(lid, date, time, assigned_lecturers)
-            ]
+        for role in ROLE_COLUMNS:
+            if role in kept:
+                selected_id = kept[role]
+            else:
+                selected_id = self.next_available(field, date, time, assigned_lecturers, set_aside)
 
-            if available_lecturers:
-                selected_id = available_lecturers[0]
+            if selected_id is not None:
                 panel[role] = selected_id
-                assigned_lecturers.append(selected_id)
-
-                # Update workload
-                self.lecturer_workload[selected_id]['total'] += 1
-                if 'penguji' in role:
-                    self.lecturer_workload[selected_id]['examiner'] += 1
-                else:
-                    self.lecturer_workload[selected_id]['supervisor'] += 1
-
-                if date not in self.lecturer_workload[selected_id]['daily_assignments']:
-                    self.lecturer_workload[selected_id]['daily_assignments'][date] = 0
-                self.lecturer_workload[selected_id]['daily_assignments'][date] += 1
+                if role not in kept:
+                    assigned_lecturers.append(selected_id)
+
+                # Update workload and re-enter every field heap with it
+                self.add_assignment(selected_id, role, date, time)
+                self.push(selected_id)
             else:
                 panel[role] = None
 
-        return panel
+        for entry in set_aside:
+            heapq.heappush(self.field_heaps[field], entry)
 
-    def create_schedule(self):
-        """Create complete schedule"""
-        schedule_data = []
+        return panel
 
+    def iter_schedule(self, keep=None):
+        """Yield the schedule rows one by one, each as soon as its panel is assigned.
+        keep ({defense id: {role: lecturer id}}) is passed on to assign_panel."""
+        keep = keep or {}
         # Sort defenses by date and time
         sorted_defenses = self.schedule_df.sort_values(['date', 'time'])
 
-        for idx, defense in sorted_defenses.iterrows():
+        for defense_id, defense in zip(sorted_defenses.index, sorted_defenses.to_dict('records')):
 
-            panel = self.assign_panel(defense)
+            panel = self.assign_panel(defense, keep.get(defense_id))
 
-            schedule_data.append({
+            yield {
                 'tanggal': defense['date'],
                 'waktu': defense['time'],
                 'ruang': defense['ruang'],
@@ -88,6 +200,8 @@ class ThesisPanelSchedulerFinal:
                 'judul': defense['judul'],
                 'bidang': defense['bidang'],
                 **panel
-            })
+            }
 
-        return pd.DataFrame(schedule_data)
+    def create_schedule(self):
+        """Create complete schedule"""
+        return pd.DataFrame(list(self.iter_schedule()))
@@ -0,0 +1,23 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """Wall time per named phase in milliseconds, in the order the phases first ran"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def total(self):
+        return sum(self.phases.values())
+
+    def rounded(self):
+        return {name: round(ms, 2) for name, ms in self.phases.items()}
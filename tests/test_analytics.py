@@ -0,0 +1,122 @@
+import math
+
+import pytest
+from sqlmodel import Session, select
+
+from backend.analytics import (WorkloadFilters, backfill_workload, lecturer_totals, legacy_workload,
+                               period_totals, refresh_workload, schedule_balance)
+from backend.database import create_db_and_tables, engine, run_write
+from backend.models import Schedule, Defense, PanelAssignment, LecturerWorkload
+
+ROLES = ("penguji1", "penguji2", "pembimbing1", "pembimbing2")
+# (date, field, lecturer per role); the first date as read from an Excel upload
+DEFENSES = [
+    ("2024-01-08 00:00:00", "A", (1, 2, 3, 4)),
+    ("2024-01-09", "A", (1, 3, 2, 5)),
+    ("2024-02-01", "B", (1, 2, 4, 5)),
+]
+
+
+def filters(**values):
+    """WorkloadFilters outside a request, where the Query defaults are not filled in"""
+    return WorkloadFilters(**{"date_from": None, "date_to": None, "field": None, "lecturer_id": None,
+                              "schedule_id": None, **values})
+
+
+@pytest.fixture(scope="module")
+def schedule_id():
+    create_db_and_tables()
+
+    def write(session):
+        schedule = Schedule(schedule={}, total_schedule=len(DEFENSES), total_dosen=5, avg_dosen=2.4)
+        session.add(schedule)
+        session.flush()
+        for student_id, (date, field, panel) in enumerate(DEFENSES):
+            defense = Defense(schedule_id=schedule.id, date=date, time="08:00", student_id=student_id, field=field)
+            session.add(defense)
+            session.flush()
+            session.add_all(PanelAssignment(defense_id=defense.id, schedule_id=schedule.id, lecturer_id=lecturer_id,
+                                            role=role) for role, lecturer_id in zip(ROLES, panel))
+        session.flush()
+        refresh_workload(session, schedule.id)
+        return schedule.id
+
+    return run_write(write)
+
+
+def test_workload_rows_store_the_date_without_time(schedule_id):
+    with Session(engine) as session:
+        dates = set(session.exec(select(LecturerWorkload.date).where(LecturerWorkload.schedule_id == schedule_id)))
+    assert dates == {"2024-01-08", "2024-01-09", "2024-02-01"}
+
+
+def test_lecturer_totals(schedule_id):
+    with Session(engine) as session:
+        totals = lecturer_totals(session, filters(schedule_id=[schedule_id]), limit=10)
+
+    assert [row["lecturerId"] for row in totals] == [1, 2, 3, 4, 5]
+    assert totals[0] == {"lecturerId": 1, "panels": 3, "examiner": 3, "supervisor": 0, "schedules": 1,
+                         "firstDate": "2024-01-08", "lastDate": "2024-02-01"}
+    assert totals[1]["examiner"] == 2 and totals[1]["supervisor"] == 1
+
+
+@pytest.mark.parametrize("date_to", ["2024-01-08", "2024-01-08 00:00:00"])
+def test_date_filters_include_datetime_strings(schedule_id, date_to):
+    with Session(engine) as session:
+        first_day = lecturer_totals(session, filters(schedule_id=[schedule_id], date_to=date_to), limit=10)
+        later = lecturer_totals(session, filters(schedule_id=[schedule_id], date_from="2024-01-09 00:00:00"),
+                                limit=10)
+
+    assert {row["lecturerId"]: row["panels"] for row in first_day} == {1: 1, 2: 1, 3: 1, 4: 1}
+    assert sum(row["panels"] for row in later) == 8
+
+
+def test_period_totals(schedule_id):
+    with Session(engine) as session:
+        months = period_totals(session, filters(schedule_id=[schedule_id]), "month", limit=10)
+        days = period_totals(session, filters(schedule_id=[schedule_id], field=["A"]), "day", limit=10)
+
+    assert months == [
+        {"period": "2024-01", "panels": 8, "examiner": 4, "supervisor": 4, "lecturers": 5, "schedules": 1},
+        {"period": "2024-02", "panels": 4, "examiner": 2, "supervisor": 2, "lecturers": 4, "schedules": 1},
+    ]
+    assert [row["period"] for row in days] == ["2024-01-08", "2024-01-09"]
+
+
+def test_schedule_balance(schedule_id):
+    with Session(engine) as session:
+        [balance] = schedule_balance(session, filters(schedule_id=[schedule_id]), limit=10)
+        [field_b] = schedule_balance(session, filters(schedule_id=[schedule_id], field=["B"]), limit=10)
+
+    # Panels per lecturer: 3, 3, 2, 2, 2
+    std = math.sqrt(30 / 5 - 2.4 ** 2)
+    assert balance == pytest.approx({"scheduleId": schedule_id, "lecturers": 5, "panels": 12, "mean": 2.4,
+                                     "std": std, "min": 2, "max": 3, "balanceScore": 1 / (1 + std)})
+    assert field_b["std"] == 0 and field_b["balanceScore"] == 1
+
+
+def test_legacy_workload_drops_the_time_of_excel_dates():
+    schedule = Schedule(id=1, schedule={"schedule": [
+        {"date": "2024-01-08 00:00:00", "field": "A",
+         "panelAssignment": {"penguji1Id": 1, "pembimbing1Id": 2, "penguji2Id": None}},
+    ]})
+
+    rows = legacy_workload(schedule)
+
+    assert {row["date"] for row in rows} == {"2024-01-08"}
+    assert {(row["lecturer_id"], row["examiner"], row["supervisor"]) for row in rows} == {(1, 1, 0), (2, 0, 1)}
+
+
+def test_backfill_cuts_stored_datetime_strings(schedule_id):
+    def write(session):
+        row = LecturerWorkload(schedule_id=schedule_id, lecturer_id=9, date="2024-03-04 00:00:00", field="A",
+                               panels=1, examiner=1, supervisor=0)
+        session.add(row)
+        session.flush()
+        return row.id
+
+    row_id = run_write(write)
+    backfill_workload()
+
+    with Session(engine) as session:
+        assert session.get(LecturerWorkload, row_id).date == "2024-03-04"
@@ -0,0 +1,71 @@
+from collections import Counter
+
+import pytest
+
+from benchmarks import synthetic
+from rl_impelementation.availability import date_key
+from rl_impelementation.components import solve_components
+from rl_impelementation.engines import PANEL_ENGINES, make_panel_engine, run_engine
+from rl_impelementation.interval_index import to_seconds
+from rl_impelementation.panel_rules import ROLE_COLUMNS, default_max_workload
+from rl_impelementation.portfolio import solve_portfolio
+
+DOSEN, JADWAL = synthetic.generate(30, 60, n_fields=4, overlap=0.4, n_dates=3, seed=3)
+LECTURER_EXPERTISE = synthetic.lecturer_expertise(DOSEN)
+MAX_WORKLOAD = default_max_workload(len(JADWAL), len(LECTURER_EXPERTISE))
+SOLVE_OPTIONS = dict(max_iterations=20, seed=1, n_workers=1)
+
+
+def seats(final_schedule):
+    """(date, start in seconds, lecturer id) of every filled role"""
+    return {(date_key(row['tanggal']), to_seconds(row['waktu']), row[role])
+            for row in final_schedule.to_dict('records') for role in ROLE_COLUMNS if row[role] is not None}
+
+
+def busiest(final_schedule, date, start=None, end=None, n=1):
+    counts = Counter(lecturer for day, time, lecturer in seats(final_schedule)
+                     if day == date and (start is None or start <= time < end))
+    return [lecturer for lecturer, _ in counts.most_common(n)]
+
+
+@pytest.fixture(scope="module")
+def absences():
+    """Whole-day absences of the lecturers that sit most on the first date without absences, and a
+    morning absence on the second date, so every engine would otherwise use them"""
+    first, second = sorted(JADWAL['date'].unique())[:2]
+    unconstrained = run_engine(make_panel_engine('greedy', JADWAL, LECTURER_EXPERTISE, MAX_WORKLOAD))
+    morning = busiest(unconstrained, second, 8 * 3600, 12 * 3600)
+    assert morning
+    return [(lecturer, first, None) for lecturer in busiest(unconstrained, first, n=3)] + \
+        [(lecturer, second, "08:00 - 12:00") for lecturer in morning]
+
+
+def assert_absent(final_schedule, absences):
+    assigned = seats(final_schedule)
+    assert len(assigned) > 0
+    for lecturer, date, time in absences:
+        start, end = (8 * 3600, 12 * 3600) if time else (-1, 24 * 3600)
+        assert not [seat for seat in assigned if seat[0] == date and seat[2] == lecturer and start <= seat[1] < end]
+
+
+@pytest.mark.parametrize("name", sorted(PANEL_ENGINES))
+def test_panel_engines_skip_absent_lecturers(name, absences):
+    final_schedule = run_engine(make_panel_engine(name, JADWAL, LECTURER_EXPERTISE, MAX_WORKLOAD, absences))
+
+    assert_absent(final_schedule, absences)
+
+
+def test_rl_search_and_panels_skip_absent_lecturers(absences):
+    result = solve_components(JADWAL, LECTURER_EXPERTISE, engine="rl", absences=absences, **SOLVE_OPTIONS)
+
+    assert_absent(result['final_schedule'], absences)
+    whole_day = {(lecturer, date) for lecturer, date, time in absences if time is None}
+    for defense_id, lecturer in result['best_schedule']:
+        assert (lecturer, date_key(JADWAL.loc[defense_id, 'date'])) not in whole_day
+
+
+def test_portfolio_winner_skips_absent_lecturers(absences):
+    result = solve_portfolio(JADWAL, LECTURER_EXPERTISE, absences=absences, deadline_ms=60_000, **SOLVE_OPTIONS)
+
+    assert_absent(result['final_schedule'], absences)
+    assert {outcome['status'] for outcome in result['analysis']['portfolio']} == {'done'}
@@ -0,0 +1,162 @@
+import io
+import json
+import zipfile
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
+
+import backend.batch as batch
+from backend.database import engine
+from backend.models import Defense, Schedule
+from main import app
+
+DOSEN = pd.DataFrame({"id": range(1, 9), "keahlian": ["A", "A, B", "B", "A", "B", "A, B", "A", "B"]})
+JADWAL = pd.DataFrame({"date": ["2024-01-08", "2024-01-08", "2024-01-09"], "time": ["08:00", "10:00", "08:00"],
+                       "bidang": ["A", "B", "A"], "ruang": ["R1", "R1", "R1"], "mahasiswa_id": [101, 102, 103],
+                       "judul": ["Batch 1", "Batch 2", "Batch 3"]})
+DOSEN_CSV = DOSEN.to_csv(index=False).encode()
+PARAMS = {"max_iterations": 5, "seed": 1, "use_cache": False}
+
+
+def jadwal_csv(title="Batch"):
+    return JADWAL.assign(judul=[f"{title} {i}" for i in range(len(JADWAL))]).to_csv(index=False).encode()
+
+
+def zip_of(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def post_archive(client, files, **params):
+    return client.post("/api/v1/schedule/batch", files={"archive": ("batch.zip", zip_of(files))},
+                       params={**PARAMS, **params})
+
+
+def by_name(body):
+    return {result["name"]: result for result in body["datasets"]}
+
+
+def stored_count(model=Schedule):
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(model)).one()
+
+
+def test_archive_is_paired_by_file_name(client):
+    response = post_archive(client, {"fk/dosen.csv": DOSEN_CSV, "fk/jadwal.csv": jadwal_csv(),
+                                     "fh_dosen.csv": DOSEN_CSV, "fh-jadwal.csv": jadwal_csv(),
+                                     "__MACOSX/fk/._dosen.csv": b"", "README.txt": b"notes"})
+
+    assert response.status_code == 200
+    body = response.json()
+    results = by_name(body)
+    assert set(results) == {"fk", "fh"}
+    assert (body["done"], body["cached"], body["failed"]) == (2, 0, 0)
+    assert {"solve", "db_commit"} <= set(body["timings"])
+    for result in results.values():
+        assert result["status"] == "done" and result["total_schedule"] == 3
+        assert client.get(f"/api/v1/schedules/{result['id']}").status_code == 200
+    assert results["fk"]["id"] != results["fh"]["id"]
+
+
+def test_archive_manifest_names_the_datasets(client):
+    manifest = {"datasets": [
+        {"name": "teknik", "dosen": "in/lecturers.csv", "jadwal": "in/term1.csv", "faculty": "teknik"},
+        {"dosen": "in/lecturers.csv", "jadwal": "in/term2.csv"},
+    ]}
+    response = post_archive(client, {"manifest.json": json.dumps(manifest), "in/lecturers.csv": DOSEN_CSV,
+                                     "in/term1.csv": jadwal_csv("Term 1"), "in/term2.csv": jadwal_csv("Term 2")})
+
+    assert response.status_code == 200
+    results = by_name(response.json())
+    # Without a name, a dataset is named after the dosen file's directory
+    assert set(results) == {"teknik", "in"}
+    assert all(result["status"] == "done" for result in results.values())
+
+
+def test_uploaded_files_with_and_without_a_manifest(client):
+    paired = client.post("/api/v1/schedule/batch", params=PARAMS, files=[
+        ("files", ("a_dosen.csv", DOSEN_CSV)), ("files", ("a_jadwal.csv", jadwal_csv())),
+    ])
+    manifest = [{"name": "b", "dosen": "lecturers.csv", "jadwal": "defenses.csv"}]
+    listed = client.post("/api/v1/schedule/batch", params=PARAMS, data={"manifest": json.dumps(manifest)}, files=[
+        ("files", ("lecturers.csv", DOSEN_CSV)), ("files", ("defenses.csv", jadwal_csv())),
+    ])
+
+    assert [(result["name"], result["status"]) for result in paired.json()["datasets"]] == [("a", "done")]
+    assert [(result["name"], result["status"]) for result in listed.json()["datasets"]] == [("b", "done")]
+
+
+def test_failed_and_cached_datasets(client):
+    files = {"ok/dosen.csv": DOSEN_CSV, "ok/jadwal.csv": jadwal_csv("Cached"),
+             "bad/dosen.csv": DOSEN_CSV, "bad/jadwal.csv": JADWAL.drop(columns="bidang").to_csv(index=False)}
+
+    first = by_name(post_archive(client, files, use_cache=True).json())
+    second = post_archive(client, files, use_cache=True).json()
+
+    assert first["ok"]["status"] == "done"
+    assert first["bad"]["status"] == "failed" and "bidang" in first["bad"]["error"]
+    assert (second["done"], second["cached"], second["failed"]) == (0, 1, 1)
+    assert by_name(second)["ok"]["id"] == first["ok"]["id"]
+
+
+@pytest.mark.parametrize("files, message", [
+    ({"fk/dosen.csv": DOSEN_CSV}, "without both a dosen and a jadwal file: fk"),
+    ({"fk/dosen.csv": DOSEN_CSV, "fk/jadwal.csv": b"", "fk/jadwal.xlsx": b""}, "More than one jadwal file"),
+    ({"manifest.json": '[{"dosen": "x.csv", "jadwal": "y.csv"}]', "x.csv": DOSEN_CSV}, "missing: y.csv"),
+    ({"manifest.json": '{"sets": []}'}, "Invalid manifest"),
+    ({"notes.txt": b""}, "No dosen/jadwal pairs found"),
+])
+def test_invalid_archives(client, files, message):
+    response = post_archive(client, files)
+
+    assert response.status_code == 422
+    assert message in response.json()["detail"]
+
+
+def test_archive_or_files(client):
+    neither = client.post("/api/v1/schedule/batch", params=PARAMS)
+    not_a_zip = client.post("/api/v1/schedule/batch", params=PARAMS, files={"archive": ("batch.zip", b"not a zip")})
+
+    assert neither.status_code == 422
+    assert not_a_zip.status_code == 422 and "not a zip file" in not_a_zip.json()["detail"]
+
+
+def test_a_failing_write_only_rolls_back_its_own_dataset(client, monkeypatch):
+    solve_schedule = batch.solve_schedule
+
+    def failing_for_broken_faculty(*args, **kwargs):
+        response, cached, pending = solve_schedule(*args, **kwargs)
+        if args[2].faculty == "broken":
+            def write(write_session, stored_write=pending.write):
+                stored_write(write_session)  # its rows are added, then the write fails
+                raise IntegrityError("INSERT", {}, Exception("constraint failed"))
+            pending = replace(pending, write=write)
+        return response, cached, pending
+
+    monkeypatch.setattr(batch, "solve_schedule", failing_for_broken_faculty)
+    manifest = [{"name": "broken", "dosen": "d.csv", "jadwal": "j1.csv", "faculty": "broken"},
+                {"name": "kept", "dosen": "d.csv", "jadwal": "j2.csv"}]
+    schedules, defenses = stored_count(), stored_count(Defense)
+
+    body = post_archive(client, {"manifest.json": json.dumps(manifest), "d.csv": DOSEN_CSV,
+                                 "j1.csv": jadwal_csv("Broken"), "j2.csv": jadwal_csv("Kept")}).json()
+
+    results = by_name(body)
+    assert results["broken"] == {**results["broken"], "status": "failed", "error": "Database error", "id": None}
+    assert results["kept"]["status"] == "done"
+    assert (body["done"], body["failed"]) == (1, 1)
+    assert stored_count() == schedules + 1
+    assert stored_count(Defense) == defenses + len(JADWAL)
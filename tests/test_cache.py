@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from backend.cache import ScheduleCache
+from backend.database import create_db_and_tables, engine, run_write
+from backend.models import Schedule, ScheduleCacheEntry
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    create_db_and_tables()
+    run_write(lambda session: session.exec(delete(ScheduleCacheEntry)))
+
+
+def store(cache, key, total=1):
+    """A new schedule cached under key, as build_schedule stores one"""
+    def write(session):
+        schedule = Schedule(schedule={"schedule": []}, total_schedule=total, total_dosen=1, avg_dosen=1.0)
+        session.add(schedule)
+        session.flush()
+        cache.put(session, key, schedule)
+        return schedule
+
+    schedule = run_write(write)
+    cache.remember(key, schedule)
+    return schedule
+
+
+def lookup(cache, key):
+    with Session(engine) as session:
+        return cache.get(session, key)
+
+
+def entry(key):
+    with Session(engine) as session:
+        return session.get(ScheduleCacheEntry, key)
+
+
+def test_hit_counts_and_miss():
+    cache = ScheduleCache(ttl=0, max_entries=0, memory_size=4)
+    schedule = store(cache, "a")
+
+    assert lookup(cache, "a").id == schedule.id
+    cache.clear_memory()
+    assert lookup(cache, "a").id == schedule.id
+    assert lookup(cache, "b") is None
+    assert entry("a").hits == 2
+
+
+def test_expired_entries_are_removed():
+    cache = ScheduleCache(ttl=60, max_entries=0, memory_size=4)
+    store(cache, "old")
+    store(cache, "new")
+
+    def age(session):
+        old = session.get(ScheduleCacheEntry, "old")
+        old.created_at = datetime.now(timezone.utc) - timedelta(seconds=61)
+        session.add(old)
+
+    run_write(age)
+
+    # Also when the schedule is still remembered in memory
+    assert lookup(cache, "old") is None
+    assert entry("old") is None
+    assert lookup(cache, "new") is not None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ScheduleCache(ttl=0, max_entries=2, memory_size=0)
+    store(cache, "a")
+    store(cache, "b")
+    lookup(cache, "a")  # b is now the least recently used
+    store(cache, "c")
+
+    with Session(engine) as session:
+        assert set(session.exec(select(ScheduleCacheEntry.key))) == {"a", "c"}
+    assert lookup(cache, "b") is None
+
+
+def test_invalidate_reaches_the_memory_of_other_processes():
+    cache, other_process = (ScheduleCache(ttl=0, max_entries=0, memory_size=4) for _ in range(2))
+    schedule = store(cache, "a")
+    assert lookup(other_process, "a").id == schedule.id
+
+    def edit(session):
+        cache.invalidate(session, schedule.id)
+
+    run_write(edit)
+
+    assert lookup(cache, "a") is None
+    assert lookup(other_process, "a") is None
+
+
+def test_memory_tier_follows_a_replaced_entry():
+    cache, other_process = (ScheduleCache(ttl=0, max_entries=0, memory_size=4) for _ in range(2))
+    store(cache, "a")
+    lookup(other_process, "a")
+
+    replacement = store(cache, "a", total=2)
+
+    assert lookup(other_process, "a").id == replacement.id
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from rl_impelementation.components import solve_components, split_components
+from rl_impelementation.engines import make_panel_engine, run_engine
+from rl_impelementation.panel_rules import default_max_workload
+from rl_impelementation.portfolio import score_schedule
+
+
+def two_departments():
+    """Two problems that share no lecturer and no field, uploaded together.
+    Their sizes differ, so a part's own MAX_WORKLOAD would differ from the whole's"""
+    dosen_a, jadwal_a = synthetic.generate(20, 60, n_fields=3, seed=1)
+    dosen_b, jadwal_b = synthetic.generate(20, 20, n_fields=3, seed=2)
+    dosen_b['id'] += 100
+    dosen_b['keahlian'] = dosen_b['keahlian'].str.replace('Bidang', 'Prodi')
+    jadwal_b['bidang'] = jadwal_b['bidang'].str.replace('Bidang', 'Prodi')
+    jadwal_b['mahasiswa_id'] += 1000
+    jadwal = pd.concat([jadwal_a, jadwal_b], ignore_index=True)
+    return jadwal, synthetic.lecturer_expertise(pd.concat([dosen_a, dosen_b]))
+
+
+@pytest.mark.parametrize("engine", ["rl", "flow"])
+def test_split_schedule_has_no_violations(engine):
+    jadwal, lecturer_expertise = two_departments()
+    assert len(split_components(jadwal, lecturer_expertise)) == 2
+
+    solved = solve_components(jadwal, lecturer_expertise, engine=engine, max_iterations=20, seed=3)
+    final_schedule = solved['final_schedule']
+
+    assert len(final_schedule) == len(jadwal)
+    score = score_schedule(final_schedule, lecturer_expertise,
+                           default_max_workload(len(jadwal), len(lecturer_expertise)))
+    assert score['violations'] == 0
+
+
+def test_split_greedy_panels_match_whole_problem():
+    jadwal, lecturer_expertise = two_departments()
+    max_workload = default_max_workload(len(jadwal), len(lecturer_expertise))
+
+    solved = solve_components(jadwal, lecturer_expertise, max_iterations=20, seed=3)
+    whole = run_engine(make_panel_engine('greedy', jadwal, lecturer_expertise, max_workload))
+
+    assert solved['final_schedule'].equals(whole)
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import threading
+
+import pytest
+from sqlalchemy import event, text
+from sqlmodel import Session, select
+
+from backend.database import WriteBatcher, create_db_and_tables, engine, make_engine
+from backend.models import Schedule
+
+
+@pytest.fixture
+def commits():
+    create_db_and_tables()
+    threads = []
+
+    def listener(connection):
+        threads.append(threading.current_thread().name)
+
+    event.listen(engine, "commit", listener)
+    yield threads
+    event.remove(engine, "commit", listener)
+
+
+def adder(marker, fail=False):
+    def write(session):
+        session.add(Schedule(schedule={"marker": marker}, total_schedule=0, total_dosen=0, avg_dosen=0.0))
+        session.flush()
+        if fail:
+            raise RuntimeError("broken write")
+        return marker
+    return write
+
+
+def stored_markers(markers):
+    with Session(engine) as session:
+        schedules = session.exec(select(Schedule)).all()
+    return sorted(s.schedule.get("marker") for s in schedules if s.schedule.get("marker") in markers)
+
+
+def test_writes_within_the_window_share_one_commit(commits):
+    batcher = WriteBatcher(window_ms=200, max_size=32)
+    markers = [f"batch-{i}" for i in range(5)]
+
+    futures = [batcher.submit(adder(marker)) for marker in markers]
+
+    assert [future.result(timeout=10) for future in futures] == markers
+    assert commits == ["db-write-batcher"]
+    assert stored_markers(markers) == markers
+
+
+def test_a_failing_write_only_fails_its_own_caller(commits):
+    batcher = WriteBatcher(window_ms=200, max_size=32)
+
+    ok = batcher.submit(adder("savepoint-ok"))
+    broken = batcher.submit(adder("savepoint-broken", fail=True))
+    after = batcher.submit(adder("savepoint-after"))
+
+    assert ok.result(timeout=10) == "savepoint-ok"
+    with pytest.raises(RuntimeError, match="broken write"):
+        broken.result(timeout=10)
+    assert after.result(timeout=10) == "savepoint-after"
+    assert len(commits) == 1
+    assert stored_markers({"savepoint-ok", "savepoint-broken", "savepoint-after"}) == \
+        ["savepoint-after", "savepoint-ok"]
+
+
+def test_max_size_ends_a_batch():
+    create_db_and_tables()
+    batcher = WriteBatcher(window_ms=60_000, max_size=2)
+
+    futures = [batcher.submit(adder(f"full-{i}")) for i in range(2)]
+
+    # Well before the window ends
+    assert [future.result(timeout=10) for future in futures] == ["full-0", "full-1"]
+
+
+def test_sqlite_pragmas():
+    sqlite_engine = make_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pragmas.db')}")
+
+    with sqlite_engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
@@ -0,0 +1,146 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from backend.database import engine, run_write
+from backend.models import Schedule, Defense
+from backend.scheduling import backfill_sort_keys
+from backend.streaming import EXPORT_COLUMNS, export_frames
+from main import app
+
+DOSEN = pd.DataFrame({"id": range(1, 9), "keahlian": ["A", "A", "A, B", "B", "B", "A, B", "A", "B"]})
+# As text "10:00" < "9:00", and "2024-01-08" < "2024-01-08 00:00:00" whatever the times
+JADWAL = pd.DataFrame({
+    "date": ["2024-01-08", "2024-01-08", "2024-01-08 00:00:00", "2024-01-09", "2024-01-08", "2024-01-08"],
+    "time": ["13:00", "10:00", "8:00", "8:00", "9:00", "13:00"],
+    "bidang": ["A", "B", "A", "B", "A", "B"],
+    "ruang": ["R1", "R1", "R1", "R1", "R2", "R2"],
+    "mahasiswa_id": [101, 102, 103, 104, 105, 106],
+    "judul": [f"Judul {i}" for i in range(6)],
+})
+# Students in date and time order; the two 13:00 defenses in insert order
+EXPECTED_ORDER = [103, 105, 102, 101, 106, 104]
+
+
+def upload():
+    return {"dosen_file": ("dosen.csv", DOSEN.to_csv(index=False).encode()),
+            "jadwal_file": ("jadwal.csv", JADWAL.to_csv(index=False).encode())}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def streamed(client):
+    """Content type and NDJSON lines of a streamed generation"""
+    with client.stream("POST", "/api/v1/schedule", files=upload(),
+                       params={"max_iterations": 5, "seed": 1, "use_cache": False, "stream": True}) as response:
+        assert response.status_code == 200
+        return response.headers["content-type"], [json.loads(line) for line in response.iter_lines() if line]
+
+
+@pytest.fixture(scope="module")
+def generated(streamed):
+    *rows, last = streamed[1]
+    return {"id": last["summary"]["id"], "schedule": rows}
+
+
+def panels(rows):
+    return {row["studentId"]: tuple(row["panelAssignment"].values()) for row in rows}
+
+
+def test_csv_export_is_in_date_and_time_order(client, generated):
+    response = client.get(f"/api/v1/schedules/{generated['id']}/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    exported = pd.read_csv(io.StringIO(response.text))
+    assert list(exported.columns) == EXPORT_COLUMNS
+    assert exported["studentId"].tolist() == EXPECTED_ORDER
+
+    stored = panels(generated["schedule"])
+    for row in exported.to_dict("records"):
+        roles = (row["penguji1Id"], row["penguji2Id"], row["pembimbing1Id"], row["pembimbing2Id"])
+        assert tuple(None if pd.isna(lecturer) else lecturer for lecturer in roles) == stored[row["studentId"]]
+
+
+def test_xlsx_export_has_the_csv_rows(client, generated):
+    csv = pd.read_csv(io.StringIO(client.get(f"/api/v1/schedules/{generated['id']}/export").text))
+    response = client.get(f"/api/v1/schedules/{generated['id']}/export", params={"format": "xlsx"})
+
+    assert response.status_code == 200
+    xlsx = pd.read_excel(io.BytesIO(response.content))
+    pd.testing.assert_frame_equal(xlsx, csv, check_dtype=False)
+
+
+def test_chunks_continue_after_ties(generated):
+    frames = list(export_frames(generated["id"], chunk_rows=2))
+
+    assert len(frames) == 3
+    assert pd.concat(frames)["studentId"].tolist() == EXPECTED_ORDER
+
+
+def test_export_of_an_unknown_schedule(client):
+    assert client.get("/api/v1/schedules/999999/export").status_code == 404
+
+
+def test_legacy_schedule_export_is_in_date_and_time_order():
+    rows = [{"date": date, "time": time, "room": "R1", "studentId": student_id, "thesisTitle": None, "field": "A",
+             "panelAssignment": {"penguji1Id": 1, "penguji2Id": None, "pembimbing1Id": 2, "pembimbing2Id": None}}
+            for date, time, student_id in [("2024-01-08", "10:00", 1), ("2024-01-08 00:00:00", "9:00", 2)]]
+    schedule = run_write(lambda session: add(session, stored_schedule({"schedule": rows})))
+
+    [frame] = export_frames(schedule.id)
+
+    assert frame["studentId"].tolist() == [2, 1]
+
+
+def test_backfill_gives_old_defenses_their_sort_keys():
+    def write(session):
+        schedule = add(session, stored_schedule({}))
+        return add(session, Defense(schedule_id=schedule.id, date="2024-01-08 00:00:00", time="9.00 WIB",
+                                     student_id=1, field="A"))
+
+    defense = run_write(write)
+    backfill_sort_keys()
+
+    with Session(engine) as session:
+        defense = session.get(Defense, defense.id)
+    assert (defense.day, defense.start) == ("2024-01-08", 9 * 3600)
+
+
+def test_ndjson_stream(client, streamed):
+    content_type, (*rows, last) = streamed
+
+    assert content_type == "application/x-ndjson"
+    assert sorted(row["studentId"] for row in rows) == sorted(EXPECTED_ORDER)
+    summary = last["summary"]
+    assert summary["cache"] == "miss" and summary["total_schedule"] == len(rows)
+
+    stored = client.get(f"/api/v1/schedules/{summary['id']}").json()
+    assert panels(stored["schedule"]["schedule"]) == panels(rows)
+
+
+def test_stream_of_an_invalid_upload_is_rejected_before_it_starts(client):
+    files = {**upload(), "jadwal_file": ("jadwal.csv", JADWAL.drop(columns="bidang").to_csv(index=False).encode())}
+
+    response = client.post("/api/v1/schedule", files=files, params={"stream": True})
+
+    assert response.status_code == 422
+
+
+def stored_schedule(body):
+    return Schedule(schedule=body, total_schedule=0, total_dosen=0, avg_dosen=0.0)
+
+
+def add(session, row):
+    session.add(row)
+    session.flush()
+    return row
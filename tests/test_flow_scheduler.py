@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from benchmarks import synthetic
+from rl_impelementation.flow_scheduler import FlowPanelScheduler, MinCostFlow
+from rl_impelementation.portfolio import score_schedule
+from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+
+
+def small_network():
+    # source 0 -> {1, 2} -> sink 3, the cheap path with too little capacity for the whole flow
+    graph = MinCostFlow(4)
+    for tail, head, cap, cost in [(0, 1, 2, 1), (0, 2, 3, 4), (1, 3, 2, 1), (2, 3, 3, 1), (1, 2, 1, 0)]:
+        graph.add_edge(tail, head, cap, cost)
+    return graph
+
+
+def test_scipy_and_python_solvers_agree():
+    graph = small_network()
+    scipy_flow = graph.solve(0, 3, 4, solver="scipy")
+    python_flow = graph.solve(0, 3, 4, solver="python")
+
+    costs = np.array(graph.costs)
+    assert scipy_flow @ costs == python_flow @ costs
+    supply = np.array([4, 0, 0, -4])
+    assert graph.is_feasible(scipy_flow, supply)
+    assert graph.is_feasible(python_flow, supply)
+
+
+def test_fractional_or_unbalanced_flow_is_rejected():
+    graph = small_network()
+    supply = np.array([4, 0, 0, -4])
+    flow = graph.solve(0, 3, 4, solver="python")
+
+    assert not graph.is_feasible(flow, supply, lp_flow=flow + 0.5)
+    unbalanced = flow.copy()
+    unbalanced[0] += 1
+    assert not graph.is_feasible(unbalanced, supply)
+
+
+@pytest.mark.parametrize("n_lecturers, n_defenses, overlap", [(50, 100, 0.0), (50, 100, 0.3), (30, 200, 0.2)])
+def test_flow_schedule_has_no_violations(n_lecturers, n_defenses, overlap):
+    dosen, jadwal = synthetic.generate(n_lecturers, n_defenses, overlap=overlap, seed=0)
+    lecturer_expertise = synthetic.lecturer_expertise(dosen)
+    scheduler = FlowPanelScheduler(jadwal, lecturer_expertise)
+
+    final_schedule = scheduler.create_schedule()
+
+    assert len(final_schedule) == n_defenses
+    score = score_schedule(final_schedule, lecturer_expertise, scheduler.MAX_WORKLOAD)
+    assert score['violations'] == 0
+    # The flow fills at least as many roles as the greedy panels
+    greedy = ThesisPanelSchedulerFinal(jadwal, lecturer_expertise).create_schedule()
+    assert score['emptyRoles'] <= score_schedule(greedy, lecturer_expertise, scheduler.MAX_WORKLOAD)['emptyRoles']
@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+
+from backend.scheduling import format_row, format_schedule
+from benchmarks import synthetic
+from rl_impelementation.engines import make_panel_engine, run_engine
+from rl_impelementation.ingestion import load_inputs
+
+
+def excel_upload(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def test_streamed_rows_match_schedule_for_excel_dates():
+    dosen, jadwal = synthetic.generate(20, 40, seed=3)
+    # Excel stores the dates as datetimes, read back as Timestamps
+    jadwal["date"] = pd.to_datetime(jadwal["date"])
+    jadwal_df, lecturer_expertise = load_inputs(excel_upload(dosen), excel_upload(jadwal))
+
+    streamed = []
+    final_schedule = run_engine(make_panel_engine("greedy", jadwal_df, lecturer_expertise),
+                                lambda row: streamed.append(format_row(row)))
+
+    assert format_schedule(final_schedule) == streamed
+    # Same text as str() of the date, as before streaming existed
+    assert streamed[0]["date"] == str(pd.Timestamp(streamed[0]["date"]))
+    assert streamed[0]["date"].endswith(" 00:00:00")
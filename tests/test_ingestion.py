@@ -0,0 +1,101 @@
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from rl_impelementation.ingestion import IngestionError, load_availability, load_inputs, read_table
+
+DOSEN = pd.DataFrame({"id": [1, 2], "keahlian": ["A, B", "B"]})
+JADWAL = pd.DataFrame({"date": ["2024-01-08"], "time": ["08:00"], "bidang": ["A"], "ruang": ["R1"],
+                       "mahasiswa_id": [100], "judul": ["Judul"]})
+
+
+def zip_of(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def excel_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("data", [
+    DOSEN.to_csv(index=False).encode(),
+    excel_bytes(DOSEN),
+    DOSEN.to_json(orient="records").encode(),
+    b"\xef\xbb\xbf" + DOSEN.to_csv(index=False).encode(),
+])
+def test_read_table_detects_the_format(data):
+    pd.testing.assert_frame_equal(read_table(data), DOSEN)
+
+
+@pytest.mark.parametrize("data", [
+    b"PK\x03\x04 cut off",
+    zip_of({"notes.txt": "not a workbook"}),
+    zip_of({"[Content_Types].xml": "<broken"}),
+    b"",
+])
+def test_unreadable_uploads_are_ingestion_errors(data):
+    with pytest.raises(IngestionError):
+        read_table(data)
+
+
+@pytest.mark.parametrize("jadwal, message", [
+    (JADWAL.drop(columns="ruang"), "missing columns: ruang"),
+    (JADWAL.assign(bidang=[None]), "empty values in columns: bidang"),
+    (JADWAL.assign(time=["pagi"]), "unreadable times: pagi"),
+    (JADWAL.assign(bidang=["C"]), "No lecturer has expertise in: C"),
+])
+def test_invalid_jadwal(jadwal, message):
+    with pytest.raises(IngestionError, match=message):
+        load_inputs(DOSEN.to_csv(index=False).encode(), jadwal.to_csv(index=False).encode())
+
+
+def test_load_inputs_parses_expertise():
+    jadwal_df, lecturer_expertise = load_inputs(excel_bytes(DOSEN), JADWAL.to_csv(index=False).encode())
+
+    assert lecturer_expertise == {1: ["A", "B"], 2: ["B"]}
+    assert len(jadwal_df) == 1
+
+
+def test_broken_workbook_upload_is_rejected():
+    files = {"dosen_file": ("dosen.xlsx", b"PK\x03\x04 cut off"),
+             "jadwal_file": ("jadwal.csv", JADWAL.to_csv(index=False).encode())}
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/schedule", files=files, params={"use_cache": False})
+
+    assert response.status_code == 422
+    assert "Could not read xlsx data" in response.json()["detail"]
+
+
+def test_availability_dates_must_be_jadwal_dates():
+    availability = pd.DataFrame({"id": [1, 2, 2], "date": ["2024-01-08 00:00:00", "2024-01-09", "08/01/2024"],
+                                 "time": [None, "08:00", None]})
+
+    with pytest.raises(IngestionError, match="dates that are not in jadwal: 2024-01-09, 08/01/2024"):
+        load_availability(availability.to_csv(index=False).encode(), JADWAL, {1: ["A", "B"], 2: ["B"]})
+
+    absences = load_availability(availability.iloc[:1].to_csv(index=False).encode(), JADWAL, {1: ["A"]})
+    assert absences == [(1, "2024-01-08", None)]
+
+
+def test_availability_upload_with_an_unknown_date_is_rejected():
+    availability = pd.DataFrame({"id": [1], "date": ["2024-02-30"]})
+    files = {"dosen_file": ("dosen.csv", DOSEN.to_csv(index=False).encode()),
+             "jadwal_file": ("jadwal.csv", JADWAL.to_csv(index=False).encode()),
+             "availability_file": ("availability.csv", availability.to_csv(index=False).encode())}
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/schedule", files=files, params={"use_cache": False})
+
+    assert response.status_code == 422
+    assert "not in jadwal: 2024-02-30" in response.json()["detail"]
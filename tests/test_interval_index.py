@@ -0,0 +1,55 @@
+import pytest
+
+from rl_impelementation.interval_index import LecturerIntervalIndex, gap_neighbors, to_seconds
+
+MIN_TIME_GAP = 7200
+
+
+@pytest.mark.parametrize("time, conflicts", [
+    ("08:00", True),  # the same slot
+    ("09:59:59", True),
+    ("10:00", False),  # exactly MIN_TIME_GAP later
+    ("06:00", False),  # exactly MIN_TIME_GAP earlier
+    ("06:00:01", True),
+    ("10.00 WIB", False),
+])
+def test_conflicts_within_min_time_gap(time, conflicts):
+    index = LecturerIntervalIndex(MIN_TIME_GAP)
+    index.add(1, "2024-01-08", "08:00")
+
+    assert index.conflicts(1, "2024-01-08", time) is conflicts
+    assert not index.conflicts(2, "2024-01-08", time)
+
+
+def test_adjacent_days_do_not_conflict():
+    index = LecturerIntervalIndex(MIN_TIME_GAP)
+    index.add(1, "2024-01-08", "23:00")
+
+    assert not index.conflicts(1, "2024-01-09", "00:30")
+    assert index.conflicts(1, "2024-01-08", "22:00")
+
+
+def test_remove_frees_only_that_start():
+    index = LecturerIntervalIndex(MIN_TIME_GAP)
+    for time in ("08:00", "10:00", "12:00"):
+        index.add(1, "2024-01-08", time)
+
+    index.remove(1, "2024-01-08", "10:00")
+
+    assert not index.conflicts(1, "2024-01-08", "10:00")
+    assert index.conflicts(1, "2024-01-08", "11:00")
+    index.remove(1, "2024-01-08", "09:00")  # never added
+    assert index.starts[1]["2024-01-08"] == [to_seconds("08:00"), to_seconds("12:00")]
+
+
+def test_gap_neighbors():
+    slots = [("2024-01-08", "08:00"), ("2024-01-08", "10:00"), ("2024-01-08", "09:00"), ("2024-01-09", "08:30"),
+             ("2024-01-08", "pagi")]
+
+    neighbors = gap_neighbors(slots, MIN_TIME_GAP)
+
+    assert sorted(neighbors[0]) == [0, 2]
+    assert sorted(neighbors[1]) == [1, 2]
+    assert sorted(neighbors[2]) == [0, 1, 2]
+    assert neighbors[3] == [3]
+    assert neighbors[4] == [4]
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import backend.routes.jobs as jobs_route
+from backend.database import engine
+from backend.jobs import JobRunner, job_runner
+from backend.models import ScheduleJob
+from main import app
+
+
+def test_failed_submit_gives_its_queue_slot_back(monkeypatch):
+    def broken_params(params):
+        raise RuntimeError("broken upload")
+
+    monkeypatch.setattr(jobs_route, "asdict", broken_params)
+    files = {"dosen_file": ("dosen.csv", b"id,keahlian\n"), "jadwal_file": ("jadwal.csv", b"date\n")}
+
+    with TestClient(app) as client:
+        pending = job_runner.pending
+        for _ in range(job_runner.max_pending + 1):
+            with pytest.raises(RuntimeError):
+                client.post("/api/v1/schedule/jobs", files=files)
+        assert job_runner.pending == pending
+
+
+def wait_for(client, job_id):
+    for _ in range(200):
+        job = client.get(f"/api/v1/schedule/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_states_are_stored(monkeypatch):
+    # The app's runner is shut down with the first TestClient that closes
+    monkeypatch.setattr(jobs_route, "job_runner", JobRunner(max_workers=1, max_pending=4))
+    dosen = b"id,keahlian\n1,A\n2,A\n3,A\n4,A\n"
+    jadwal = b"date,time,bidang,ruang,mahasiswa_id,judul\n2024-01-08,08:00,A,R1,100,Judul\n"
+
+    with TestClient(app) as client:
+        done = client.post("/api/v1/schedule/jobs", files={"dosen_file": ("dosen.csv", dosen),
+                                                           "jadwal_file": ("jadwal.csv", jadwal)},
+                           params={"max_iterations": 5})
+        failed = client.post("/api/v1/schedule/jobs", files={"dosen_file": ("dosen.csv", dosen),
+                                                             "jadwal_file": ("jadwal.csv", b"date\n2024-01-08\n")})
+        assert done.status_code == failed.status_code == 202
+
+        done, failed = wait_for(client, done.json()["id"]), wait_for(client, failed.json()["id"])
+        assert done["schedule_id"] is not None and done["finished_at"] is not None
+        assert client.get(f"/api/v1/schedule/jobs/{done['id']}/result").json()["total_schedule"] == 1
+        assert failed["error"].startswith("IngestionError: jadwal is missing columns")
+
+    with Session(engine) as session:
+        job = session.get(ScheduleJob, done["id"])
+        assert job.dosen_file is None and job.jadwal_file is None
@@ -0,0 +1,124 @@
+import re
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.profiling as profiling
+from backend.metrics import Counter, Histogram, slow_profiles_total
+from main import app
+
+DOSEN = pd.DataFrame({"id": range(1, 7), "keahlian": ["A", "A, B", "B", "A", "B", "A, B"]})
+JADWAL = pd.DataFrame({"date": ["2024-01-08", "2024-01-08"], "time": ["08:00", "10:00"], "bidang": ["A", "B"],
+                       "ruang": ["R1", "R1"], "mahasiswa_id": [101, 102], "judul": ["Judul 1", "Judul 2"]})
+SAMPLE = re.compile(r'^([a-z_]+)(\{.*\})? (\S+)$')
+
+
+def upload():
+    return {"dosen_file": ("dosen.csv", DOSEN.to_csv(index=False).encode()),
+            "jadwal_file": ("jadwal.csv", JADWAL.to_csv(index=False).encode())}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def scrape(client):
+    """/metrics as {sample name and labels: value}, checking every line is Prometheus text"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP [a-z_]+ .+|TYPE [a-z_]+ (counter|gauge|histogram))$", line)
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        samples[(match[1] + (match[2] or ""))] = float(match[3])
+    return samples
+
+
+def test_metrics_count_schedules_and_requests(client):
+    before = scrape(client)
+    response = client.post("/api/v1/schedule", files=upload(), params={"max_iterations": 5, "use_cache": False})
+    assert response.status_code == 200
+    after = scrape(client)
+
+    def grew(name):
+        return after[name] - before.get(name, 0)
+
+    assert grew('sofi_schedule_duration_seconds_count{cache="miss"}') == 1
+    assert grew('sofi_http_request_duration_seconds_count{method="POST",route="/api/v1/schedule",status="200"}') == 1
+    assert grew("sofi_rl_iterations_total") == response.json()["iterations"]
+    assert grew('sofi_schedule_phase_duration_seconds_count{phase="read"}') == 1
+    assert after['sofi_schedule_duration_seconds_bucket{cache="miss",le="+Inf"}'] == \
+        after['sofi_schedule_duration_seconds_count{cache="miss"}']
+    assert after["sofi_http_requests_in_flight"] == 1  # the scrape itself
+
+
+def test_server_timing_header_has_the_schedule_phases(client):
+    response = client.post("/api/v1/schedule", files=upload(), params={"max_iterations": 5, "use_cache": False})
+
+    phases = dict(entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", "))
+    assert {"read", "format", "db_commit"} <= set(phases)
+    assert all(float(ms) >= 0 for ms in phases.values())
+
+    cached = client.post("/api/v1/schedule", files=upload(), params={"max_iterations": 5})
+    hit = client.post("/api/v1/schedule", files=upload(), params={"max_iterations": 5})
+    assert cached.status_code == hit.status_code == 200
+    assert hit.headers["X-Schedule-Cache"] == "hit"
+    assert "cache;dur=" in hit.headers["Server-Timing"]
+
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    histogram = Histogram("test_seconds", "Test", (0.1, 1), ("route",))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, route='/a"b')
+    counter = Counter("test_total", "Test")
+    counter.inc(2)
+
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'test_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'test_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'test_seconds_sum{route="/a\\"b"} 3.65',
+        'test_seconds_count{route="/a\\"b"} 4',
+    ]
+    assert counter.render() == ["# HELP test_total Test", "# TYPE test_total counter", "test_total 2"]
+
+
+def profiled(threshold_ms, seconds):
+    with profiling.profile_if_slow("test", threshold_ms=threshold_ms):
+        time.sleep(seconds)
+
+
+def test_profile_is_kept_only_above_the_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    saved = slow_profiles_total.values.get((), 0)
+
+    profiled(threshold_ms=1000, seconds=0.01)
+    assert list(tmp_path.iterdir()) == []
+
+    profiled(threshold_ms=5, seconds=0.05)
+    [profile] = tmp_path.iterdir()
+    assert profile.name.startswith("test-") and profile.stat().st_size > 0
+    assert slow_profiles_total.values[()] == saved + 1
+
+    profiled(threshold_ms=0, seconds=0.05)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_slow_schedule_request_is_profiled(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_SLOW_MS", 1)
+
+    response = client.post("/api/v1/schedule", files=upload(), params={"max_iterations": 5, "use_cache": False})
+
+    assert response.status_code == 200
+    [profile] = tmp_path.iterdir()
+    assert profile.name.startswith("generate_schedule-")
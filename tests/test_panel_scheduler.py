@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from rl_impelementation.thesis_panel_scheduler_final import ThesisPanelSchedulerFinal
+
+
+class SortAndScanScheduler(ThesisPanelSchedulerFinal):
+    """The pick before the field heaps: sort the qualified lecturers by workload
+    (stable, so ties keep lecturer_expertise order) and take the first available one"""
+
+    def next_available(self, field, date, time, assigned_lecturers, set_aside):
+        qualified = [lid for lid, expertise in self.lecturer_expertise.items() if field in expertise]
+        qualified.sort(key=lambda lid: self.lecturer_workload[lid]['total'])
+        return next((lid for lid in qualified if self.is_lecturer_available(lid, date, time, assigned_lecturers)),
+                    None)
+
+
+@pytest.mark.parametrize("n_lecturers, n_defenses, overlap, n_dates", [
+    (50, 100, 0.3, None),
+    (30, 200, 0.2, None),  # MAX_WORKLOAD binds
+    (40, 120, 0.5, 3),  # the daily limit binds
+])
+def test_heaps_match_sort_and_scan(n_lecturers, n_defenses, overlap, n_dates):
+    dosen, jadwal = synthetic.generate(n_lecturers, n_defenses, overlap=overlap, n_dates=n_dates, seed=5)
+    lecturer_expertise = synthetic.lecturer_expertise(dosen)
+    absences = [(lid, jadwal['date'].iloc[i], None) for i, lid in enumerate(list(lecturer_expertise)[:10])]
+
+    for options in ({}, {'absences': absences}):
+        heaps = ThesisPanelSchedulerFinal(jadwal, lecturer_expertise, **options).create_schedule()
+        reference = SortAndScanScheduler(jadwal, lecturer_expertise, **options).create_schedule()
+        assert heaps.equals(reference)
+
+
+def defense(date, time):
+    return {'date': date, 'time': time, 'bidang': 'A'}
+
+
+def test_lecturers_come_back_once_their_daily_cap_is_freed():
+    # Exactly one panel's worth of lecturers, so every panel needs all of them
+    lecturer_expertise = {lid: ['A'] for lid in range(1, 5)}
+    scheduler = ThesisPanelSchedulerFinal(pd.DataFrame(), lecturer_expertise, max_workload=10)
+    full_panel = {1, 2, 3, 4}
+
+    scheduler.assign_panel(defense('2024-01-08', '08:00'))
+    second = scheduler.assign_panel(defense('2024-01-08', '10:00'))
+    assert set(second.values()) == full_panel
+
+    # Everyone is at MAX_DAILY_ASSIGNMENTS and parked for the rest of the date
+    assert set(scheduler.assign_panel(defense('2024-01-08', '13:00')).values()) == {None}
+    assert scheduler.parked
+
+    scheduler.release_panel('2024-01-08', '10:00', second)
+    assert set(scheduler.assign_panel(defense('2024-01-08', '13:00')).values()) == full_panel
+
+    # Parked entries return on the next date
+    assert set(scheduler.assign_panel(defense('2024-01-08', '15:00')).values()) == {None}
+    assert set(scheduler.assign_panel(defense('2024-01-09', '08:00')).values()) == full_panel
+
+
+def test_lecturers_come_back_once_their_total_cap_is_freed():
+    lecturer_expertise = {lid: ['A'] for lid in range(1, 5)}
+    scheduler = ThesisPanelSchedulerFinal(pd.DataFrame(), lecturer_expertise, max_workload=1)
+
+    first = scheduler.assign_panel(defense('2024-01-08', '08:00'))
+    assert set(scheduler.assign_panel(defense('2024-01-09', '08:00')).values()) == {None}
+
+    scheduler.release_panel('2024-01-08', '08:00', first)
+    assert set(scheduler.assign_panel(defense('2024-01-09', '08:00')).values()) == {1, 2, 3, 4}
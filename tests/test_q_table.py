@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from backend.database import engine
+from backend.models import FacultyQTable
+from benchmarks import synthetic
+from main import app
+from rl_impelementation.q_table import QTable
+
+
+def test_merge_entries_adds_what_each_table_learned():
+    base = [["A", "08:00", 0, 1, 1.0, 2], ["B", "08:00", 0, 2, 5.0, 1]]
+    # Stored by another run since: A visited twice more, a new entry for C
+    stored = [["A", "08:00", 0, 1, 3.0, 4], ["B", "08:00", 0, 2, 5.0, 1], ["C", "10:00", 1, 3, 7.0, 1]]
+    # This run's upload had no field B
+    trained = [["A", "08:00", 0, 1, 2.0, 3], ["A", "10:00", 0, 1, 4.0, 2]]
+
+    merged = {tuple(entry[:4]): entry[4:] for entry in QTable.merge_entries(base, [stored, trained])}
+
+    assert merged == {
+        ("A", "08:00", 0, 1): [pytest.approx((2 * 3.0 + 1 * 2.0) / 3), 5],
+        ("B", "08:00", 0, 2): [5.0, 1],
+        ("C", "10:00", 1, 3): [7.0, 1],
+        ("A", "10:00", 0, 1): [4.0, 2],
+    }
+
+
+def upload(dosen, jadwal):
+    return {"dosen_file": ("dosen.csv", dosen.to_csv(index=False).encode()),
+            "jadwal_file": ("jadwal.csv", jadwal.to_csv(index=False).encode())}
+
+
+def stored_entries(faculty):
+    with Session(engine) as session:
+        row = session.exec(select(FacultyQTable).where(FacultyQTable.faculty == faculty)).one()
+    return {tuple(entry[:4]): entry[4:] for entry in row.q_values}, row.episodes
+
+
+def test_faculty_table_keeps_the_entries_of_earlier_uploads():
+    dosen, jadwal = synthetic.generate(20, 30, n_fields=2, overlap=0.5, seed=2)
+    # Same lecturers and fields at another time, so none of its entries are the first upload's
+    later_term = jadwal.assign(time="09:00")
+    params = {"seed": 1, "patience": 200, "max_iterations": 400, "use_cache": False}
+
+    with TestClient(app) as client:
+        client.post("/api/v1/schedule", files=upload(dosen, jadwal), params={**params, "faculty": "warm"})
+        first, first_episodes = stored_entries("warm")
+        client.post("/api/v1/schedule", files=upload(dosen, later_term), params={**params, "faculty": "warm"})
+        second, second_episodes = stored_entries("warm")
+
+        warm = client.post("/api/v1/schedule", files=upload(dosen, jadwal),
+                           params={**params, "seed": 2, "faculty": "warm"}).json()
+        cold = client.post("/api/v1/schedule", files=upload(dosen, jadwal),
+                           params={**params, "seed": 2, "faculty": "cold"}).json()
+
+    assert {key: second[key] for key in first} == first
+    assert len(second) > len(first)
+    assert second_episodes > first_episodes
+    assert warm["iterations"] < cold["iterations"]
+    assert warm["reward"] >= cold["reward"]
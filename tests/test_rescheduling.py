@@ -0,0 +1,155 @@
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import backend.routes.schduler as schedule_route
+from backend.database import engine
+from backend.models import Schedule
+from backend.rescheduling import ScheduleChangedError, reschedule
+from backend.schemas import ScheduleEditRequest
+from main import app
+
+DOSEN = pd.DataFrame({"id": range(1, 25), "keahlian": ["A", "A, B", "B", "A", "B", "A, B"] * 4})
+JADWAL = pd.DataFrame({
+    "date": ["2024-01-08"] * 3 + ["2024-01-09"] * 3,
+    "time": ["08:00", "10:00", "13:00"] * 2,
+    "bidang": ["A", "B", "A", "B", "A", "B"],
+    "ruang": ["R1"] * 6,
+    "mahasiswa_id": [101, 102, 103, 104, 105, 106],
+    "judul": [f"Judul {i}" for i in range(6)],
+})
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def schedule(client):
+    """Id and rows ({studentId: row}) of a newly generated schedule"""
+    files = {"dosen_file": ("dosen.csv", DOSEN.to_csv(index=False).encode()),
+             "jadwal_file": ("jadwal.csv", JADWAL.to_csv(index=False).encode())}
+    with client.stream("POST", "/api/v1/schedule", files=files,
+                       params={"max_iterations": 5, "seed": 1, "use_cache": False, "stream": True}) as response:
+        *rows, last = [json.loads(line) for line in response.iter_lines() if line]
+    return last["summary"]["id"], {row["studentId"]: row for row in rows}
+
+
+def edit(client, schedule_id, *edits):
+    return client.patch(f"/api/v1/schedules/{schedule_id}", json={"edits": list(edits)},
+                        params={"verify": True})
+
+
+def by_student(body):
+    return {row["studentId"]: row for row in body["schedule"]}
+
+
+def assert_kept(before, after, changed):
+    for student_id, row in before.items():
+        if student_id not in changed and student_id in after:
+            assert after[student_id] == row
+
+
+def test_add(client, schedule):
+    schedule_id, before = schedule
+    defense = {"date": "2024-01-09", "time": "15:00", "room": "R2", "studentId": 107, "field": "A"}
+
+    response = edit(client, schedule_id, {"op": "add", "defense": defense})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["changed"] == [107]
+    after = by_student(body)
+    assert after[107]["panelAssignment"]["penguji1Id"] is not None
+    assert after[107]["panelAssignment"]["pembimbing1Id"] is not None
+    assert_kept(before, after, body["changed"])
+    assert body["total_schedule"] == 7
+    assert body["verification"]["valid"]
+
+
+def test_remove(client, schedule):
+    schedule_id, before = schedule
+
+    body = edit(client, schedule_id, {"op": "remove", "studentId": 102}).json()
+
+    # Only defenses that got a new panel are changed
+    assert body["changed"] == []
+    after = by_student(body)
+    assert 102 not in after
+    assert_kept(before, after, body["changed"])
+    assert body["total_schedule"] == 5
+    export = client.get(f"/api/v1/schedules/{schedule_id}/export").text
+    assert len(export.splitlines()) == 1 + 5
+
+
+def test_move_keeps_the_lecturers_that_are_still_available(client, schedule):
+    schedule_id, before = schedule
+
+    body = edit(client, schedule_id, {"op": "move", "studentId": 101, "date": "2024-01-10", "room": "R9"}).json()
+
+    after = by_student(body)
+    assert body["changed"] == [101]
+    assert (after[101]["date"], after[101]["time"], after[101]["room"]) == ("2024-01-10", "08:00", "R9")
+    # Nobody else sits on a panel that day
+    assert after[101]["panelAssignment"] == before[101]["panelAssignment"]
+    assert_kept(before, after, body["changed"])
+
+
+def test_unavailable_lecturer_is_replaced_on_that_date_only(client, schedule):
+    schedule_id, before = schedule
+    lecturer_id = before[101]["panelAssignment"]["penguji1Id"]
+    on_date = {sid for sid, row in before.items()
+               if row["date"] == "2024-01-08" and lecturer_id in row["panelAssignment"].values()}
+
+    body = edit(client, schedule_id, {"op": "unavailable", "lecturerId": lecturer_id, "date": "2024-01-08"}).json()
+
+    after = by_student(body)
+    assert set(body["changed"]) == on_date
+    for student_id in on_date:
+        assert lecturer_id not in after[student_id]["panelAssignment"].values()
+        filled = [lecturer for lecturer in after[student_id]["panelAssignment"].values() if lecturer is not None]
+        assert len(filled) == sum(lecturer is not None for lecturer in before[student_id]["panelAssignment"].values())
+    assert_kept(before, after, body["changed"])
+    assert body["verification"]["valid"]
+
+    # Later edits keep honouring the absence
+    moved = by_student(edit(client, schedule_id, {"op": "move", "studentId": 104, "date": "2024-01-08",
+                                                  "time": "15:00"}).json())
+    assert lecturer_id not in moved[104]["panelAssignment"].values()
+
+
+def test_invalid_edits(client, schedule):
+    schedule_id, _ = schedule
+
+    assert edit(client, schedule_id, {"op": "remove", "studentId": 999}).status_code == 422
+    assert edit(client, schedule_id, {"op": "move", "studentId": 101, "time": "pagi"}).status_code == 422
+    assert edit(client, schedule_id, {"op": "unavailable", "lecturerId": 999, "date": "2024-01-08"}).status_code == 422
+    assert edit(client, 999999, {"op": "remove", "studentId": 101}).status_code == 404
+
+
+def test_edit_of_a_schedule_changed_meanwhile(client, schedule):
+    schedule_id, _ = schedule
+    edits = ScheduleEditRequest(edits=[{"op": "remove", "studentId": 103}]).edits
+
+    with Session(engine) as session:
+        stale = session.get(Schedule, schedule_id)
+        edit(client, schedule_id, {"op": "remove", "studentId": 102})
+
+        with pytest.raises(ScheduleChangedError):
+            reschedule(session, stale, edits)
+
+    assert client.get(f"/api/v1/schedules/{schedule_id}").json()["schedule"]["total_schedule"] == 5
+
+
+def test_changed_schedule_is_a_conflict(client, schedule, monkeypatch):
+    def changed(session, schedule, edits):
+        raise ScheduleChangedError(f"Schedule {schedule.id} was changed by another request")
+
+    monkeypatch.setattr(schedule_route, "reschedule", changed)
+
+    assert edit(client, schedule[0], {"op": "remove", "studentId": 101}).status_code == 409
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+import rl_impelementation.thesis_defense_scheduler as scheduler_module
+from benchmarks import synthetic
+from rl_impelementation.thesis_defense_scheduler import (BoundedPool, ThesisDefenseScheduler, get_rollout_pool,
+                                                         shutdown_rollout_pool)
+
+
+@pytest.fixture
+def rollout_pool():
+    yield
+    shutdown_rollout_pool()
+
+
+def test_seeded_search_does_not_depend_on_workers(rollout_pool):
+    dosen, jadwal = synthetic.generate(30, 60, seed=1)
+    lecturer_expertise = synthetic.lecturer_expertise(dosen)
+
+    results = []
+    for n_workers in (1, 3):
+        scheduler = ThesisDefenseScheduler(jadwal, lecturer_expertise)
+        best_schedule, best_reward = scheduler.schedule_defenses(jadwal, lecturer_expertise, max_iterations=40,
+                                                                 n_workers=n_workers, seed=7)
+        results.append((best_schedule, best_reward, scheduler.iterations_run,
+                        sorted(scheduler.q_table.to_entries())))
+
+    assert results[0] == results[1]
+
+
+def test_bounded_pool_caps_the_tasks_of_a_call():
+    running = []
+    most = []
+    lock = threading.Lock()
+
+    def task(i):
+        with lock:
+            running.append(i)
+            most.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(i)
+        return i
+
+    with ThreadPoolExecutor(max_workers=4) as shared:
+        pool = BoundedPool(shared, 2)
+        futures = [pool.submit(task, i) for i in range(6)]
+        skipped = pool.submit(task, 6)
+        assert skipped.cancel()
+        wait(futures)
+
+    assert [future.result() for future in futures] == list(range(6))
+    assert max(most) == 2
+    assert len(most) == 6
+
+
+def test_calls_share_one_pool(rollout_pool, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "ROLLOUT_POOL_SIZE", 2)
+
+    small, large = get_rollout_pool(1), get_rollout_pool(4)
+
+    assert small.pool is large.pool
+    assert (small.slots, large.slots) == (1, 2)
+    assert large.submit(pow, 2, 5).result() == 32
+
+
+def test_seeded_search_checks_patience_after_each_chunk(rollout_pool):
+    dosen, jadwal = synthetic.generate(30, 60, seed=1)
+    lecturer_expertise = synthetic.lecturer_expertise(dosen)
+
+    runs = []
+    for n_workers in (1, 2):
+        scheduler = ThesisDefenseScheduler(jadwal, lecturer_expertise)
+        best_schedule, best_reward = scheduler.schedule_defenses(jadwal, lecturer_expertise, max_iterations=500,
+                                                                 n_workers=n_workers, seed=7, patience=4)
+        runs.append((scheduler.iterations_run, best_reward, sorted(scheduler.q_table.to_entries())))
+
+    iterations_run = runs[0][0]
+    assert iterations_run % ThesisDefenseScheduler.ROLLOUTS_PER_CHUNK == 0
+    assert iterations_run < ThesisDefenseScheduler.ROLLOUTS_PER_CHUNK * ThesisDefenseScheduler.CHUNKS_PER_ROUND
+    assert runs[0] == runs[1]
@@ -0,0 +1,15 @@
+from dataclasses import asdict
+
+from backend.scheduling import ScheduleParams
+
+
+def test_from_dict_fills_parameters_missing_from_older_jobs():
+    stored = asdict(ScheduleParams.from_dict({}))
+    del stored["engine"]
+    stored["removed_option"] = 1
+
+    params = ScheduleParams.from_dict({**stored, "seed": 7})
+
+    assert params.engine == "rl"
+    assert params.seed == 7
+    assert asdict(params) == {**asdict(ScheduleParams.from_dict({})), "seed": 7}
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from rl_impelementation.schedule_verifier import verify_assignments
+
+
+def test_same_slot_in_other_date_and_time_formats_is_a_conflict():
+    result = verify_assignments([
+        ("2024-01-08", "08:00", "A", [1, 2]),
+        ("2024-01-08 00:00:00", "08.00 WIB", "A", [1, 3]),
+        (pd.Timestamp("2024-01-08"), "08:00 - 10:00", "A", [4, 2]),
+    ])
+
+    assert result["time_conflicts"] == 2
+    assert result["gap_violations"] == 0
+    assert not result["valid"]
+
+
+def test_gap_rule_applies_across_date_formats():
+    close = verify_assignments([("2024-01-08", "08:00", "A", [1]), ("2024-01-08 00:00:00", "09:59", "A", [1])])
+    exactly_the_gap = verify_assignments([("2024-01-08", "08:00", "A", [1]), ("2024-01-08", "10:00", "A", [1])])
+    other_days = verify_assignments([("2024-01-08", "08:00", "A", [1]), ("2024-01-09", "09:00", "A", [1])])
+
+    assert close["gap_violations"] == 1
+    assert exactly_the_gap["gap_violations"] == 0 and exactly_the_gap["valid"]
+    assert other_days["gap_violations"] == 0
+
+
+def test_daily_cap_counts_each_assignment_over_it():
+    result = verify_assignments([
+        ("2024-01-08", "08:00", "A", [1, 2]),
+        ("2024-01-08 00:00:00", "10:00", "A", [1, 2]),
+        ("2024-01-08", "13:00", "A", [1]),
+        ("2024-01-08", "15:00", "A", [1]),
+    ], max_daily=2)
+
+    assert result["daily_violations"] == 2
+    assert result["time_conflicts"] == 0 and result["gap_violations"] == 0
+
+
+def test_expertise_workload_and_empty_roles():
+    result = verify_assignments([
+        ("2024-01-08", "08:00", "A", [1, 2, None]),
+        ("2024-01-09", "08:00", "B", [1, None, None]),
+    ], lecturer_expertise={1: ["A", "B"], 2: ["B"]}, max_workload=1)
+
+    assert result["total_assignments"] == 3
+    assert result["empty_roles"] == 3
+    assert result["expertise_violations"] == 1
+    assert result["workload_violations"] == 1